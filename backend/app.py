@@ -3,50 +3,397 @@ HealthVoice Backend API
 Flask application for processing voice health logs and providing health insights
 """
 
-from flask import Flask, request, jsonify
+from flask import Blueprint, Flask, Response, current_app, g, request, jsonify, send_file, stream_with_context
 from flask_cors import CORS
-from datetime import datetime, timedelta
+from werkzeug.local import LocalProxy
+from datetime import datetime, timezone
+import hashlib
 import os
+import tempfile
+import threading
+import time
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# Import services and controllers
-from services.database import DatabaseService
-from services.text_analyzer import TextAnalyzerService
-from controllers.health_log_controller import HealthLogController
-from controllers.dashboard_controller import DashboardController
-from controllers.insights_controller import InsightsController
-from controllers.summary_controller import SummaryController
-from controllers.trends_controller import TrendsController
+# Services and controllers are imported by Services when first built;
+# only what the routes themselves reference is imported here
+from services import metrics
+from services.health_aggregator import HealthAggregator
+from services.log_exporter import LogExporter
+from services.report_jobs import QueueFullError
 
-# Initialize Flask app
-app = Flask(__name__)
-CORS(app)  # Enable CORS for frontend communication
+# Routes live on a blueprint so every application built by create_app() gets them
+api = Blueprint('api', __name__)
 
-# Initialize services
-db_service = DatabaseService()
-text_analyzer = TextAnalyzerService()
+# Seconds /api/reports/download waits for a queued PDF before answering with the job instead
+REPORT_WAIT_TIMEOUT = float(os.environ.get('REPORT_WAIT_TIMEOUT', 60))
 
-# Initialize controllers
-health_log_controller = HealthLogController(db_service, text_analyzer)
-dashboard_controller = DashboardController(db_service)
-insights_controller = InsightsController(db_service)
-summary_controller = SummaryController(db_service)
-trends_controller = TrendsController(db_service)
+# When create_app() runs DatabaseService.migrate(): in a background thread, before returning, or never
+MIGRATE_MODES = ['background', 'sync', 'off']
 
 
-@app.route('/health', methods=['GET'])
+class lazy_service:
+    """
+    Decorator for a Services attribute that is built on first access and then reused
+    
+    Like functools.cached_property, but the build runs under the instance's
+    lock, so concurrent first requests share one instance.
+    """
+    
+    def __init__(self, build):
+        self.build = build
+        self.name = build.__name__
+        self.__doc__ = build.__doc__
+    
+    def __get__(self, services, owner=None):
+        if services is None:
+            return self
+        with services._lock:
+            if self.name not in services.__dict__:
+                services.__dict__[self.name] = self.build(services)
+            return services.__dict__[self.name]
+
+
+class Services:
+    """
+    Services and controllers of one application, configured from environment variables
+    
+    Each is imported and built the first time a request needs it, so a worker
+    starts serving without paying for modules (numpy, the keyword matcher) or
+    pools that its first requests may never touch.
+    """
+    
+    def __init__(self):
+        # Reentrant: building a controller builds the services it depends on
+        self._lock = threading.RLock()
+    
+    @lazy_service
+    def db_service(self):
+        """MongoDB access; connects on first query"""
+        from services.database import DatabaseService
+        return DatabaseService()
+    
+    @lazy_service
+    def text_analyzer(self):
+        """Note analyzer with its memoization cache"""
+        from services.text_analyzer import TextAnalyzerService
+        return TextAnalyzerService(
+            cache_size=int(os.environ.get('ANALYSIS_CACHE_SIZE', 1024)),
+            cache_ttl=float(os.environ.get('ANALYSIS_CACHE_TTL', 3600))
+        )
+    
+    @lazy_service
+    def response_cache(self):
+        """Versioned cache of read-endpoint responses"""
+        from services.response_cache import ResponseCache
+        return ResponseCache(
+            max_entries=int(os.environ.get('RESPONSE_CACHE_SIZE', 512)),
+            max_bytes=int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 16 * 1024 * 1024)),
+            ttl=float(os.environ.get('RESPONSE_CACHE_TTL', 300))
+        )
+    
+    @lazy_service
+    def report_jobs(self):
+        """PDF rendering queue and its on-disk cache"""
+        from services.report_cache import ReportCache
+        from services.report_jobs import ReportJobQueue
+        return ReportJobQueue(
+            ReportCache(
+                directory=os.environ.get('REPORT_DIR') or os.path.join(tempfile.gettempdir(), 'healthvoice_reports'),
+                max_bytes=int(os.environ.get('REPORT_CACHE_MAX_BYTES', 256 * 1024 * 1024)),
+                ttl=float(os.environ.get('REPORT_TTL', 3600))
+            ),
+            workers=int(os.environ.get('REPORT_WORKERS', 2)),
+            max_pending=int(os.environ.get('REPORT_MAX_PENDING', 50)),
+            ttl=float(os.environ.get('REPORT_TTL', 3600))
+        )
+    
+    @lazy_service
+    def request_profiler(self):
+        """Opt-in stack sampling of requests; off unless PROFILE_SAMPLE_RATE or PROFILE_TOKEN is set"""
+        from services.request_profiler import RequestProfiler
+        return RequestProfiler(
+            directory=os.environ.get('PROFILE_DIR') or os.path.join(tempfile.gettempdir(), 'healthvoice_profiles'),
+            sample_rate=float(os.environ.get('PROFILE_SAMPLE_RATE', 0)),
+            token=os.environ.get('PROFILE_TOKEN') or None,
+            interval=float(os.environ.get('PROFILE_INTERVAL_MS', 1)) / 1000,
+            max_bytes=int(os.environ.get('PROFILE_MAX_BYTES', 64 * 1024 * 1024)),
+            max_files=int(os.environ.get('PROFILE_MAX_FILES', 500))
+        )
+    
+    @lazy_service
+    def health_log_controller(self):
+        """Log creation and listing"""
+        from controllers.health_log_controller import HealthLogController
+        return HealthLogController(self.db_service, self.text_analyzer)
+    
+    @lazy_service
+    def dashboard_controller(self):
+        """Dashboard overview"""
+        from controllers.dashboard_controller import DashboardController
+        return DashboardController(self.db_service)
+    
+    @lazy_service
+    def insights_controller(self):
+        """Pattern insights"""
+        from controllers.insights_controller import InsightsController
+        return InsightsController(self.db_service)
+    
+    @lazy_service
+    def summary_controller(self):
+        """Period summaries"""
+        from controllers.summary_controller import SummaryController
+        return SummaryController(self.db_service)
+    
+    @lazy_service
+    def trends_controller(self):
+        """Symptom, mood and sleep trends"""
+        from controllers.trends_controller import TrendsController
+        return TrendsController(self.db_service)
+    
+    @lazy_service
+    def log_exporter(self):
+        """Streaming log exports"""
+        return LogExporter(self.db_service)
+    
+    @lazy_service
+    def bundle_controller(self):
+        """Dashboard bundle built from the other read controllers"""
+        from controllers.bundle_controller import BundleController
+        return BundleController(
+            self.db_service, self.dashboard_controller, self.insights_controller,
+            self.summary_controller, self.trends_controller
+        )
+
+
+def _migrate_in_background(services: Services):
+    """Run DatabaseService.migrate() on a background thread, reporting failures instead of raising"""
+    try:
+        services.db_service.migrate()
+    except Exception as e:
+        print(f"Warning: Database migration failed: {e}")
+
+
+def create_app() -> Flask:
+    """
+    Build the Flask application
+    
+    Each call gets its own services, so a WSGI server should call this once
+    per worker process (see wsgi.py) rather than share one built before forking.
+    Services are built on first use, and DB_MIGRATE_ON_START decides whether
+    the connection check and index creation run in a background thread
+    ('background', the default), before returning ('sync') or not at all
+    ('off', the gunicorn default, for deployments that run migrate.py).
+    The daily rollup backfill only ever runs from migrate.py.
+    
+    Returns:
+        Flask: Configured application
+    
+    Raises:
+        ValueError: If DB_MIGRATE_ON_START is not one of MIGRATE_MODES
+    """
+    migrate = os.environ.get('DB_MIGRATE_ON_START', 'background')
+    if migrate not in MIGRATE_MODES:
+        raise ValueError(f"DB_MIGRATE_ON_START must be one of {', '.join(MIGRATE_MODES)}")
+    
+    app = Flask(__name__)
+    CORS(app)  # Enable CORS for frontend communication
+    services = Services()
+    app.extensions['healthvoice'] = services
+    app.register_blueprint(api)
+    
+    if migrate == 'sync':
+        services.db_service.migrate()
+    elif migrate == 'background':
+        threading.Thread(target=_migrate_in_background, args=(services,), name='db-migrate', daemon=True).start()
+    return app
+
+
+def _service(name: str) -> LocalProxy:
+    """Proxy to a service of the application handling the current request"""
+    return LocalProxy(lambda: getattr(current_app.extensions['healthvoice'], name))
+
+
+# Services of the current application, as used by the routes below
+db_service = _service('db_service')
+text_analyzer = _service('text_analyzer')
+response_cache = _service('response_cache')
+report_jobs = _service('report_jobs')
+request_profiler = _service('request_profiler')
+health_log_controller = _service('health_log_controller')
+dashboard_controller = _service('dashboard_controller')
+insights_controller = _service('insights_controller')
+summary_controller = _service('summary_controller')
+trends_controller = _service('trends_controller')
+log_exporter = _service('log_exporter')
+bundle_controller = _service('bundle_controller')
+
+
+@api.before_app_request
+def start_request_metrics():
+    """Count the request as in flight and record its body size"""
+    # The URL rule, not the path, so ids in the path do not multiply the series
+    g.metrics_endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    g.request_started = time.perf_counter()
+    metrics.REQUESTS_IN_FLIGHT.labels(g.metrics_endpoint).inc()
+    metrics.REQUEST_SIZE.labels(g.metrics_endpoint).observe(request.content_length or 0)
+
+
+@api.after_app_request
+def record_response_metrics(response):
+    """Record the status and, unless the body is streamed, the size of a response"""
+    g.response_status = response.status_code
+    size = response.content_length
+    if size is None and not response.is_streamed:
+        # Never on a streamed body: measuring it would buffer the whole export
+        size = response.calculate_content_length()
+    if size is not None:
+        metrics.RESPONSE_SIZE.labels(g.metrics_endpoint).observe(size)
+    return response
+
+
+@api.teardown_app_request
+def finish_request_metrics(error=None):
+    """
+    Record the latency and count of a finished request
+    
+    Teardown runs after a streamed body has been sent, so exports are timed
+    to their last chunk. A request that raised is counted as a 500.
+    """
+    started = g.pop('request_started', None)
+    if started is None:
+        return
+    endpoint = g.metrics_endpoint
+    status = str(g.get('response_status', 500) if error is None else 500)
+    metrics.REQUEST_LATENCY.labels(endpoint, request.method, status).observe(time.perf_counter() - started)
+    metrics.REQUESTS.labels(endpoint, request.method, status).inc()
+    metrics.REQUESTS_IN_FLIGHT.labels(endpoint).dec()
+
+
+@api.before_app_request
+def start_profile():
+    """Sample the request's stack if it is in PROFILE_SAMPLE_RATE or sent the PROFILE_TOKEN header"""
+    if not request_profiler.wanted(request.headers.get('X-Profile-Token')):
+        return
+    user_id = request.args.get('user_id')
+    if user_id is None and request.is_json:
+        user_id = (request.get_json(silent=True) or {}).get('user_id')
+    g.profile = request_profiler.start(g.metrics_endpoint, str(user_id) if user_id is not None else None)
+
+
+@api.after_app_request
+def tag_profiled_response(response):
+    """Write the profile of a profiled, non-streamed request and name its file in the response"""
+    # A streamed body is still being produced; its profile is written at teardown, unnamed
+    if g.get('profile') and not response.is_streamed:
+        path = request_profiler.finish(g.pop('profile'))
+        # No file is written when no sample was taken
+        if path:
+            response.headers['X-Profile-Id'] = os.path.basename(path)
+    return response
+
+
+@api.teardown_app_request
+def finish_profile(error=None):
+    """Write the profile of a profiled request not finished earlier, once its streamed body has been sent"""
+    profile = g.pop('profile', None)
+    if profile:
+        request_profiler.finish(profile)
+
+
+def render_profile():
+    """Profiler settings for a report render queued by the current request, if it is profiled"""
+    return request_profiler.settings() if g.get('profile') else None
+
+
+@api.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Prometheus scrape endpoint
+    Returns: Request, stage and payload size metrics in the Prometheus text format
+    """
+    try:
+        body, content_type = metrics.export()
+        return Response(body, content_type=content_type)
+        
+    except Exception as e:
+        return jsonify({
+            "error": "Failed to export metrics",
+            "details": str(e)
+        }), 500
+
+
+@api.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint to verify API is running"""
     return jsonify({
         "status": "healthy",
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": datetime.utcnow().isoformat(),
+        "analysis_cache": text_analyzer.cache.stats() if text_analyzer.cache else None,
+        "response_cache": response_cache.stats(),
+        "report_jobs": report_jobs.stats()
     }), 200
 
 
-@app.route('/api/health-logs', methods=['POST'])
+def cached_response(endpoint: str, user_id, params: tuple, compute, validators: dict):
+    """
+    Serve a read endpoint from the response cache
+    
+    Entries are keyed by endpoint, user, parameters and the current UTC day
+    (so day-aligned windows roll over at midnight), and are only reused while
+    the user's data version and rollup validators are unchanged. The version
+    catches writes made by this process; the validators catch rollups written
+    by other worker processes and jobs, whose versions this one never sees.
+    """
+    key = (endpoint, user_id, HealthAggregator.window_start(0), params)
+    # Read the version before computing so a write made meanwhile invalidates the entry
+    version = (db_service.data_version(user_id), validators['updated_at'], validators['revision'])
+    return response_cache.get_or_compute(key, version, compute)
+
+
+def conditional_json(endpoint: str, user_id, params: tuple, compute):
+    """
+    Answer a read endpoint, or 304 Not Modified when the client's copy is current
+    
+    The validators come from the user's newest rollup write, which one
+    indexed lookup answers, so unchanged polls never reach the controllers.
+    They are read from the rollups the responses are computed from, not from
+    the logs, so a log whose rollup update has not landed yet cannot pair a
+    new tag with an old body. The current UTC day is part of the ETag and the
+    floor of Last-Modified because the day-aligned windows move at midnight.
+    """
+    validators = db_service.get_rollup_validators(user_id)
+    today = HealthAggregator.window_start(0)
+    
+    etag = hashlib.blake2b(
+        repr((endpoint, user_id, params, today, validators['updated_at'], validators['revision'])).encode('utf-8'),
+        digest_size=16
+    ).hexdigest()
+    last_modified = max(
+        validators['updated_at'] or datetime.min,
+        datetime.fromisoformat(today)
+    ).replace(microsecond=0, tzinfo=timezone.utc)
+    
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains_weak(etag)
+    else:
+        not_modified = request.if_modified_since is not None and last_modified <= request.if_modified_since
+    
+    if not_modified:
+        response = current_app.response_class(status=304)
+    else:
+        response = jsonify(cached_response(endpoint, user_id, params, compute, validators))
+    
+    # Bodies carry generation timestamps, so the tag is weak
+    response.set_etag(etag, weak=True)
+    response.last_modified = last_modified
+    response.cache_control.no_cache = True
+    return response
+
+
+@api.route('/api/health-logs', methods=['POST'])
 def create_health_log():
     """
     Endpoint to accept voice health logs from SpeakSpace workflows
@@ -84,7 +431,86 @@ def create_health_log():
         }), 500
 
 
-@app.route('/api/dashboard/overview', methods=['GET'])
+@api.route('/api/health-logs', methods=['GET'])
+def list_health_logs():
+    """
+    Endpoint to list raw health logs, newest first, one page at a time
+    Query: user_id (required), limit (default 50, max 200), cursor (next_cursor of the
+           previous page), fields (comma-separated subset of log fields)
+    Returns: { "logs": [...], "next_cursor": "..." or null, "has_more": bool }
+    """
+    try:
+        user_id = request.args.get('user_id')  # Get user_id from query params
+        limit = request.args.get('limit', type=int)
+        cursor = request.args.get('cursor')
+        fields = request.args.get('fields')
+        fields = [field.strip() for field in fields.split(',') if field.strip()] if fields else None
+        
+        if not user_id:
+            return jsonify({
+                "error": "user_id is required"
+            }), 400
+        
+        page = health_log_controller.list_health_logs(
+            user_id=user_id, limit=limit, cursor=cursor, fields=fields
+        )
+        return jsonify(page), 200
+        
+    except ValueError as e:
+        return jsonify({
+            "error": str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            "error": "Failed to list health logs",
+            "details": str(e)
+        }), 500
+
+
+# Upper bound on notes accepted by one batch request
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', 500))
+
+
+@api.route('/api/health-logs/batch', methods=['POST'])
+def create_health_logs_batch():
+    """
+    Endpoint to accept many voice health logs at once (offline sync)
+    Input: [ { "prompt": "...", "user_id": "optional", "timestamp": "optional ISO 8601" }, ... ]
+           or { "logs": [ ... ] }
+    Returns: Per-item log ids or errors, in request order
+    """
+    try:
+        data = request.get_json()
+        items = data.get('logs') if isinstance(data, dict) else data
+        
+        if not isinstance(items, list) or not items:
+            return jsonify({
+                "error": "Request body must be a non-empty array of health logs"
+            }), 400
+        
+        if len(items) > MAX_BATCH_SIZE:
+            return jsonify({
+                "error": f"Batch too large (max {MAX_BATCH_SIZE} items)"
+            }), 413
+        
+        results = health_log_controller.create_health_logs(items)
+        created = sum(1 for result in results if 'log_id' in result)
+        
+        return jsonify({
+            "message": f"{created} of {len(items)} health logs created",
+            "created": created,
+            "failed": len(items) - created,
+            "results": results
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            "error": "Failed to process health log batch",
+            "details": str(e)
+        }), 500
+
+
+@api.route('/api/dashboard/overview', methods=['GET'])
 def get_dashboard_overview():
     """
     Endpoint to fetch dashboard overview
@@ -92,8 +518,10 @@ def get_dashboard_overview():
     """
     try:
         user_id = request.args.get('user_id')  # Get user_id from query params
-        overview = dashboard_controller.get_overview(user_id=user_id)
-        return jsonify(overview), 200
+        return conditional_json(
+            'overview', user_id, (),
+            lambda: dashboard_controller.get_overview(user_id=user_id)
+        )
         
     except Exception as e:
         return jsonify({
@@ -102,7 +530,36 @@ def get_dashboard_overview():
         }), 500
 
 
-@app.route('/api/insights', methods=['GET'])
+@api.route('/api/dashboard/bundle', methods=['GET'])
+def get_dashboard_bundle():
+    """
+    Endpoint to fetch every dashboard panel in one request
+    Returns: Overview, insights, summary and trends payloads computed from one database read
+    """
+    try:
+        insights_days = request.args.get('insights_days', default=7, type=int)
+        summary_days = request.args.get('summary_days', default=30, type=int)
+        trends_days = request.args.get('trends_days', default=7, type=int)
+        user_id = request.args.get('user_id')  # Get user_id from query params
+        
+        return conditional_json(
+            'bundle', user_id, (insights_days, summary_days, trends_days),
+            lambda: bundle_controller.get_bundle(
+                user_id=user_id,
+                insights_days=insights_days,
+                summary_days=summary_days,
+                trends_days=trends_days
+            )
+        )
+        
+    except Exception as e:
+        return jsonify({
+            "error": "Failed to fetch dashboard bundle",
+            "details": str(e)
+        }), 500
+
+
+@api.route('/api/insights', methods=['GET'])
 def get_health_insights():
     """
     Endpoint to fetch structured health insights
@@ -113,8 +570,10 @@ def get_health_insights():
         days = request.args.get('days', default=7, type=int)
         user_id = request.args.get('user_id')  # Get user_id from query params
         
-        insights = insights_controller.get_insights(days=days, user_id=user_id)
-        return jsonify(insights), 200
+        return conditional_json(
+            'insights', user_id, (days,),
+            lambda: insights_controller.get_insights(days=days, user_id=user_id)
+        )
         
     except Exception as e:
         return jsonify({
@@ -123,7 +582,7 @@ def get_health_insights():
         }), 500
 
 
-@app.route('/api/summary', methods=['GET'])
+@api.route('/api/summary', methods=['GET'])
 def get_doctor_summary():
     """
     Endpoint to fetch doctor-ready summary
@@ -134,8 +593,10 @@ def get_doctor_summary():
         days = request.args.get('days', default=30, type=int)
         user_id = request.args.get('user_id')  # Get user_id from query params
         
-        summary = summary_controller.get_summary(days=days, user_id=user_id)
-        return jsonify(summary), 200
+        return conditional_json(
+            'summary', user_id, (days,),
+            lambda: summary_controller.get_summary(days=days, user_id=user_id)
+        )
         
     except Exception as e:
         return jsonify({
@@ -144,19 +605,28 @@ def get_doctor_summary():
         }), 500
 
 
-@app.route('/api/trends', methods=['GET'])
+@api.route('/api/trends', methods=['GET'])
 def get_health_trends():
     """
     Endpoint to fetch health trends
+    Query: days (default 30), granularity (day/week/month/auto, default auto)
     Returns: Symptom frequency, mood trends, medication adherence
     """
     try:
         # Optional query parameters for date range
         days = request.args.get('days', default=30, type=int)
+        granularity = request.args.get('granularity', default='auto', type=str)
         user_id = request.args.get('user_id')  # Get user_id from query params
         
-        trends = trends_controller.get_trends(days=days, user_id=user_id)
-        return jsonify(trends), 200
+        if granularity not in HealthAggregator.GRANULARITIES + ['auto']:
+            return jsonify({
+                "error": "Granularity must be one of day, week, month or auto"
+            }), 400
+        
+        return conditional_json(
+            'trends', user_id, (days, granularity),
+            lambda: trends_controller.get_trends(days=days, user_id=user_id, granularity=granularity)
+        )
         
     except Exception as e:
         return jsonify({
@@ -165,17 +635,141 @@ def get_health_trends():
         }), 500
 
 
-@app.route('/api/reports/download', methods=['GET'])
+@api.route('/api/export', methods=['GET'])
+def export_logs():
+    """
+    Endpoint to download every health log of a user as a streamed file
+    Query: user_id (required), format (ndjson or csv, default ndjson), days (all history if omitted)
+    Returns: Chunked NDJSON or CSV download; memory use does not grow with history
+    """
+    try:
+        user_id = request.args.get('user_id')  # Get user_id from query params
+        format_type = request.args.get('format', default='ndjson', type=str).lower()
+        days = request.args.get('days', type=int)
+        
+        if not user_id:
+            return jsonify({
+                "error": "user_id is required"
+            }), 400
+        
+        if format_type not in LogExporter.STREAM_FORMATS:
+            return jsonify({
+                "error": "Format must be ndjson or csv (use export_logs.py for Parquet)"
+            }), 400
+        
+        logs = log_exporter.iter_logs(user_id=user_id, days=days)
+        chunks = log_exporter.iter_csv(logs) if format_type == 'csv' else log_exporter.iter_ndjson(logs)
+        
+        timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+        filename = f"healthvoice_export_{timestamp}.{format_type}"
+        
+        return Response(
+            stream_with_context(chunks),
+            mimetype=LogExporter.STREAM_FORMATS[format_type],
+            headers={
+                'Content-Disposition': f'attachment; filename={filename}'
+            }
+        )
+        
+    except Exception as e:
+        return jsonify({
+            "error": "Failed to export health logs",
+            "details": str(e)
+        }), 500
+
+
+def report_job_response(job: dict, status_code: int = 200):
+    """Add status and download links to a report job"""
+    job['status_url'] = f"/api/reports/{job['job_id']}"
+    if job['status'] == 'completed':
+        job['download_url'] = f"/api/reports/{job['job_id']}/download"
+    return jsonify(job), status_code
+
+
+@api.route('/api/reports', methods=['POST'])
+def submit_report():
+    """
+    Endpoint to queue a PDF report for rendering in the background
+    Input: { "days": 30, "type": "summary", "user_id": "optional" } (query params also accepted)
+    Returns: 202 with the job status and the URL to poll
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        try:
+            days = int(data.get('days', request.args.get('days', 30)))
+        except (TypeError, ValueError):
+            return jsonify({
+                "error": "Days must be an integer"
+            }), 400
+        report_type = str(data.get('type', request.args.get('type', 'summary')))
+        user_id = data.get('user_id', request.args.get('user_id'))
+        
+        # Summary data comes from the rollups and is cheap; only the render is queued
+        summary_data = summary_controller.get_summary(days=days, user_id=user_id)
+        job = report_jobs.submit(summary_data, days, report_type, user_id=user_id, profile=render_profile())
+        return report_job_response(job, 202)
+        
+    except QueueFullError as e:
+        return jsonify({
+            "error": str(e)
+        }), 503
+    except ValueError as e:
+        return jsonify({
+            "error": str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            "error": "Failed to queue report",
+            "details": str(e)
+        }), 500
+
+
+@api.route('/api/reports/<job_id>', methods=['GET'])
+def get_report_status(job_id):
+    """
+    Endpoint to poll a queued report
+    Returns: Job status (queued, running, completed or failed) and, once completed, its download URL
+    """
+    job = report_jobs.status(job_id)
+    if not job:
+        return jsonify({
+            "error": "Report not found or expired"
+        }), 404
+    return report_job_response(job)
+
+
+@api.route('/api/reports/<job_id>/download', methods=['GET'])
+def download_report_job(job_id):
+    """
+    Endpoint to download a completed report
+    Returns: PDF file download, 409 while the report is still rendering
+    """
+    job = report_jobs.status(job_id)
+    if not job:
+        return jsonify({
+            "error": "Report not found or expired"
+        }), 404
+    
+    path = report_jobs.result_path(job_id)
+    if not path:
+        return report_job_response(job, 409)
+    
+    timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+    return send_file(
+        path,
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=f"healthvoice_report_{timestamp}.pdf"
+    )
+
+
+@api.route('/api/reports/download', methods=['GET'])
 def download_report():
     """
     Endpoint to download health report as PDF file
     Returns: PDF file download with health summary
     """
     try:
-        from flask import Response
-        from datetime import datetime
-        from services.pdf_generator import PDFGenerator
-        
         # Optional query parameters
         days = request.args.get('days', default=30, type=int)
         report_type = request.args.get('type', default='summary', type=str)
@@ -189,20 +783,24 @@ def download_report():
         timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
         
         if format_type.lower() == 'pdf':
-            # Generate PDF
-            pdf_generator = PDFGenerator()
-            pdf_buffer = pdf_generator.generate_health_report(summary_data, days, report_type)
+            # Render on the report pool so this thread does not hold the GIL for the render
+            job = report_jobs.submit(summary_data, days, report_type, user_id=user_id, profile=render_profile())
+            job = report_jobs.wait(job['job_id'], timeout=REPORT_WAIT_TIMEOUT)
+            
+            if job['status'] == 'failed':
+                raise RuntimeError(job.get('error', 'Report rendering failed'))
+            if job['status'] != 'completed':
+                # Still rendering; the client can poll the job instead
+                return report_job_response(job, 202)
             
             filename = f"healthvoice_report_{timestamp}.pdf"
             
             # Return as PDF download
-            return Response(
-                pdf_buffer.getvalue(),
+            return send_file(
+                report_jobs.result_path(job['job_id']),
                 mimetype='application/pdf',
-                headers={
-                    'Content-Disposition': f'attachment; filename={filename}',
-                    'Content-Type': 'application/pdf'
-                }
+                as_attachment=True,
+                download_name=filename
             )
         else:
             # Fallback to text format
@@ -240,6 +838,10 @@ For medical advice, please consult with your healthcare provider.
                 }
             )
         
+    except QueueFullError as e:
+        return jsonify({
+            "error": str(e)
+        }), 503
     except Exception as e:
         return jsonify({
             "error": "Failed to generate report",
@@ -252,5 +854,6 @@ if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('FLASK_ENV') == 'development'
     
-    app.run(host='0.0.0.0', port=port, debug=debug)
+    # Development server; production runs wsgi.py under gunicorn (see gunicorn.conf.py)
+    create_app().run(host='0.0.0.0', port=port, debug=debug)
 
@@ -0,0 +1,239 @@
+"""
+Analyzer Benchmark
+Measures TextAnalyzerService throughput, per-extractor timing and allocations
+
+Usage (from the backend directory):
+    python -m benchmarks.analyzer_benchmark [--notes 2000] [--seed 42] [--output results.json] [--compare baseline.json]
+                                            [--min-recall 1.0]
+
+Results are printed and, with --output, saved as JSON so runs before and
+after a lexicon or matcher change can be compared with --compare. Keyword
+recall is checked against the corpus labels and REGRESSION_NOTES; the run
+exits non-zero when it falls below --min-recall.
+"""
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Set, Tuple
+from services.text_analyzer import TextAnalyzerService
+from benchmarks.corpus import CorpusGenerator, NOTE_LENGTHS, REGRESSION_NOTES
+
+# Long notes are far slower, so fewer of them are generated
+LENGTH_SHARE = {
+    'short': 1,
+    'typical': 1,
+    'long': 0.05,
+}
+
+
+def _best_seconds(func: Callable, repeat: int) -> float:
+    """Run a function `repeat` times and return the fastest wall time"""
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def measure_throughput(analyzer: TextAnalyzerService, notes: List[str], repeat: int) -> Dict:
+    """Notes per second for analyze() and generate_summary()"""
+    analyses = [analyzer.analyze(note) for note in notes]
+
+    analyze_seconds = _best_seconds(lambda: [analyzer.analyze(note) for note in notes], repeat)
+    summary_seconds = _best_seconds(lambda: [analyzer.generate_summary(a) for a in analyses], repeat)
+
+    return {
+        'analyze_notes_per_sec': round(len(notes) / analyze_seconds, 1),
+        'summary_notes_per_sec': round(len(notes) / summary_seconds, 1),
+    }
+
+
+def measure_extractors(analyzer: TextAnalyzerService, notes: List[str]) -> Dict:
+    """Average microseconds per note spent in each stage of analyze()"""
+    totals = {'keyword_scan': 0, 'symptoms': 0, 'mood': 0, 'medications': 0, 'lifestyle': 0}
+    clock = time.perf_counter_ns
+
+    for note in notes:
+        text_lower = note.lower()
+
+        started = clock()
+        matches = analyzer.matcher.scan(text_lower)
+        totals['keyword_scan'] += clock() - started
+
+        started = clock()
+        analyzer._extract_symptoms(matches['symptoms'])
+        totals['symptoms'] += clock() - started
+
+        started = clock()
+        analyzer._extract_mood(matches['mood'])
+        totals['mood'] += clock() - started
+
+        started = clock()
+        analyzer._extract_medications(note)
+        totals['medications'] += clock() - started
+
+        started = clock()
+        analyzer._extract_lifestyle(matches['lifestyle'], text_lower)
+        totals['lifestyle'] += clock() - started
+
+    return {stage: round(total / len(notes) / 1000, 2) for stage, total in totals.items()}
+
+
+def measure_allocations(analyzer: TextAnalyzerService, notes: List[str]) -> Dict:
+    """Memory blocks retained by each analysis and transient peak bytes per analyze() call"""
+    gc.collect()
+    blocks_before = sys.getallocatedblocks()
+    analyses = [analyzer.analyze(note) for note in notes]
+    retained_blocks = sys.getallocatedblocks() - blocks_before
+    del analyses
+
+    tracemalloc.start()
+    peak_total = 0
+    try:
+        for note in notes:
+            tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            analysis = analyzer.analyze(note)
+            _, peak = tracemalloc.get_traced_memory()
+            peak_total += peak - current
+            del analysis
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'retained_blocks_per_note': round(retained_blocks / len(notes), 1),
+        'peak_bytes_per_note': round(peak_total / len(notes)),
+    }
+
+
+def measure_recall(analyzer: TextAnalyzerService, labelled: List[Tuple[str, Set[Tuple[str, str]]]]) -> Dict:
+    """Share of expected (table, category) keyword hits the matcher finds, with the notes it missed"""
+    expected_total = 0
+    found_total = 0
+    misses = []
+
+    for note, expected in labelled:
+        matches = analyzer.matcher.scan(note.lower())
+        found = {(table, category) for table, categories in matches.items() for category in categories}
+        missed = expected - found
+        expected_total += len(expected)
+        found_total += len(expected) - len(missed)
+        if missed:
+            misses.append({'note': note, 'missed': sorted(f"{table}.{category}" for table, category in missed)})
+
+    return {
+        'recall': round(found_total / expected_total, 4) if expected_total else 1.0,
+        'expected': expected_total,
+        'misses': misses[:10],
+    }
+
+
+def run(notes: int = 2000, seed: int = 42, repeat: int = 3, cache: bool = False) -> Dict:
+    """
+    Benchmark the analyzer over every note length
+
+    Args:
+        notes: Notes generated for the short and typical sizes (long uses a fraction)
+        seed: Corpus random seed
+        repeat: Timing repetitions (the fastest is kept)
+        cache: Keep the analysis cache enabled (off by default so every note is analyzed)
+
+    Returns:
+        Dictionary of run metadata and per-length results
+    """
+    analyzer = TextAnalyzerService(cache_size=1024 if cache else 0)
+    generator = CorpusGenerator(seed)
+
+    results = {
+        'metadata': {
+            'generated_at': datetime.utcnow().isoformat(),
+            'analyzer_version': TextAnalyzerService.VERSION,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': seed,
+            'repeat': repeat,
+            'cache': cache,
+        },
+        'lengths': {},
+    }
+
+    labelled = list(REGRESSION_NOTES)
+    for length in NOTE_LENGTHS:
+        labelled_corpus = generator.labelled_notes(max(1, int(notes * LENGTH_SHARE[length])), length)
+        labelled.extend(labelled_corpus)
+        corpus = [note for note, _ in labelled_corpus]
+        results['lengths'][length] = {
+            'notes': len(corpus),
+            'average_chars': round(sum(len(note) for note in corpus) / len(corpus)),
+            'throughput': measure_throughput(analyzer, corpus, repeat),
+            'extractor_us_per_note': measure_extractors(analyzer, corpus),
+            'allocations': measure_allocations(analyzer, corpus),
+        }
+
+    results['keyword_recall'] = measure_recall(analyzer, labelled)
+    return results
+
+
+def print_results(results: Dict, baseline: Dict = None):
+    """Print a results table, with ratios against a baseline run when given"""
+    for length, result in results['lengths'].items():
+        print(f"\n{length.upper()} ({result['notes']} notes, ~{result['average_chars']} chars)")
+        sections = ('throughput', 'extractor_us_per_note', 'allocations')
+        for section in sections:
+            for metric, value in result[section].items():
+                line = f"  {metric:<28} {value:>12}"
+                previous = (baseline or {}).get('lengths', {}).get(length, {}).get(section, {}).get(metric)
+                if previous:
+                    line += f"   ({value / previous:.2f}x baseline)"
+                print(line)
+
+    recall = results.get('keyword_recall')
+    if recall:
+        print(f"\nKEYWORD RECALL {recall['recall']:.2%} of {recall['expected']} expected categories")
+        for miss in recall['misses']:
+            print(f"  missed {', '.join(miss['missed'])}: {miss['note'][:80]}")
+
+
+def main():
+    """Parse command line arguments and run the benchmark"""
+    parser = argparse.ArgumentParser(description="Benchmark TextAnalyzerService")
+    parser.add_argument('--notes', type=int, default=2000,
+                        help="notes per length (long notes use 5%%; default: 2000)")
+    parser.add_argument('--seed', type=int, default=42, help="corpus random seed (default: 42)")
+    parser.add_argument('--repeat', type=int, default=3, help="timing repetitions (default: 3)")
+    parser.add_argument('--cache', action='store_true', help="keep the analysis cache enabled")
+    parser.add_argument('--output', help="save results to this JSON file")
+    parser.add_argument('--compare', help="JSON results of a previous run to compare against")
+    parser.add_argument('--min-recall', type=float, default=1.0,
+                        help="fail when keyword recall falls below this share (default: 1.0)")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)
+
+    results = run(notes=args.notes, seed=args.seed, repeat=args.repeat, cache=args.cache)
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(results, handle, indent=2)
+        print(f"\n✓ Results saved to {args.output}")
+
+    if results['keyword_recall']['recall'] < args.min_recall:
+        print(f"✗ Keyword recall {results['keyword_recall']['recall']:.2%} is below {args.min_recall:.2%}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
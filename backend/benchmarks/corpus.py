@@ -0,0 +1,119 @@
+"""
+Synthetic Voice-Note Corpus
+Generates seeded, realistic-looking check-in notes from the analyzer's own keyword tables
+"""
+
+import random
+from typing import List, Set, Tuple
+from services.text_analyzer import TextAnalyzerService
+
+# Approximate word counts for each note length
+NOTE_LENGTHS = {
+    'short': 12,
+    'typical': 45,
+    'long': 1200,
+}
+
+# Medication names used to exercise MEDICATION_PATTERNS
+MEDICATION_NAMES = [
+    'Metformin', 'Ibuprofen', 'Tylenol', 'Lisinopril', 'Atorvastatin',
+    'Sertraline', 'Amoxicillin', 'Vitamin D', 'Levothyroxine', 'Omeprazole',
+]
+
+# Words that match no keyword, so notes are not all signal
+FILLER_WORDS = [
+    'today', 'this', 'morning', 'after', 'work', 'and', 'then', 'I', 'was', 'a', 'bit',
+    'the', 'kids', 'again', 'around', 'noon', 'evening', 'felt', 'like', 'mostly',
+    'yesterday', 'because', 'of', 'weather', 'so', 'not', 'really', 'sure', 'about', 'it',
+]
+
+
+# Share of single-word keywords written in an inflected form (coughs, aching, worried)
+INFLECTED_SHARE = 0.3
+
+# Notes whose inflected keywords exact-token matching once missed, with the categories they must produce
+REGRESSION_NOTES = [
+    ("I've had headaches and migraines all week", {('symptoms', 'headache')}),
+    ("Coughs at night", {('symptoms', 'cough')}),
+    ("Skipped meals", {('lifestyle', 'food')}),
+]
+
+
+class CorpusGenerator:
+    """Builds deterministic synthetic voice notes for benchmarking"""
+
+    def __init__(self, seed: int = 42):
+        """
+        Args:
+            seed: Random seed, so the same corpus is produced on every run
+        """
+        self.random = random.Random(seed)
+        # Keyword -> every (table, category) it belongs to, named as in KeywordMatcher tables
+        self.labels = {}
+        for table_name, table in (
+            ('symptoms', TextAnalyzerService.SYMPTOM_KEYWORDS),
+            ('mood', TextAnalyzerService.MOOD_KEYWORDS),
+            ('lifestyle', TextAnalyzerService.LIFESTYLE_KEYWORDS),
+        ):
+            for category, keywords in table.items():
+                for keyword in keywords:
+                    self.labels.setdefault(keyword, set()).add((table_name, category))
+        self.keywords = list(self.labels)
+
+    def note(self, words: int) -> str:
+        """Generate one note of roughly `words` words"""
+        return self.labelled_note(words)[0]
+
+    def labelled_note(self, words: int) -> Tuple[str, Set[Tuple[str, str]]]:
+        """Generate one note of roughly `words` words, with the (table, category) pairs its keywords belong to"""
+        parts = []
+        expected = set()
+        count = 0
+        while count < words:
+            roll = self.random.random()
+            if roll < 0.25:
+                keyword = self.random.choice(self.keywords)
+                expected |= self.labels[keyword]
+                part = self._inflect(keyword) if self.random.random() < INFLECTED_SHARE else keyword
+            elif roll < 0.30:
+                part = self._medication_phrase()
+            elif roll < 0.33:
+                part = f"slept {self.random.randint(3, 10)} hours"
+            else:
+                part = self.random.choice(FILLER_WORDS)
+            parts.append(part)
+            count += len(part.split())
+
+        text = ' '.join(parts)
+        return text[0].upper() + text[1:] + '.', expected
+
+    def notes(self, count: int, length: str = 'typical') -> List[str]:
+        """Generate `count` notes of one of the NOTE_LENGTHS sizes"""
+        words = NOTE_LENGTHS[length]
+        return [self.note(words) for _ in range(count)]
+
+    def labelled_notes(self, count: int, length: str = 'typical') -> List[Tuple[str, Set[Tuple[str, str]]]]:
+        """Generate `count` (note, expected categories) pairs of one of the NOTE_LENGTHS sizes"""
+        words = NOTE_LENGTHS[length]
+        return [self.labelled_note(words) for _ in range(count)]
+
+    def _inflect(self, keyword: str) -> str:
+        """A plural, -ing or -ed form of a single-word keyword (the keyword itself if it has none)"""
+        if ' ' in keyword or len(keyword) < 4 or keyword.endswith(('s', 'ing', 'ed')):
+            return keyword
+
+        suffix = self.random.choice(['s', 'ing', 'ed'])
+        if keyword[-1] == 'y' and keyword[-2] not in 'aeiou' and suffix != 'ing':
+            return keyword[:-1] + ('ies' if suffix == 's' else 'ied')
+        if suffix == 's':
+            return keyword + ('es' if keyword.endswith(('x', 'ch', 'sh')) else 's')
+        if keyword.endswith('e'):
+            return keyword[:-1] + suffix
+        return keyword + suffix
+
+    def _medication_phrase(self) -> str:
+        """A medication mention in one of the forms MEDICATION_PATTERNS recognizes"""
+        name = self.random.choice(MEDICATION_NAMES)
+        if self.random.random() < 0.5:
+            return f"{self.random.choice(['took', 'taking', 'prescribed'])} {name}"
+        return f"{name} {self.random.choice([5, 20, 50, 500])} {self.random.choice(['mg', 'mcg', 'ml'])}"
@@ -0,0 +1,135 @@
+"""
+Startup Benchmark
+Measures how long a fresh worker process takes to import the app, build it and serve its first requests
+
+Usage (from the backend directory):
+    python -m benchmarks.startup_benchmark [--runs 10] [--output results.json] [--compare baseline.json]
+
+Each run starts a new interpreter, as an autoscaled worker would, with
+DB_MIGRATE_ON_START=off and MONGODB_URI pointing at a closed port, so the
+numbers cover only work done in-process before the first database query.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Dict
+
+# Script run in every child process; prints one JSON line of phase timings in milliseconds
+CHILD_SCRIPT = """
+import json, time
+started = time.perf_counter()
+import app as app_module
+imported = time.perf_counter()
+flask_app = app_module.create_app()
+created = time.perf_counter()
+client = flask_app.test_client()
+client.get('/health')
+health = time.perf_counter()
+modules = len(__import__('sys').modules)
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'first_health_ms': (health - created) * 1000,
+    'ready_ms': (health - started) * 1000,
+    'modules_loaded': modules,
+}))
+"""
+
+# Environment of the child processes
+CHILD_ENV = {
+    'DB_MIGRATE_ON_START': 'off',
+    'MONGODB_URI': 'mongodb://127.0.0.1:1/healthvoice_benchmark',
+}
+
+
+def run_once(backend_dir: str) -> Dict:
+    """Start one interpreter and return its phase timings"""
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD_SCRIPT],
+        cwd=backend_dir,
+        env={**os.environ, **CHILD_ENV},
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result['process_ms'] = (time.perf_counter() - started) * 1000
+    return result
+
+
+def run(runs: int = 10) -> Dict:
+    """
+    Start the app in `runs` fresh processes
+
+    Args:
+        runs: Processes to start (the first also warms the OS file cache)
+
+    Returns:
+        Dictionary of run metadata and the median and maximum of every phase
+    """
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    samples = [run_once(backend_dir) for _ in range(runs + 1)][1:]
+
+    phases = {}
+    for phase in samples[0]:
+        values = [sample[phase] for sample in samples]
+        phases[phase] = {
+            'median': round(statistics.median(values), 1),
+            'max': round(max(values), 1),
+        }
+
+    return {
+        'metadata': {
+            'generated_at': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'runs': runs,
+        },
+        'phases': phases,
+    }
+
+
+def print_results(results: Dict, baseline: Dict = None):
+    """Print a results table, with ratios against a baseline run when given"""
+    print(f"\nSTARTUP ({results['metadata']['runs']} runs)")
+    print(f"  {'phase':<20} {'median':>10} {'max':>10}")
+    for phase, values in results['phases'].items():
+        line = f"  {phase:<20} {values['median']:>10} {values['max']:>10}"
+        previous = (baseline or {}).get('phases', {}).get(phase, {}).get('median')
+        if previous:
+            line += f"   ({values['median'] / previous:.2f}x baseline)"
+        print(line)
+
+
+def main():
+    """Parse command line arguments and run the benchmark"""
+    parser = argparse.ArgumentParser(description="Benchmark API worker startup")
+    parser.add_argument('--runs', type=int, default=10, help="processes to start (default: 10)")
+    parser.add_argument('--output', help="save results to this JSON file")
+    parser.add_argument('--compare', help="JSON results of a previous run to compare against")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)
+
+    results = run(runs=args.runs)
+    print_results(results, baseline)
+
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(results, handle, indent=2)
+        print(f"\n✓ Results saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
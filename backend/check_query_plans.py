@@ -0,0 +1,113 @@
+"""
+Query Plan Check
+Explains every query shape the DatabaseService reads (including those inside
+its writes) send and fails on collection scans or in-memory sorts
+
+Usage:
+    python check_query_plans.py [--user-id USER]
+
+Run it in CI against a test MongoDB (empty or seeded) after any change to a
+query or an index. It runs migrate() so the indexes and collections exist,
+calls every read in READS for one user and for all users while recording the
+commands they send, explains each distinct shape and exits with status 1 if
+any winning plan contains COLLSCAN or SORT.
+"""
+
+import argparse
+import sys
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+from bson import ObjectId
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+from services.database import DatabaseService
+from services.log_exporter import LogExporter
+from services.query_monitor import QueryMonitor
+
+# Reads the API endpoints and jobs send, on their own or as part of a write; each is called with a user id and with None
+READS: List[Tuple[str, Callable]] = [
+    ('load_rollups', lambda db, user_id: db.load_rollups(days=30, user_id=user_id, granularity='week')),
+    ('get_rollup_validators', lambda db, user_id: db.get_rollup_validators(user_id=user_id)),
+    ('get_log_page', lambda db, user_id: db.get_log_page(user_id=user_id, page_size=10)),
+    ('get_log_page (after)', lambda db, user_id: db.get_log_page(
+        user_id=user_id, page_size=10, after=(datetime.utcnow(), ObjectId())
+    )),
+    ('iter_logs (export)', lambda db, user_id: list(db.iter_logs(
+        days=30, user_id=user_id, fields=['_id'] + LogExporter.EXPORT_FIELDS, limit=10
+    ))),
+    ('iter_stale_logs', lambda db, user_id: next(db.iter_stale_logs(version=-1, after_id=ObjectId()), None)),
+    ('get_checkpoint', lambda db, user_id: db.get_checkpoint('reanalyze')),
+    ('adjust_daily_rollups', lambda db, user_id: list(db._reanalyzed_logs([ObjectId()], version=1))),
+    ('adjust_daily_rollups (latest mood)', lambda db, user_id: db._latest_mood_log(user_id, datetime(2024, 1, 1))),
+    ('repair_daily_rollups', lambda db, user_id: list(db._day_logs(user_id, datetime(2024, 1, 1)))),
+]
+
+
+def check_query_plans(db: DatabaseService, user_id: str) -> List[Dict]:
+    """
+    Explain the query plan of every distinct shape the READS send
+
+    Args:
+        db: Database service instance (its indexes already created)
+        user_id: User the per-user reads are issued for
+
+    Returns:
+        One dictionary per shape with the reads that sent it, its winning
+        plan stages and the stages among them that are COLLSCAN or SORT
+    """
+    shapes = {}
+    for name, read in READS:
+        for user in (user_id, None):
+            with db.monitor.capturing() as captured:
+                read(db, user)
+            for shape, command in captured.items():
+                entry = shapes.setdefault(shape, {'reads': [], 'command': command})
+                if name not in entry['reads']:
+                    entry['reads'].append(name)
+
+    results = []
+    for shape, entry in shapes.items():
+        database_name, command = entry['command']
+        explain = db.monitor.explain(database_name, command)
+        results.append({
+            'shape': shape,
+            'reads': entry['reads'],
+            'stages': QueryMonitor.plan_stages(explain),
+            'unindexed': QueryMonitor.unindexed_stages(explain),
+        })
+    return results
+
+
+def main():
+    """Parse command line arguments, check the plans and exit non-zero on any unindexed plan"""
+    parser = argparse.ArgumentParser(description="Fail if any DatabaseService query scans a collection or sorts in memory")
+    parser.add_argument('--user-id', default='plan-check-user',
+                        help="user the per-user reads are issued for (default: plan-check-user)")
+    args = parser.parse_args()
+
+    db = DatabaseService()
+    try:
+        db.migrate()
+        results = check_query_plans(db, args.user_id)
+    finally:
+        db.close()
+
+    failures = [result for result in results if result['unindexed']]
+    for result in results:
+        command, collection = result['shape'][:2]
+        mark = '✗' if result['unindexed'] else '✓'
+        print(f"{mark} {command} on {collection} ({', '.join(result['reads'])}): {' <- '.join(result['stages'])}")
+        if result['unindexed']:
+            print(f"    shape: {dict(result['shape'][2:])}")
+
+    if failures:
+        print(f"\n✗ {len(failures)} of {len(results)} query shapes use {', '.join(QueryMonitor.UNINDEXED_STAGES)}")
+        sys.exit(1)
+    print(f"\n✓ All {len(results)} query shapes are served by indexes")
+
+
+if __name__ == '__main__':
+    main()
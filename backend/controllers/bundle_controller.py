@@ -0,0 +1,68 @@
+"""
+Bundle Controller
+Handles rendering every dashboard panel from a single database read
+"""
+
+from typing import Dict
+from datetime import datetime
+from services.database import DatabaseService
+from controllers.dashboard_controller import DashboardController
+from controllers.insights_controller import InsightsController
+from controllers.summary_controller import SummaryController
+from controllers.trends_controller import TrendsController
+from services.metrics import instrumented
+
+
+@instrumented('bundle')
+class BundleController:
+    """Controller for the combined dashboard payload"""
+
+    def __init__(self, db_service: DatabaseService,
+                 dashboard_controller: DashboardController,
+                 insights_controller: InsightsController,
+                 summary_controller: SummaryController,
+                 trends_controller: TrendsController):
+        """
+        Initialize controller with database service and the panel controllers
+
+        Args:
+            db_service: Database service instance
+            dashboard_controller: Renders the overview panel
+            insights_controller: Renders the insights panel
+            summary_controller: Renders the doctor summary panel
+            trends_controller: Renders the trends panel
+        """
+        self.db = db_service
+        self.dashboard = dashboard_controller
+        self.insights = insights_controller
+        self.summary = summary_controller
+        self.trends = trends_controller
+
+    def get_bundle(self, user_id: str = None, insights_days: int = 7,
+                   summary_days: int = 30, trends_days: int = 7) -> Dict:
+        """
+        Get every dashboard panel at once
+
+        The widest window is loaded once and each panel renders its own
+        window from it, so the whole dashboard costs one rollup query.
+
+        Args:
+            user_id: User ID to filter logs (if provided)
+            insights_days: Window of the insights panel (default: 7)
+            summary_days: Window of the doctor summary (default: 30)
+            trends_days: Window of the trends chart (default: 7)
+
+        Returns:
+            Dictionary containing overview, insights, summary and trends payloads,
+            each identical to its own endpoint's response
+        """
+        widest = max(insights_days, summary_days, trends_days, DashboardController.CONSISTENCY_DAYS)
+        aggregator = self.db.load_rollups(days=widest, user_id=user_id)
+
+        return {
+            'overview': self.dashboard.get_overview(user_id=user_id, aggregator=aggregator),
+            'insights': self.insights.get_insights(days=insights_days, user_id=user_id, aggregator=aggregator),
+            'summary': self.summary.get_summary(days=summary_days, user_id=user_id, aggregator=aggregator),
+            'trends': self.trends.get_trends(days=trends_days, user_id=user_id, aggregator=aggregator),
+            'generated_at': datetime.utcnow().isoformat()
+        }
@@ -3,11 +3,14 @@ Dashboard Controller
 Handles dashboard overview data aggregation
 """
 
-from typing import Dict, List
+from typing import Dict
 from datetime import datetime, timedelta
 from services.database import DatabaseService
+from services.health_aggregator import HealthAggregator
+from services.metrics import instrumented
 
 
+@instrumented('dashboard')
 class DashboardController:
     """Controller for dashboard overview operations"""
     
@@ -20,10 +23,17 @@ class DashboardController:
         """
         self.db = db_service
     
-    def get_overview(self, user_id: str = None) -> Dict:
+    # Days of history used for the consistency streak
+    CONSISTENCY_DAYS = 30
+    
+    def get_overview(self, user_id: str = None, aggregator: HealthAggregator = None) -> Dict:
         """
         Get dashboard overview data for today
         
+        Args:
+            user_id: User ID to filter logs (if provided)
+            aggregator: Preloaded rollups covering at least CONSISTENCY_DAYS (loaded if omitted)
+        
         Returns:
             Dictionary containing:
             - today_symptoms: List of symptoms mentioned today
@@ -31,82 +41,59 @@ class DashboardController:
             - medications_logged: List of medications mentioned today
             - health_consistency: Count and streak information
         """
-        # Get today's logs for this user
-        today_logs = self.db.get_today_logs(user_id=user_id)
-        
-        # Aggregate symptoms from today
-        today_symptoms = []
-        medications_logged = []
-        mood_states = []
-        
-        for log in today_logs:
-            analysis = log.get('analysis', {})
-            
-            # Collect symptoms
-            symptoms = analysis.get('symptoms', [])
-            today_symptoms.extend(symptoms)
-            
-            # Collect medications
-            medications = analysis.get('medications', [])
-            medications_logged.extend([med.get('name') for med in medications])
-            
-            # Collect mood states
-            mood = analysis.get('mood', {})
-            if mood.get('detected'):
-                mood_states.append(mood.get('primary', 'Neutral'))
-        
-        # Remove duplicates
-        today_symptoms = list(set(today_symptoms))
-        medications_logged = list(set(medications_logged))
+        # One rollup read covers both today's panel and the streak
+        if aggregator is None:
+            aggregator = self.db.load_rollups(days=self.CONSISTENCY_DAYS, user_id=user_id)
+        
+        # Get today's bucket for this user; days logged ahead of the clock are not today
+        today_key = HealthAggregator.window_start(0)
+        today = aggregator.buckets(since=today_key, until=today_key)
+        today = today[0] if today else {}
+        
+        # Symptoms and medications mentioned today
+        today_symptoms = list(today.get('symptoms', {}))
+        medications_logged = list(today.get('medications', {}))
         
         # Determine primary mental state (most frequent)
         mental_state = 'Neutral'
-        if mood_states:
-            from collections import Counter
-            mood_counter = Counter(mood_states)
-            mental_state = mood_counter.most_common(1)[0][0]
+        mood_counts = today.get('moods', {})
+        if mood_counts:
+            mental_state = max(mood_counts, key=mood_counts.get)
         
         # Calculate health consistency (streak of days with logs)
-        consistency = self._calculate_consistency(user_id=user_id)
+        consistency = self._calculate_consistency(aggregator)
         
         return {
             'today_symptoms': today_symptoms,
             'mental_state': mental_state,
             'medications_logged': medications_logged,
             'health_consistency': consistency,
-            'logs_today': len(today_logs),
+            'logs_today': today.get('log_count', 0),
             'timestamp': datetime.utcnow().isoformat()
         }
     
-    def _calculate_consistency(self, user_id: str = None) -> Dict:
+    def _calculate_consistency(self, aggregator: HealthAggregator) -> Dict:
         """
         Calculate health logging consistency (streak and count)
         
         Args:
-            user_id: User ID to filter logs (if provided)
+            aggregator: Rollups covering at least CONSISTENCY_DAYS
         
         Returns:
             Dictionary with streak and total count
         """
-        # Get logs from last 30 days to calculate streak for this user
-        recent_logs = self.db.get_recent_logs(days=30, user_id=user_id)
+        # Day buckets from last 30 days to calculate streak for this user
+        rollups = aggregator.buckets(since=HealthAggregator.window_start(self.CONSISTENCY_DAYS))
         
-        if not recent_logs:
+        if not rollups:
             return {
                 'streak_days': 0,
                 'total_logs': 0,
                 'last_log_date': None
             }
         
-        # Extract unique dates from logs
-        dates_with_logs = set()
-        for log in recent_logs:
-            timestamp = log.get('timestamp')
-            if timestamp:
-                if isinstance(timestamp, str):
-                    timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                date_only = timestamp.date()
-                dates_with_logs.add(date_only)
+        # Buckets only exist for dates with logs
+        dates_with_logs = set(rollup['day'] for rollup in rollups)
         
         # Calculate streak (consecutive days with logs)
         streak_days = 0
@@ -114,23 +101,16 @@ class DashboardController:
         current_date = today
         
         # Count backwards from today
-        while current_date in dates_with_logs:
+        while current_date.isoformat() in dates_with_logs:
             streak_days += 1
             current_date -= timedelta(days=1)
         
-        # Get most recent log date
-        last_log = recent_logs[0] if recent_logs else None
-        last_log_date = None
-        if last_log:
-            timestamp = last_log.get('timestamp')
-            if timestamp:
-                if isinstance(timestamp, str):
-                    timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                last_log_date = timestamp.date().isoformat()
+        # Buckets are sorted oldest first, so the last one holds the most recent log date
+        last_log_date = rollups[-1]['day']
         
         return {
             'streak_days': streak_days,
-            'total_logs': len(recent_logs),
+            'total_logs': sum(rollup['log_count'] for rollup in rollups),
             'last_log_date': last_log_date,
             'unique_days_logged': len(dates_with_logs)
         }
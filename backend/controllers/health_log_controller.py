@@ -3,15 +3,39 @@ Health Log Controller
 Handles creation and processing of health logs from voice input
 """
 
-from typing import Dict
-from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+import base64
+import json
+from bson import ObjectId
+from bson.errors import InvalidId
 from services.database import DatabaseService
 from services.text_analyzer import TextAnalyzerService
+from services.metrics import instrumented
 
 
+@instrumented('health_log')
 class HealthLogController:
     """Controller for managing health log operations"""
     
+    # Fields a log listing may select
+    LISTABLE_FIELDS = [
+        'prompt',
+        'summary',
+        'analysis',
+        'analysis_version',
+        'user_id',
+        'timestamp',
+        'created_at',
+    ]
+    
+    # Page sizes of the log listing
+    DEFAULT_PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 200
+    
+    # How far into the future a client clock may run before its timestamps are rejected
+    MAX_CLOCK_SKEW = timedelta(minutes=5)
+    
     def __init__(self, db_service: DatabaseService, text_analyzer: TextAnalyzerService):
         """
         Initialize controller with required services
@@ -45,6 +69,7 @@ class HealthLogController:
             'prompt': prompt,
             'analysis': analysis,
             'summary': summary,
+            'analysis_version': self.analyzer.VERSION,
             'timestamp': datetime.utcnow(),
             'created_at': datetime.utcnow().isoformat()
         }
@@ -52,9 +77,192 @@ class HealthLogController:
         # Insert into database with user_id
         log_id = self.db.insert_health_log(log_data, user_id=user_id)
         
+        # Keep the per-day counters the read endpoints use in step
+        self._roll_up([log_data])
+        
         return {
             'log_id': log_id,
             'summary': summary,
             'analysis': analysis
         }
 
+    
+    def create_health_logs(self, items: List[Dict], import_keys: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Create many health logs at once (e.g. offline recordings synced in bulk)
+        
+        Args:
+            items: List of {prompt, user_id, timestamp} dictionaries; user_id
+                   and timestamp (ISO 8601) are optional
+            import_keys: Unique source key of each item (e.g. file and line of an
+                         import), in the same order; a retried item whose key
+                         is already stored is not stored again
+            
+        Returns:
+            List with one result per item, in order, each containing either
+            log_id and summary (plus duplicate for an item stored before), or error
+        """
+        results = [None] * len(items)
+        valid_indexes = []
+        prompts = []
+        timestamps = []
+        
+        # Validate items up front so bad ones do not reach the analyzer
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                results[index] = {'error': "Item must be an object"}
+                continue
+            
+            prompt = item.get('prompt')
+            if not prompt or not isinstance(prompt, str):
+                results[index] = {'error': "Prompt must be a non-empty string"}
+                continue
+            
+            timestamp = self._parse_timestamp(item.get('timestamp'))
+            if item.get('timestamp') is not None and timestamp is None:
+                results[index] = {'error': "Timestamp must be an ISO 8601 string"}
+                continue
+            if timestamp is not None and timestamp > datetime.utcnow() + self.MAX_CLOCK_SKEW:
+                results[index] = {'error': "Timestamp must not be in the future"}
+                continue
+            
+            valid_indexes.append(index)
+            prompts.append(prompt)
+            timestamps.append(timestamp or datetime.utcnow())
+        
+        # Analyze the whole batch in one call
+        analyses = self.analyzer.analyze_batch(prompts)
+        
+        # Prepare documents for database
+        documents = []
+        for index, prompt, timestamp, analysis in zip(valid_indexes, prompts, timestamps, analyses):
+            log_data = {
+                'prompt': prompt,
+                'analysis': analysis,
+                'summary': self.analyzer.generate_summary(analysis),
+                'analysis_version': self.analyzer.VERSION,
+                'timestamp': timestamp,
+                'created_at': datetime.utcnow().isoformat()
+            }
+            user_id = items[index].get('user_id')
+            if user_id:
+                log_data['user_id'] = user_id
+            if import_keys is not None:
+                log_data['import_key'] = import_keys[index]
+            documents.append(log_data)
+        
+        # Insert all documents with one bulk write
+        inserted = self.db.insert_health_logs(documents)
+        
+        # Roll up only the documents stored by this call
+        self._roll_up([
+            log_data for log_data, outcome in zip(documents, inserted)
+            if 'log_id' in outcome and not outcome.get('duplicate')
+        ])
+        
+        # A retry may follow a crash between the insert and the rollup write, so recount those days
+        duplicates = [log_data for log_data, outcome in zip(documents, inserted) if outcome.get('duplicate')]
+        if duplicates:
+            self.db.queue_rollup_repair(duplicates)
+        
+        for index, log_data, outcome in zip(valid_indexes, documents, inserted):
+            if 'log_id' in outcome:
+                outcome['summary'] = log_data['summary']
+            results[index] = outcome
+        
+        return results
+    
+    def _roll_up(self, logs: List[Dict]):
+        """
+        Add stored logs to their daily rollups, queueing a repair if that fails
+        
+        The logs are already stored, so failing the request here would make
+        clients retry and store them twice.
+        """
+        try:
+            self.db.update_daily_rollups(logs)
+        except Exception as e:
+            print(f"Warning: Could not update daily rollups, queueing a repair: {e}")
+            try:
+                self.db.queue_rollup_repair(logs)
+            except Exception as e:
+                print(f"✗ Could not queue a daily rollup repair; run `python migrate.py --rebuild-rollups`: {e}")
+    
+    def list_health_logs(self, user_id: str = None, limit: int = None,
+                         cursor: str = None, fields: Optional[List[str]] = None) -> Dict:
+        """
+        List health logs newest first, one page at a time
+        
+        Args:
+            user_id: User ID to filter logs (if provided)
+            limit: Page size (default: DEFAULT_PAGE_SIZE, capped at MAX_PAGE_SIZE)
+            cursor: Opaque next_cursor of the previous page (first page if omitted)
+            fields: Subset of LISTABLE_FIELDS to return (all of them if omitted)
+            
+        Returns:
+            Dictionary containing logs, next_cursor (None on the last page) and has_more
+            
+        Raises:
+            ValueError: If the limit, cursor or fields are invalid
+        """
+        if limit is None:
+            limit = self.DEFAULT_PAGE_SIZE
+        if limit < 1:
+            raise ValueError("Limit must be a positive integer")
+        limit = min(limit, self.MAX_PAGE_SIZE)
+        
+        fields = fields or self.LISTABLE_FIELDS
+        unknown = [field for field in fields if field not in self.LISTABLE_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        
+        page = self.db.get_log_page(
+            user_id=user_id,
+            page_size=limit,
+            after=self._decode_cursor(cursor) if cursor else None,
+            fields=fields
+        )
+        
+        logs = []
+        for log in page['logs']:
+            entry = {'id': str(log['_id'])}
+            for field in fields:
+                if field in log:
+                    value = log[field]
+                    entry[field] = value.isoformat() if isinstance(value, datetime) else value
+            logs.append(entry)
+        
+        return {
+            'logs': logs,
+            'next_cursor': self._encode_cursor(*page['next']) if page['next'] else None,
+            'has_more': page['next'] is not None
+        }
+    
+    @staticmethod
+    def _encode_cursor(timestamp: datetime, log_id: ObjectId) -> str:
+        """Pack the position of the last listed log into an opaque URL-safe token"""
+        position = json.dumps({'t': timestamp.isoformat(), 'id': str(log_id)}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(position.encode('utf-8')).decode('ascii').rstrip('=')
+    
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+        """Unpack a token made by _encode_cursor, raising ValueError if it is malformed"""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            position = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            return datetime.fromisoformat(position['t']), ObjectId(position['id'])
+        except (ValueError, TypeError, KeyError, InvalidId, UnicodeError):
+            raise ValueError("Invalid cursor")
+    
+    @staticmethod
+    def _parse_timestamp(value) -> Optional[datetime]:
+        """Parse an ISO 8601 timestamp into a naive UTC datetime"""
+        if not isinstance(value, str):
+            return None
+        try:
+            timestamp = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+        return timestamp
@@ -3,12 +3,14 @@ Insights Controller
 Handles structured health insights generation
 """
 
-from typing import Dict, List
+from typing import Dict
 from datetime import datetime, timedelta
-from collections import Counter
 from services.database import DatabaseService
+from services.health_aggregator import HealthAggregator
+from services.metrics import instrumented
 
 
+@instrumented('insights')
 class InsightsController:
     """Controller for health insights operations"""
     
@@ -21,12 +23,15 @@ class InsightsController:
         """
         self.db = db_service
     
-    def get_insights(self, days: int = 7, user_id: str = None) -> Dict:
+    def get_insights(self, days: int = 7, user_id: str = None,
+                     aggregator: HealthAggregator = None) -> Dict:
         """
         Get structured health insights for the specified time period
         
         Args:
             days: Number of days to analyze (default: 7)
+            user_id: User ID to filter logs (if provided)
+            aggregator: Preloaded rollups covering at least `days` (loaded if omitted)
             
         Returns:
             Dictionary containing:
@@ -35,92 +40,53 @@ class InsightsController:
             - medications_timing: Medication mentions
             - lifestyle_context: Lifestyle factors
         """
-        # Get logs from specified period for this user
-        logs = self.db.get_recent_logs(days=days, user_id=user_id)
-        
-        # Aggregate data
-        all_symptoms = []
-        all_moods = []
-        all_medications = []
-        lifestyle_data = {
-            'sleep': [],
-            'exercise': [],
-            'stress': [],
-            'food': []
-        }
-        
-        for log in logs:
-            analysis = log.get('analysis', {})
-            
-            # Collect symptoms
-            symptoms = analysis.get('symptoms', [])
-            all_symptoms.extend(symptoms)
-            
-            # Collect moods
-            mood = analysis.get('mood', {})
-            if mood.get('detected'):
-                all_moods.append(mood.get('primary', 'Neutral'))
-            
-            # Collect medications
-            medications = analysis.get('medications', [])
-            for med in medications:
-                all_medications.append(med.get('name'))
-            
-            # Collect lifestyle data
-            lifestyle = analysis.get('lifestyle', {})
-            if 'sleep' in lifestyle:
-                sleep_info = lifestyle['sleep']
-                if 'hours' in sleep_info:
-                    lifestyle_data['sleep'].append(sleep_info['hours'])
-            
-            if 'exercise' in lifestyle:
-                lifestyle_data['exercise'].append(log.get('timestamp'))
-            
-            if 'stress' in lifestyle:
-                lifestyle_data['stress'].append(log.get('timestamp'))
+        # Fold daily rollups from specified period for this user, unless a wider window was preloaded
+        if aggregator is None:
+            aggregator = self.db.load_rollups(days=days, user_id=user_id)
+        stats = aggregator.stats(since=HealthAggregator.window_start(days))
+        total_logs = stats['total_logs']
         
         # Process symptoms with frequency
-        symptom_counter = Counter(all_symptoms)
         symptoms_detected = [
             {
-                'symptom': symptom,
-                'frequency': count,
-                'percentage': round((count / len(logs)) * 100, 1) if logs else 0
+                'symptom': entry['name'],
+                'frequency': entry['count'],
+                'percentage': round((entry['count'] / total_logs) * 100, 1) if total_logs else 0
             }
-            for symptom, count in symptom_counter.most_common()
+            for entry in stats['symptoms']
         ]
         
         # Process mood trends
-        mood_counter = Counter(all_moods)
+        mood_distribution = {entry['name']: entry['count'] for entry in stats['moods']}
         mental_emotional_state = {
-            'primary_mood': mood_counter.most_common(1)[0][0] if mood_counter else 'Neutral',
-            'mood_distribution': dict(mood_counter),
-            'total_mood_mentions': len(all_moods)
+            'primary_mood': stats['moods'][0]['name'] if stats['moods'] else 'Neutral',
+            'mood_distribution': mood_distribution,
+            'total_mood_mentions': sum(mood_distribution.values())
         }
         
         # Process medications
-        medication_counter = Counter(all_medications)
         medications_timing = [
             {
-                'medication': med,
-                'mentions': count
+                'medication': entry['name'],
+                'mentions': entry['count']
             }
-            for med, count in medication_counter.most_common()
+            for entry in stats['medications']
         ]
         
         # Process lifestyle context
+        sleep = stats['sleep']
         lifestyle_context = {
             'sleep': {
-                'average_hours': round(sum(lifestyle_data['sleep']) / len(lifestyle_data['sleep']), 1) if lifestyle_data['sleep'] else None,
-                'mentions': len(lifestyle_data['sleep'])
+                'average_hours': round(sleep['hours_total'] / sleep['mentions'], 1) if sleep['mentions'] else None,
+                'mentions': sleep['mentions']
             },
             'exercise': {
-                'mentions': len(lifestyle_data['exercise']),
-                'frequency': f"{len(lifestyle_data['exercise'])} times in {days} days"
+                'mentions': stats['exercise_mentions'],
+                'frequency': f"{stats['exercise_mentions']} times in {days} days"
             },
             'stress': {
-                'mentions': len(lifestyle_data['stress']),
-                'frequency': f"{len(lifestyle_data['stress'])} times in {days} days"
+                'mentions': stats['stress_mentions'],
+                'frequency': f"{stats['stress_mentions']} times in {days} days"
             }
         }
         
@@ -133,7 +99,7 @@ class InsightsController:
                 'days': days,
                 'start_date': (datetime.utcnow() - timedelta(days=days)).isoformat(),
                 'end_date': datetime.utcnow().isoformat(),
-                'total_logs': len(logs)
+                'total_logs': total_logs
             }
         }
 
@@ -3,11 +3,14 @@ Summary Controller
 Handles generation of doctor-ready clinical summaries
 """
 
-from typing import Dict, List
-from datetime import datetime, timedelta
+from typing import Dict
+from datetime import datetime
 from services.database import DatabaseService
+from services.health_aggregator import HealthAggregator
+from services.metrics import instrumented
 
 
+@instrumented('summary')
 class SummaryController:
     """Controller for generating doctor-ready summaries"""
     
@@ -20,20 +23,26 @@ class SummaryController:
         """
         self.db = db_service
     
-    def get_summary(self, days: int = 30, user_id: str = None) -> Dict:
+    def get_summary(self, days: int = 30, user_id: str = None,
+                    aggregator: HealthAggregator = None) -> Dict:
         """
         Generate a clean clinical summary for doctor review
         
         Args:
             days: Number of days to include in summary (default: 30)
+            user_id: User ID to filter logs (if provided)
+            aggregator: Preloaded rollups covering at least `days` (loaded if omitted)
             
         Returns:
             Dictionary containing clinical summary text
         """
-        # Get logs from specified period for this user
-        logs = self.db.get_recent_logs(days=days, user_id=user_id)
+        # Fold daily rollups from specified period for this user, unless a wider window was preloaded
+        if aggregator is None:
+            aggregator = self.db.load_rollups(days=days, user_id=user_id)
+        stats = aggregator.stats(since=HealthAggregator.window_start(days))
+        total_logs = stats['total_logs']
         
-        if not logs:
+        if not total_logs:
             return {
                 'summary': "No health logs available for the specified period.",
                 'period_days': days,
@@ -49,74 +58,35 @@ class SummaryController:
         summary_sections.append("")
         
         # Symptoms section
-        all_symptoms = []
-        for log in logs:
-            analysis = log.get('analysis', {})
-            symptoms = analysis.get('symptoms', [])
-            all_symptoms.extend(symptoms)
-        
-        if all_symptoms:
-            from collections import Counter
-            symptom_counter = Counter(all_symptoms)
+        if stats['symptoms']:
             summary_sections.append("SYMPTOMS:")
-            for symptom, count in symptom_counter.most_common():
-                summary_sections.append(f"  - {symptom}: reported {count} time(s)")
+            for entry in stats['symptoms']:
+                summary_sections.append(f"  - {entry['name']}: reported {entry['count']} time(s)")
             summary_sections.append("")
         
         # Mental state section
-        mood_states = []
-        for log in logs:
-            analysis = log.get('analysis', {})
-            mood = analysis.get('mood', {})
-            if mood.get('detected'):
-                mood_states.append(mood.get('primary', 'Neutral'))
-        
-        if mood_states:
-            from collections import Counter
-            mood_counter = Counter(mood_states)
+        if stats['moods']:
             summary_sections.append("MENTAL/EMOTIONAL STATE:")
-            for mood, count in mood_counter.most_common():
-                summary_sections.append(f"  - {mood}: noted {count} time(s)")
+            for entry in stats['moods']:
+                summary_sections.append(f"  - {entry['name']}: noted {entry['count']} time(s)")
             summary_sections.append("")
         
         # Medications section
-        all_medications = []
-        for log in logs:
-            analysis = log.get('analysis', {})
-            medications = analysis.get('medications', [])
-            for med in medications:
-                all_medications.append(med.get('name'))
-        
-        if all_medications:
-            from collections import Counter
-            med_counter = Counter(all_medications)
+        if stats['medications']:
             summary_sections.append("MEDICATIONS MENTIONED:")
-            for med, count in med_counter.most_common():
-                summary_sections.append(f"  - {med}: mentioned {count} time(s)")
+            for entry in stats['medications']:
+                summary_sections.append(f"  - {entry['name']}: mentioned {entry['count']} time(s)")
             summary_sections.append("")
         
         # Lifestyle factors
-        sleep_hours = []
-        exercise_count = 0
-        stress_count = 0
-        
-        for log in logs:
-            analysis = log.get('analysis', {})
-            lifestyle = analysis.get('lifestyle', {})
-            
-            if 'sleep' in lifestyle and 'hours' in lifestyle['sleep']:
-                sleep_hours.append(lifestyle['sleep']['hours'])
-            
-            if 'exercise' in lifestyle:
-                exercise_count += 1
-            
-            if 'stress' in lifestyle:
-                stress_count += 1
+        sleep = stats['sleep']
+        exercise_count = stats['exercise_mentions']
+        stress_count = stats['stress_mentions']
         
         summary_sections.append("LIFESTYLE FACTORS:")
-        if sleep_hours:
-            avg_sleep = sum(sleep_hours) / len(sleep_hours)
-            summary_sections.append(f"  - Average sleep: {avg_sleep:.1f} hours (from {len(sleep_hours)} mentions)")
+        if sleep['mentions']:
+            avg_sleep = sleep['hours_total'] / sleep['mentions']
+            summary_sections.append(f"  - Average sleep: {avg_sleep:.1f} hours (from {sleep['mentions']} mentions)")
         if exercise_count > 0:
             summary_sections.append(f"  - Exercise mentioned: {exercise_count} time(s)")
         if stress_count > 0:
@@ -125,9 +95,10 @@ class SummaryController:
         
         # Summary statistics
         summary_sections.append("SUMMARY STATISTICS:")
-        summary_sections.append(f"  - Total health logs: {len(logs)}")
+        summary_sections.append(f"  - Total health logs: {total_logs}")
         summary_sections.append(f"  - Period: {days} days")
-        summary_sections.append(f"  - Average logs per day: {len(logs) / days:.1f}")
+        # days=0 covers today alone
+        summary_sections.append(f"  - Average logs per day: {total_logs / max(days, 1):.1f}")
         
         # Combine all sections
         clinical_summary = "\n".join(summary_sections)
@@ -135,7 +106,7 @@ class SummaryController:
         return {
             'summary': clinical_summary,
             'period_days': days,
-            'total_logs': len(logs),
+            'total_logs': total_logs,
             'generated_at': datetime.utcnow().isoformat()
         }
 
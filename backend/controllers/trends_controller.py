@@ -3,12 +3,16 @@ Trends Controller
 Handles health trends analysis over time
 """
 
-from typing import Dict, List
-from datetime import datetime, timedelta
-from collections import Counter, defaultdict
+from typing import Dict
+from datetime import datetime
+import numpy as np
 from services.database import DatabaseService
+from services.health_aggregator import HealthAggregator
+from services.trend_analysis import DailySeries
+from services.metrics import instrumented
 
 
+@instrumented('trends')
 class TrendsController:
     """Controller for health trends analysis"""
     
@@ -21,23 +25,64 @@ class TrendsController:
         """
         self.db = db_service
     
-    def get_trends(self, days: int = 30, user_id: str = None) -> Dict:
+    # Longest windows charted per day and per week when granularity is 'auto'
+    AUTO_DAY_MAX_DAYS = 31
+    AUTO_WEEK_MAX_DAYS = 180
+    
+    @classmethod
+    def resolve_granularity(cls, granularity: str, days: int) -> str:
+        """
+        Pick the bucket size for a window
+        
+        Args:
+            granularity: 'day', 'week', 'month' or 'auto'
+            days: Number of days in the window
+            
+        Returns:
+            str: 'day', 'week' or 'month'
+        """
+        if granularity != 'auto':
+            return granularity
+        if days <= cls.AUTO_DAY_MAX_DAYS:
+            return 'day'
+        if days <= cls.AUTO_WEEK_MAX_DAYS:
+            return 'week'
+        return 'month'
+    
+    def get_trends(self, days: int = 30, user_id: str = None,
+                   aggregator: HealthAggregator = None, granularity: str = 'auto') -> Dict:
         """
         Get health trends for the specified time period
         
         Args:
             days: Number of days to analyze (default: 30)
+            user_id: User ID to filter logs (if provided)
+            aggregator: Preloaded rollups covering at least `days` (loaded if
+                        omitted or bucketed at a different granularity)
+            granularity: Bucket size of daily_breakdown: 'day', 'week',
+                         'month' or 'auto' to pick from `days` (default: 'auto')
             
         Returns:
             Dictionary containing:
             - symptom_frequency: Symptom trends over time
             - mood_trends: Mood patterns
+            - sleep_trend: Reported sleep hours over time
             - medication_adherence: Medication tracking trends
+            - daily_breakdown: Per-period counts with rolling averages
+            - granularity: Bucket size used for daily_breakdown
         """
-        # Get logs from specified period for this user
-        logs = self.db.get_recent_logs(days=days, user_id=user_id)
+        granularity = self.resolve_granularity(granularity, days)
         
-        if not logs:
+        # Fold daily rollups from specified period for this user, unless a wider window was preloaded
+        if aggregator is None or aggregator.granularity != granularity:
+            aggregator = self.db.load_rollups(days=days, user_id=user_id, granularity=granularity)
+        # Bounded at today like the series below, so future-dated logs cannot name a symptom the series lacks
+        since = HealthAggregator.window_start(days)
+        until = HealthAggregator.window_start(0)
+        stats = aggregator.stats(since=since, until=until)
+        total_logs = stats['total_logs']
+        
+        if not total_logs:
             return {
                 'symptom_frequency': [],
                 'mood_trends': [],
@@ -47,108 +92,92 @@ class TrendsController:
                     'medications': []
                 },
                 'period_days': days,
+                'granularity': granularity,
                 'message': 'No data available for trend analysis'
             }
         
-        # Organize data by date
-        daily_data = defaultdict(lambda: {
-            'symptoms': [],
-            'moods': [],
-            'medications': []
-        })
-        
-        for log in logs:
-            timestamp = log.get('timestamp')
-            if timestamp:
-                if isinstance(timestamp, str):
-                    timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-                date_key = timestamp.date().isoformat()
-                
-                analysis = log.get('analysis', {})
-                
-                # Collect daily symptoms
-                symptoms = analysis.get('symptoms', [])
-                daily_data[date_key]['symptoms'].extend(symptoms)
-                
-                # Collect daily moods
-                mood = analysis.get('mood', {})
-                if mood.get('detected'):
-                    daily_data[date_key]['moods'].append(mood.get('primary', 'Neutral'))
-                
-                # Collect daily medications
-                medications = analysis.get('medications', [])
-                for med in medications:
-                    daily_data[date_key]['medications'].append(med.get('name'))
+        # Dense per-day series; trends are fitted to occurrences per log on logged days
+        series = DailySeries.from_aggregator(aggregator, since, until)
+        symptom_series = dict(zip(
+            series.symptom_names, series.trends(series.per_log(series.symptoms), series.logged)
+        ))
+        mood_series = dict(zip(
+            series.mood_names, series.trends(series.per_log(series.moods), series.logged)
+        ))
         
         # Process symptom frequency trends
-        all_symptoms = []
-        for date_data in daily_data.values():
-            all_symptoms.extend(date_data['symptoms'])
-        
-        symptom_counter = Counter(all_symptoms)
         symptom_frequency = [
             {
-                'symptom': symptom,
-                'total_occurrences': count,
-                'frequency_percentage': round((count / len(logs)) * 100, 1) if logs else 0,
-                'trend': 'stable'  # Could be enhanced with time-series analysis
+                'symptom': entry['name'],
+                'total_occurrences': entry['count'],
+                'frequency_percentage': round((entry['count'] / total_logs) * 100, 1),
+                **symptom_series[entry['name']]
             }
-            for symptom, count in symptom_counter.most_common()
+            for entry in stats['symptoms']
         ]
         
         # Process mood trends
-        all_moods = []
-        for date_data in daily_data.values():
-            all_moods.extend(date_data['moods'])
-        
-        mood_counter = Counter(all_moods)
+        total_moods = sum(entry['count'] for entry in stats['moods'])
         mood_trends = [
             {
-                'mood': mood,
-                'occurrences': count,
-                'percentage': round((count / len(all_moods)) * 100, 1) if all_moods else 0
+                'mood': entry['name'],
+                'occurrences': entry['count'],
+                'percentage': round((entry['count'] / total_moods) * 100, 1) if total_moods else 0,
+                **mood_series[entry['name']]
             }
-            for mood, count in mood_counter.most_common()
+            for entry in stats['moods']
         ]
         
-        # Process medication adherence
-        all_medications = []
-        for date_data in daily_data.values():
-            all_medications.extend(date_data['medications'])
+        # Process sleep trend
+        slept = ~np.isnan(series.sleep_hours)
+        sleep_trend = {
+            'average_hours': round(float(series.sleep_hours[slept].mean()), 1) if slept.any() else None,
+            'nights_reported': int(slept.sum()),
+            **series.trends(series.sleep_hours[:, None], slept)[0]
+        }
         
-        medication_counter = Counter(all_medications)
+        # Process medication adherence
         medication_adherence = {
-            'total_mentions': len(all_medications),
-            'unique_medications': len(medication_counter),
+            'total_mentions': sum(entry['count'] for entry in stats['medications']),
+            'unique_medications': len(stats['medications']),
             'medications': [
                 {
-                    'name': med,
-                    'mentions': count,
-                    'adherence_score': round((count / days) * 100, 1) if days > 0 else 0
+                    'name': entry['name'],
+                    'mentions': entry['count'],
+                    'adherence_score': round((entry['count'] / days) * 100, 1) if days > 0 else 0
                 }
-                for med, count in medication_counter.most_common()
+                for entry in stats['medications']
             ]
         }
         
-        # Daily breakdown for charting
-        daily_breakdown = []
-        for date_key in sorted(daily_data.keys()):
-            date_data = daily_data[date_key]
-            daily_breakdown.append({
-                'date': date_key,
-                'symptoms_count': len(date_data['symptoms']),
-                'unique_symptoms': len(set(date_data['symptoms'])),
-                'mood': date_data['moods'][0] if date_data['moods'] else None,
-                'medications_count': len(date_data['medications'])
-            })
+        # Daily breakdown for charting, with trailing averages over logged days
+        rows = {day: row for row, day in enumerate(series.dates)}
+        symptoms_rolling = series.rolling_mean(series.symptoms.sum(axis=1), series.logged)
+        sleep_rolling = series.rolling_mean(series.sleep_hours, slept)
+        daily_breakdown = [
+            {
+                **day,
+                'symptoms_rolling_avg': self._rounded(symptoms_rolling[rows[day['date']]]),
+                'sleep_hours': self._rounded(series.sleep_hours[rows[day['date']]]),
+                'sleep_rolling_avg': self._rounded(sleep_rolling[rows[day['date']]])
+            }
+            for day in stats['daily']
+            if day['date'] in rows
+        ]
         
         return {
             'symptom_frequency': symptom_frequency,
             'mood_trends': mood_trends,
+            'sleep_trend': sleep_trend,
             'medication_adherence': medication_adherence,
             'daily_breakdown': daily_breakdown,
             'period_days': days,
-            'total_logs': len(logs),
+            'granularity': granularity,
+            'total_logs': total_logs,
             'analysis_date': datetime.utcnow().isoformat()
         }
-
+    
+    @staticmethod
+    def _rounded(value) -> float:
+        """Round a series value for JSON, mapping NaN to None"""
+        return None if np.isnan(value) else round(float(value), 2)
@@ -0,0 +1,115 @@
+"""
+Log Export
+Writes every health log of a user (or of all users) to an NDJSON, CSV or Parquet file
+
+Usage:
+    python export_logs.py export.parquet [--user-id USER] [--days 365] [--format parquet] [--row-group-size 10000]
+
+Logs are streamed from MongoDB a cursor batch at a time and written as they
+arrive (Parquet one row group at a time), so memory stays flat however long
+the history is. Use "-" as the path to write NDJSON or CSV to stdout.
+"""
+
+import argparse
+import sys
+import time
+from typing import Optional
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+from services.database import DatabaseService
+from services.log_exporter import LogExporter
+
+# Formats written by this script
+FORMATS = ['ndjson', 'csv', 'parquet']
+
+
+def guess_format(path: str) -> str:
+    """Pick the export format from the file extension (NDJSON by default)"""
+    for file_format in FORMATS:
+        if path.lower().endswith(f'.{file_format}'):
+            return file_format
+    return 'ndjson'
+
+
+def export_logs(db: DatabaseService, path: str, file_format: Optional[str] = None,
+                user_id: Optional[str] = None, days: Optional[int] = None,
+                row_group_size: int = 10000) -> int:
+    """
+    Export logs to a file
+
+    Args:
+        db: Database service instance
+        path: Output file ("-" for stdout, NDJSON and CSV only)
+        file_format: 'ndjson', 'csv' or 'parquet' (guessed from the extension if omitted)
+        user_id: Only export this user's logs (all users if omitted)
+        days: Only export logs from the last `days` days (all history if omitted)
+        row_group_size: Logs per Parquet row group
+
+    Returns:
+        int: Number of logs exported
+    """
+    file_format = file_format or guess_format(path)
+    exporter = LogExporter(db)
+    started = time.time()
+
+    # Count logs as they stream past so the total needs no second query
+    count = 0
+
+    def counted(logs):
+        nonlocal count
+        for log in logs:
+            count += 1
+            yield log
+
+    logs = counted(exporter.iter_logs(user_id=user_id, days=days))
+
+    if file_format == 'parquet':
+        if path == '-':
+            raise ValueError("Parquet exports need a file path")
+        exporter.write_parquet(logs, path, row_group_size=row_group_size)
+    else:
+        chunks = exporter.iter_csv(logs) if file_format == 'csv' else exporter.iter_ndjson(logs)
+        handle = sys.stdout.buffer if path == '-' else open(path, 'wb')
+        try:
+            for chunk in chunks:
+                handle.write(chunk)
+        finally:
+            if handle is not sys.stdout.buffer:
+                handle.close()
+
+    print(f"✓ Exported {count} logs to {path} as {file_format} in {time.time() - started:.1f}s",
+          file=sys.stderr)
+    return count
+
+
+def main():
+    """Parse command line arguments and run the export"""
+    parser = argparse.ArgumentParser(description="Export HealthVoice logs")
+    parser.add_argument('path', help='output file ("-" for stdout)')
+    parser.add_argument('--format', choices=FORMATS, dest='file_format',
+                        help="file format (default: guessed from the extension, else ndjson)")
+    parser.add_argument('--user-id', help="only export this user's logs (default: all users)")
+    parser.add_argument('--days', type=int, help="only export the last N days (default: all history)")
+    parser.add_argument('--row-group-size', type=int, default=10000,
+                        help="logs per Parquet row group (default: 10000)")
+    args = parser.parse_args()
+
+    db = DatabaseService()
+    try:
+        export_logs(
+            db,
+            args.path,
+            file_format=args.file_format,
+            user_id=args.user_id,
+            days=args.days,
+            row_group_size=args.row_group_size
+        )
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Gunicorn Configuration
+Multi-process, multi-threaded serving of wsgi:app, tuned through environment variables
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+import multiprocessing
+import os
+from dotenv import load_dotenv
+
+# The master reads these settings before any worker loads the app's .env
+load_dotenv()
+
+# Workers only serve; indexes and rollups are prepared by migrate.py before a deploy
+os.environ.setdefault('DB_MIGRATE_ON_START', 'off')
+
+# Address to listen on
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+
+# Worker processes, one per core by default; each has its own MongoClient,
+# response cache and REPORT_WORKERS report rendering processes
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+
+# Request threads per worker; requests mostly wait on MongoDB, so threads
+# overlap that wait without the memory cost of more processes
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Build the application inside each worker, after the fork, so no MongoClient
+# or process pool is ever inherited from the master
+preload_app = False
+
+# Seconds a request may run before its worker is restarted; above the
+# default REPORT_WAIT_TIMEOUT so a waiting PDF download is not cut short
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 90))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers after this many requests (0 to never), jittered so they do not restart together
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = max(max_requests // 10, 0)
+
+accesslog = '-'
+errorlog = '-'
+
+
+def on_starting(server):
+    """Clear metrics files left by a previous run so counters start from zero"""
+    directory = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.endswith('.db'):
+                os.remove(os.path.join(directory, name))
+
+
+def child_exit(server, worker):
+    """Drop the in-flight gauges of a worker that exited from the merged metrics"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
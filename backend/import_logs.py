@@ -0,0 +1,181 @@
+"""
+Historical Import
+Bulk-loads transcribed notes from JSONL or CSV files into health_logs
+
+Usage:
+    python import_logs.py notes.jsonl [--batch-size 1000] [--workers 4] [--start 0] [--restart]
+
+Each record needs a `prompt` and may carry `user_id` and an ISO 8601
+`timestamp`. Files are read as a stream, analysis is spread across worker
+processes, and every batch is written with one unordered bulk insert.
+The offset of the last written record is checkpointed in MongoDB, so
+re-running the same command resumes where an interrupted import stopped.
+Each record carries a unique import_key derived from the file and its
+offset, so records written just before a crash are not stored twice on resume.
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import time
+from itertools import islice
+from typing import Dict, Iterator, Optional
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+from services.database import DatabaseService
+from services.parallel_analyzer import ParallelTextAnalyzer, iter_batches
+from controllers.health_log_controller import HealthLogController
+
+# Fields read from every record
+RECORD_FIELDS = ('prompt', 'user_id', 'timestamp')
+
+
+def read_records(path: str, file_format: Optional[str] = None) -> Iterator[Optional[Dict]]:
+    """
+    Stream records from a JSONL or CSV file
+
+    Args:
+        path: File to read
+        file_format: 'jsonl' or 'csv' (guessed from the file extension if omitted)
+
+    Yields:
+        One {prompt, user_id, timestamp} dictionary per record, or None for
+        records that could not be parsed
+    """
+    file_format = file_format or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+
+    with open(path, newline='', encoding='utf-8') as handle:
+        if file_format == 'csv':
+            for row in csv.DictReader(handle):
+                # Empty CSV cells mean "not provided"
+                yield {field: row.get(field) or None for field in RECORD_FIELDS}
+        else:
+            for line in handle:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    yield None
+                    continue
+                yield {field: record.get(field) for field in RECORD_FIELDS} if isinstance(record, dict) else None
+
+
+def record_key(path: str, offset: int) -> str:
+    """Import key of the record at `offset` in a file, the same on every run"""
+    return hashlib.blake2b(f"{os.path.abspath(path)}:{offset}".encode('utf-8'), digest_size=16).hexdigest()
+
+
+def import_file(db: DatabaseService, path: str, file_format: Optional[str] = None,
+                batch_size: int = 1000, workers: Optional[int] = None,
+                start: Optional[int] = None, restart: bool = False) -> Dict:
+    """
+    Import every record of a file as a health log
+
+    Args:
+        db: Database service instance
+        path: JSONL or CSV file to import
+        file_format: 'jsonl' or 'csv' (guessed from the file extension if omitted)
+        batch_size: Records analyzed and written per bulk insert
+        workers: Analyzer processes to run (defaults to the CPU count)
+        start: Record offset to start from (overrides the saved checkpoint)
+        restart: Ignore the saved checkpoint and start from the first record
+
+    Returns:
+        The final checkpoint state
+    """
+    job = f"import:{os.path.abspath(path)}"
+
+    checkpoint = db.get_checkpoint(job)
+    if restart or not checkpoint or checkpoint.get('completed'):
+        checkpoint = {'offset': 0, 'created': 0, 'duplicates': 0, 'failed': 0, 'completed': False}
+    # Checkpoints saved before duplicates were counted lack the field
+    checkpoint.setdefault('duplicates', 0)
+    if start is not None:
+        checkpoint['offset'] = start
+    if checkpoint['offset']:
+        print(f"Skipping the first {checkpoint['offset']} records")
+
+    records = islice(read_records(path, file_format), checkpoint['offset'], None)
+
+    started_at = time.monotonic()
+    imported = 0
+
+    with ParallelTextAnalyzer(workers=workers) as analyzer:
+        controller = HealthLogController(db, analyzer)
+
+        for batch in iter_batches(records, batch_size):
+            import_keys = [record_key(path, checkpoint['offset'] + index) for index in range(len(batch))]
+            results = controller.create_health_logs(batch, import_keys=import_keys)
+
+            for index, result in enumerate(results):
+                if 'error' in result:
+                    print(f"  record {checkpoint['offset'] + index}: {result['error']}")
+
+            stored = sum(1 for result in results if 'log_id' in result)
+            duplicates = sum(1 for result in results if result.get('duplicate'))
+            checkpoint['offset'] += len(batch)
+            checkpoint['created'] += stored - duplicates
+            checkpoint['duplicates'] += duplicates
+            checkpoint['failed'] += len(batch) - stored
+            db.save_checkpoint(job, checkpoint)
+
+            imported += len(batch)
+            elapsed = time.monotonic() - started_at
+            print(f"  {checkpoint['offset']} records read, {checkpoint['created']} created, "
+                  f"{checkpoint['duplicates']} already imported, "
+                  f"{checkpoint['failed']} failed ({imported / elapsed:.0f} records/s)")
+
+    # Days of records found already imported are recounted, in case their rollup write was lost
+    db.repair_daily_rollups()
+
+    checkpoint['completed'] = True
+    db.save_checkpoint(job, checkpoint)
+
+    elapsed = time.monotonic() - started_at
+    print(f"✓ Import complete: {checkpoint['created']} created, {checkpoint['duplicates']} already imported, "
+          f"{checkpoint['failed']} failed in {elapsed:.1f}s")
+    return checkpoint
+
+
+def main():
+    """Parse command line arguments and run the import"""
+    parser = argparse.ArgumentParser(description="Import transcribed notes into HealthVoice")
+    parser.add_argument('path', help="JSONL or CSV file of {user_id, timestamp, prompt} records")
+    parser.add_argument('--format', choices=['jsonl', 'csv'], dest='file_format',
+                        help="file format (default: guessed from the extension)")
+    parser.add_argument('--batch-size', type=int, default=1000,
+                        help="records analyzed and written per bulk insert (default: 1000)")
+    parser.add_argument('--workers', type=int,
+                        help="analyzer processes (default: all CPUs)")
+    parser.add_argument('--start', type=int,
+                        help="record offset to start from (default: resume from the checkpoint)")
+    parser.add_argument('--restart', action='store_true',
+                        help="ignore the saved checkpoint and start from the first record")
+    args = parser.parse_args()
+
+    db = DatabaseService()
+    db.migrate()
+    # Rollups of earlier logs must exist before imported logs are added to them
+    db.backfill_daily_rollups()
+    try:
+        import_file(
+            db,
+            args.path,
+            file_format=args.file_format,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            start=args.start,
+            restart=args.restart
+        )
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
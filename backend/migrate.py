@@ -0,0 +1,44 @@
+"""
+Database Migration
+Creates MongoDB indexes, backfills daily rollups and repairs those that missed a write, ahead of serving traffic
+
+Usage:
+    python migrate.py [--rebuild-rollups]
+
+Run it once per deployment, before the new servers take traffic, and start
+the API with DB_MIGRATE_ON_START=off (the default under gunicorn), so
+workers begin serving without any startup round trips to MongoDB. Every
+step is idempotent, and a lock document keeps concurrent runs from
+rebuilding rollups at the same time.
+"""
+
+import argparse
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+from services.database import DatabaseService
+
+
+def main():
+    """Parse command line arguments and run the migration"""
+    parser = argparse.ArgumentParser(description="Create indexes and backfill daily rollups")
+    parser.add_argument('--rebuild-rollups', action='store_true',
+                        help="rebuild every daily rollup from the stored logs, not only a missing set")
+    args = parser.parse_args()
+
+    db = DatabaseService()
+    try:
+        db.migrate()
+        if args.rebuild_rollups:
+            db.rebuild_daily_rollups()
+        else:
+            db.backfill_daily_rollups()
+        db.repair_daily_rollups()
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""
+Re-analysis Job
+Re-runs text analysis over stored health logs written by an older analyzer version
+
+Usage:
+    python reanalyze.py [--batch-size 500] [--workers 2] [--pause 0.5] [--restart]
+
+Progress is checkpointed in MongoDB after every batch, so an interrupted run
+picks up where it stopped. Run it alongside the API; --workers and --pause
+bound how much CPU and database time it takes from live requests. Daily
+rollups are adjusted batch by batch, so they stay complete throughout.
+"""
+
+import argparse
+import os
+import time
+from typing import Dict
+from bson import ObjectId
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+from services.database import DatabaseService
+from services.parallel_analyzer import ParallelTextAnalyzer, iter_batches
+
+# Checkpoint document id for this job
+JOB_NAME = 'reanalyze'
+
+
+def reanalyze(db: DatabaseService, batch_size: int = 500, workers: int = 2,
+              pause: float = 0.5, restart: bool = False, adjust_rollups: bool = True) -> Dict:
+    """
+    Re-analyze every log whose analysis_version differs from the current analyzer
+
+    Args:
+        db: Database service instance
+        batch_size: Logs analyzed and written per bulk write
+        workers: Analyzer processes to run
+        pause: Seconds to sleep between batches
+        restart: Ignore any saved checkpoint and start from the beginning
+        adjust_rollups: Move daily rollups to the new analyses after every batch
+
+    Returns:
+        The final checkpoint state
+    """
+    version = ParallelTextAnalyzer.VERSION
+
+    # Resume only if the checkpoint belongs to the same analyzer version
+    checkpoint = db.get_checkpoint(JOB_NAME)
+    if restart or not checkpoint or checkpoint.get('version') != version or checkpoint.get('completed'):
+        checkpoint = {'version': version, 'last_id': None, 'processed': 0, 'updated': 0, 'completed': False}
+    else:
+        print(f"Resuming from log {checkpoint['last_id']} ({checkpoint['processed']} processed)")
+        # A batch interrupted after its logs were written may still owe its rollup change;
+        # an adjustment already applied is skipped by its id
+        pending = checkpoint.get('pending')
+        if pending:
+            db.adjust_daily_rollups(pending['logs'], version, pending['id'])
+            checkpoint['pending'] = None
+            db.save_checkpoint(JOB_NAME, checkpoint)
+
+    stale_logs = db.iter_stale_logs(version, after_id=checkpoint['last_id'], batch_size=batch_size)
+
+    with ParallelTextAnalyzer(workers=workers) as analyzer:
+        for batch in iter_batches(stale_logs, batch_size):
+            # Logs without a usable prompt cannot be re-analyzed
+            logs = [log for log in batch if isinstance(log.get('prompt'), str) and log['prompt']]
+            analyses = analyzer.analyze_batch([log['prompt'] for log in logs])
+
+            # Keep the old analyses until the rollups have been moved off them
+            if adjust_rollups:
+                checkpoint['pending'] = {
+                    'id': str(ObjectId()),
+                    'logs': [{key: value for key, value in log.items() if key != 'prompt'} for log in logs],
+                }
+                db.save_checkpoint(JOB_NAME, checkpoint)
+
+            updated = db.update_log_analyses([
+                {'_id': log['_id'], 'analysis': analysis, 'summary': analyzer.generate_summary(analysis)}
+                for log, analysis in zip(logs, analyses)
+            ], version)
+
+            if adjust_rollups:
+                pending = checkpoint['pending']
+                db.adjust_daily_rollups(pending['logs'], version, pending['id'])
+                checkpoint['pending'] = None
+
+            checkpoint['last_id'] = batch[-1]['_id']
+            checkpoint['processed'] += len(batch)
+            checkpoint['updated'] += updated
+            db.save_checkpoint(JOB_NAME, checkpoint)
+            print(f"  {checkpoint['processed']} logs processed, {checkpoint['updated']} updated")
+
+            # Leave room for the live API between batches
+            if pause:
+                time.sleep(pause)
+
+    checkpoint['completed'] = True
+    db.save_checkpoint(JOB_NAME, checkpoint)
+    print(f"✓ Re-analysis complete (analyzer version {version}): "
+          f"{checkpoint['processed']} logs processed, {checkpoint['updated']} updated")
+    return checkpoint
+
+
+def main():
+    """Parse command line arguments and run the job"""
+    parser = argparse.ArgumentParser(description="Re-analyze stored health logs with the current analyzer")
+    parser.add_argument('--batch-size', type=int, default=500,
+                        help="logs analyzed and written per bulk write (default: 500)")
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="analyzer processes (default: half the CPUs)")
+    parser.add_argument('--pause', type=float, default=0.5,
+                        help="seconds to sleep between batches (default: 0.5)")
+    parser.add_argument('--restart', action='store_true',
+                        help="ignore the saved checkpoint and start over")
+    parser.add_argument('--skip-rollups', action='store_true',
+                        help="leave daily rollups alone (rebuild them later with migrate.py --rebuild-rollups)")
+    args = parser.parse_args()
+
+    db = DatabaseService()
+    db.migrate()
+    try:
+        reanalyze(
+            db,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            pause=args.pause,
+            restart=args.restart,
+            adjust_rollups=not args.skip_rollups
+        )
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
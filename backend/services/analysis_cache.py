@@ -0,0 +1,81 @@
+"""
+Analysis Cache
+Bounded LRU/TTL memoization of text analysis results keyed by prompt hash
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+class AnalysisCache:
+    """Thread-safe LRU cache with per-entry expiry and hit/miss counters"""
+
+    def __init__(self, max_size: int = 1024, ttl: float = 3600):
+        """
+        Create an empty cache
+
+        Args:
+            max_size: Maximum number of cached analyses
+            ttl: Seconds an entry stays valid (0 to never expire)
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(text: str) -> bytes:
+        """
+        Hash a prompt exactly as given
+
+        Neither case nor whitespace is normalized, because medication names
+        and their mentioned_in snippets are cut from the original text.
+        """
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+    def get(self, key: bytes) -> Optional[Dict]:
+        """Return the cached analysis for a key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, analysis = entry
+                if not self.ttl or time.monotonic() - stored_at < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return analysis
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: bytes, analysis: Dict):
+        """Store an analysis, evicting the least recently used entry when full"""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), analysis)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every entry and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl
+            }
@@ -3,18 +3,71 @@ Database Service
 Handles all MongoDB operations for health logs and user data
 """
 
-from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure, OperationFailure
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import BulkWriteError, ConnectionFailure, DuplicateKeyError, OperationFailure
+from bson import ObjectId
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import functools
 import os
+import threading
+import weakref
+from services.health_aggregator import HealthAggregator
+from services.metrics import instrumented
+from services.query_monitor import QueryMonitor
 
 
+def _after_fork(service_ref: weakref.ref):
+    """Fork hook: give a still-alive DatabaseService fresh locks in the child"""
+    service = service_ref()
+    if service is not None:
+        service._reset_locks()
+
+
+@instrumented('db')
 class DatabaseService:
     """Service for managing MongoDB database connections and operations"""
     
+    # Fields needed to build daily rollups from stored logs
+    ROLLUP_FIELDS = [
+        'user_id',
+        'timestamp',
+        'analysis.symptoms',
+        'analysis.mood.detected',
+        'analysis.mood.primary',
+        'analysis.medications.name',
+        'analysis.lifestyle.sleep.hours',
+        'analysis.lifestyle.exercise.mentioned',
+        'analysis.lifestyle.stress.mentioned',
+    ]
+    
+    # Documents fetched per server round trip when streaming logs
+    CURSOR_BATCH_SIZE = int(os.getenv('MONGODB_CURSOR_BATCH_SIZE', 500))
+    
+    # Collection daily rollups are rebuilt into before it replaces daily_rollups
+    ROLLUP_REBUILD_COLLECTION = 'daily_rollups_rebuild'
+    
+    # job_checkpoints document listing the (user_id, day) rollups left behind by failed writes
+    ROLLUP_REPAIRS_ID = 'rollup_repairs'
+    
+    # Re-analysis batches remembered on each rollup, so a resumed batch is not applied twice
+    ROLLUP_ADJUSTMENT_MARKERS = 20
+    
+    # Attempts to swap in a recomputed rollup while live writes keep changing it
+    ROLLUP_REPAIR_ATTEMPTS = 3
+    
+    # Seconds a job lock is held without being renewed before another process may take it over
+    JOB_LOCK_SECONDS = 600
+    
     def __init__(self):
-        """Initialize database connection using environment variables"""
+        """Read connection settings from environment variables; connects lazily on first use"""
+        # Per-user data versions, bumped on every write so cached reads can be validated
+        self._data_versions = {}
+        self._data_version_counter = 0
+        self._data_version_floor = 0
+        self._data_versions_lock = threading.Lock()
+        
         # Get MongoDB connection string from environment
         connection_string = os.getenv(
             'MONGODB_URI',
@@ -33,41 +86,157 @@ class DatabaseService:
                 if db_part:
                     db_name = db_part
         
+        # Nothing connects here; the client is created on first use, the
+        # indexes are left to migrate() and the rollup backfill to migrate.py
+        self.connection_string = connection_string
+        self.db_name = db_name
+        self._client = None
+        self._collections = {}
+        self._pid = None
+        self._connect_lock = threading.Lock()
+        # Times every command the client sends; slow ones are logged and explained
+        self.monitor = QueryMonitor(
+            slow_ms=float(os.getenv('MONGODB_SLOW_QUERY_MS', 100)),
+            explain_slow=os.getenv('MONGODB_EXPLAIN_SLOW', '1') == '1'
+        )
+        os.register_at_fork(after_in_child=functools.partial(_after_fork, weakref.ref(self)))
+    
+    def migrate(self):
+        """
+        Prepare the database for serving: check the connection and create indexes
+        
+        Safe to run repeatedly and from several processes at once. Run it once
+        per deployment with migrate.py, or let create_app() run it
+        (DB_MIGRATE_ON_START). The daily rollup backfill is not part of it; see
+        backfill_daily_rollups().
+        
+        Raises:
+            ConnectionFailure: If MongoDB cannot be reached
+        """
         try:
-            # Connect to MongoDB
-            self.client = MongoClient(connection_string)
-            self.db = self.client[db_name]
-            
             # Test connection
             self.client.admin.command('ping')
-            print(f"✓ Successfully connected to MongoDB (database: {db_name})")
-            
-            # Initialize collections
-            self.health_logs = self.db.health_logs
-            self.users = self.db.users
-            
-            # Create indexes for better query performance
-            self._create_indexes()
+            print(f"✓ Successfully connected to MongoDB (database: {self.db_name})")
             
         except ConnectionFailure as e:
             print(f"✗ Failed to connect to MongoDB: {e}")
             print("Note: If using local MongoDB, ensure it's running.")
             print("For MongoDB Atlas, check your connection string and network access.")
             raise
+        
+        # Create indexes for better query performance
+        self._create_indexes()
+        
+        # The backfill is too heavy to run from every server worker, so only point at it
+        try:
+            if self._daily_rollups_missing():
+                print("⚠ Daily rollups are missing for the stored logs; run `python migrate.py` to backfill them")
+            elif self.job_checkpoints.find_one({'_id': self.ROLLUP_REPAIRS_ID, 'days.0': {'$exists': True}}):
+                print("⚠ Some daily rollups missed a write; run `python migrate.py` to repair them")
+        except Exception as e:
+            print(f"Warning: Could not check daily rollups: {e}")
+    
+    def _connect(self):
+        """Create the MongoClient and collection handles of the current process"""
+        self._client = MongoClient(self.connection_string, event_listeners=[self.monitor])
+        self.monitor.attach(self._client)
+        db = self._client[self.db_name]
+        self._collections = {
+            'health_logs': db.health_logs,
+            'users': db.users,
+            'daily_rollups': db.daily_rollups,
+            'job_checkpoints': db.job_checkpoints,
+        }
+        self._pid = os.getpid()
+    
+    def _ensure_client(self):
+        """
+        Connect on first use, and again if this process was forked from the one that connected
+        
+        MongoClient is not fork-safe: its pool and monitor threads belong to
+        the parent. A forked worker (e.g. under gunicorn) builds its own client
+        on first use instead and leaves the parent's copy alone.
+        """
+        if self._pid != os.getpid():
+            with self._connect_lock:
+                # Concurrent first requests share one client
+                if self._pid != os.getpid():
+                    self._connect()
+    
+    def _reset_locks(self):
+        """Replace the locks in a forked child, where a lock held by another thread would never be released"""
+        self._data_versions_lock = threading.Lock()
+        self._connect_lock = threading.Lock()
+    
+    @property
+    def client(self) -> MongoClient:
+        """MongoClient owned by the current process"""
+        self._ensure_client()
+        return self._client
+    
+    @property
+    def db(self):
+        """Database handle owned by the current process"""
+        return self.client[self.db_name]
+    
+    @property
+    def health_logs(self):
+        """health_logs collection"""
+        self._ensure_client()
+        return self._collections['health_logs']
+    
+    @property
+    def users(self):
+        """users collection"""
+        self._ensure_client()
+        return self._collections['users']
+    
+    @property
+    def daily_rollups(self):
+        """daily_rollups collection"""
+        self._ensure_client()
+        return self._collections['daily_rollups']
+    
+    @property
+    def job_checkpoints(self):
+        """job_checkpoints collection"""
+        self._ensure_client()
+        return self._collections['job_checkpoints']
     
     def _create_indexes(self):
         """Create database indexes for optimized queries"""
         try:
-            # Index on timestamp for date range queries
-            self.health_logs.create_index([("timestamp", -1)])
-            # Index on user_id for user-specific queries
-            self.health_logs.create_index([("user_id", 1)])
-            # Compound index for user-specific date queries
-            self.health_logs.create_index([("user_id", 1), ("timestamp", -1)])
+            # Index on timestamp for date range queries; _id breaks ties for keyset pages
+            self.health_logs.create_index([("timestamp", -1), ("_id", -1)])
+            # Compound index for user-specific date queries; also covers
+            # timestamp-only reads such as the dashboard streak, and its _id
+            # suffix gives keyset pages a total order without an in-memory sort.
+            # Its user_id prefix serves every user_id-only lookup too
+            self.health_logs.create_index([("user_id", 1), ("timestamp", -1), ("_id", -1)])
+            # Earlier versions also kept a single-field user_id index, which
+            # only slowed writes down; drop it where it still exists
+            if 'user_id_1' in self.health_logs.index_information():
+                self.health_logs.drop_index('user_id_1')
+            # Source position of imported logs, so a resumed import never stores one twice
+            self.health_logs.create_index(
+                [("import_key", 1)], unique=True, partialFilterExpression={"import_key": {"$exists": True}}
+            )
+            self._create_rollup_indexes(self.daily_rollups)
             print("✓ Database indexes created")
         except Exception as e:
             print(f"Warning: Could not create indexes: {e}")
     
+    @staticmethod
+    def _create_rollup_indexes(collection):
+        """Create the daily rollup indexes on a collection (the live one or a rebuild in progress)"""
+        # One rollup document per user and day
+        collection.create_index([("user_id", 1), ("day", 1)], unique=True)
+        # Day index for rollup reads across all users
+        collection.create_index([("day", 1)])
+        # Newest rollup write per user and overall, for conditional requests
+        collection.create_index([("user_id", 1), ("updated_at", -1)])
+        collection.create_index([("updated_at", -1)])
+    
     def insert_health_log(self, log_data: Dict, user_id: str = None) -> str:
         """
         Insert a new health log into the database
@@ -90,104 +259,810 @@ class DatabaseService:
             
             # Insert document
             result = self.health_logs.insert_one(log_data)
+            self._bump_data_versions([user_id])
             return str(result.inserted_id)
             
         except OperationFailure as e:
             print(f"Error inserting health log: {e}")
             raise
     
-    def get_recent_logs(self, days: int = 7, limit: int = 100, user_id: str = None) -> List[Dict]:
+    def insert_health_logs(self, logs: List[Dict]) -> List[Dict]:
+        """
+        Insert many health logs with a single unordered bulk write
+        
+        Args:
+            logs: List of health log documents (each may carry its own user_id)
+            
+        Returns:
+            List with one entry per input document, in order, each holding
+            either 'log_id' or 'error'; a document whose import_key is
+            already stored gets the stored log_id and 'duplicate': True
+        """
+        if not logs:
+            return []
+        
+        # Add timestamp if not present
+        for log_data in logs:
+            if 'timestamp' not in log_data:
+                log_data['timestamp'] = datetime.utcnow()
+        
+        # Unordered so one bad document does not stop the rest of the batch
+        write_errors = {}
+        duplicates = set()
+        try:
+            self.health_logs.insert_many(logs, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get('writeErrors', []):
+                if error.get('code') == 11000 and 'import_key' in logs[error['index']]:
+                    duplicates.add(error['index'])
+                else:
+                    write_errors[error['index']] = error.get('errmsg', 'Write failed')
+        except OperationFailure as e:
+            print(f"Error inserting health logs: {e}")
+            raise
+        
+        self._bump_data_versions(log_data.get('user_id') for log_data in logs)
+        
+        # Report duplicates under the _id they were first stored with
+        if duplicates:
+            stored = {
+                log['import_key']: log['_id']
+                for log in self.health_logs.find(
+                    {'import_key': {'$in': [logs[index]['import_key'] for index in duplicates]}},
+                    {'import_key': 1}
+                )
+            }
+            for index in duplicates:
+                logs[index]['_id'] = stored.get(logs[index]['import_key'], logs[index]['_id'])
+        
+        # pymongo assigns _id client-side, so every document has one after the call
+        results = []
+        for index, log_data in enumerate(logs):
+            if index in write_errors:
+                results.append({'error': write_errors[index]})
+            elif index in duplicates:
+                results.append({'log_id': str(log_data['_id']), 'duplicate': True})
+            else:
+                results.append({'log_id': str(log_data['_id'])})
+        
+        return results
+    
+    def iter_logs(self, days: Optional[int] = None, user_id: str = None,
+                  fields: Optional[List[str]] = None, limit: int = 0,
+                  batch_size: Optional[int] = None, since: Optional[datetime] = None) -> Iterator[Dict]:
+        """
+        Stream health logs, newest first, without materializing them in a list
+        
+        Documents are fetched from the server `batch_size` at a time, so folding
+        over a long window keeps memory bounded. _id is left as an ObjectId.
+        
+        Args:
+            days: Number of days to look back (all logs if omitted)
+            user_id: User ID to filter logs (if provided)
+            fields: Dotted field paths to return (whole documents if omitted)
+            limit: Maximum number of logs to yield (0 for no limit)
+            batch_size: Documents per server round trip (defaults to CURSOR_BATCH_SIZE)
+            since: Earliest timestamp to include (overrides days)
+            
+        Yields:
+            Health log documents
+        """
+        # Build query filter
+        query = {}
+        if since is None and days is not None:
+            since = datetime.utcnow() - timedelta(days=days)
+        if since is not None:
+            query["timestamp"] = {"$gte": since}
+        if user_id:
+            query["user_id"] = user_id
+        
+        cursor = self.health_logs.find(query, self._projection(fields)) \
+            .sort("timestamp", -1) \
+            .limit(limit) \
+            .batch_size(batch_size or self.CURSOR_BATCH_SIZE)
+        
+        try:
+            for log in cursor:
+                yield log
+        except Exception as e:
+            print(f"Error streaming logs: {e}")
+            raise
+        finally:
+            cursor.close()
+    
+    def get_recent_logs(self, days: int = 7, limit: int = 100, user_id: str = None,
+                        fields: Optional[List[str]] = None) -> List[Dict]:
         """
         Get recent health logs within specified days
         
         Args:
             days: Number of days to look back
-            limit: Maximum number of logs to return
+            limit: Maximum number of logs to return (0 for no limit)
             user_id: User ID to filter logs (if provided)
+            fields: Dotted field paths to return (whole documents if omitted)
             
         Returns:
             List of health log documents
         """
-        try:
-            # Calculate date threshold
-            date_threshold = datetime.utcnow() - timedelta(days=days)
-            
-            # Build query filter
-            query = {"timestamp": {"$gte": date_threshold}}
-            if user_id:
-                query["user_id"] = user_id
+        return self._serialize(self.iter_logs(days=days, user_id=user_id, fields=fields, limit=limit))
+    
+    def get_today_logs(self, user_id: str = None, fields: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Get all health logs from today
+        
+        Args:
+            user_id: User ID to filter logs (if provided)
+            fields: Dotted field paths to return (whole documents if omitted)
             
-            # Query recent logs, sorted by timestamp (newest first)
-            logs = self.health_logs.find(query).sort("timestamp", -1).limit(limit)
+        Returns:
+            List of health log documents
+        """
+        today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        return self._serialize(self.iter_logs(since=today_start, user_id=user_id, fields=fields))
+    
+    def get_all_logs(self, limit: int = 1000, user_id: str = None,
+                     fields: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Get all health logs (for comprehensive analysis)
+        
+        Args:
+            limit: Maximum number of logs to return (0 for no limit)
+            user_id: User ID to filter logs (if provided)
+            fields: Dotted field paths to return (whole documents if omitted)
             
-            # Convert ObjectId to string for JSON serialization
-            result = []
-            for log in logs:
+        Returns:
+            List of health log documents
+        """
+        return self._serialize(self.iter_logs(user_id=user_id, fields=fields, limit=limit))
+    
+    @staticmethod
+    def _serialize(logs: Iterator[Dict]) -> List[Dict]:
+        """Collect streamed logs into a list, converting ObjectId to string for JSON serialization"""
+        result = []
+        for log in logs:
+            if '_id' in log:
                 log['_id'] = str(log['_id'])
-                result.append(log)
+            result.append(log)
+        return result
+    
+    def get_log_page(self, user_id: str = None, page_size: int = 50,
+                     after: Optional[Tuple[datetime, ObjectId]] = None,
+                     fields: Optional[List[str]] = None) -> Dict:
+        """
+        Get one page of health logs, newest first, using keyset pagination
+        
+        Pages are ordered by (timestamp, _id) descending and each page starts
+        strictly after the last log of the previous one, so every page is a
+        bounded walk of the (user_id, timestamp, _id) index however deep the
+        client has scrolled.
+        
+        Args:
+            user_id: User ID to filter logs (if provided)
+            page_size: Maximum number of logs to return
+            after: (timestamp, _id) of the last log of the previous page
+            fields: Dotted field paths to return (whole documents if omitted);
+                    _id and timestamp are always returned
             
-            return result
+        Returns:
+            Dictionary with 'logs' (the page, _id left as an ObjectId) and
+            'next' ((timestamp, _id) to pass as `after`, or None on the last page)
+        """
+        query = {}
+        if user_id:
+            query["user_id"] = user_id
+        if after is not None:
+            timestamp, log_id = after
+            # The range bound keeps the index scan tight; the $or settles ties
+            query["timestamp"] = {"$lte": timestamp}
+            query["$or"] = [{"timestamp": {"$lt": timestamp}}, {"_id": {"$lt": log_id}}]
+        
+        if fields:
+            fields = list(dict.fromkeys(['_id', 'timestamp'] + list(fields)))
+        
+        try:
+            # One extra document tells whether another page follows
+            logs = list(
+                self.health_logs.find(query, self._projection(fields))
+                .sort([("timestamp", -1), ("_id", -1)])
+                .limit(page_size + 1)
+            )
+        except Exception as e:
+            print(f"Error fetching log page: {e}")
+            raise
+        
+        has_more = len(logs) > page_size
+        logs = logs[:page_size]
+        return {
+            'logs': logs,
+            'next': (logs[-1]['timestamp'], logs[-1]['_id']) if has_more else None
+        }
+    
+    def get_rollup_validators(self, user_id: str = None) -> Dict:
+        """
+        Get the change markers of one user's daily rollups for conditional requests
+        
+        Every rollup write stamps its document with the server time and bumps
+        its revision in the same upsert, so the markers move exactly when the
+        data the read endpoints render from does. Answered from the
+        (user_id, updated_at) index.
+        
+        Args:
+            user_id: User ID to filter rollups (if provided, otherwise all users)
             
+        Returns:
+            Dictionary with 'updated_at' (time of the newest rollup write, or
+            None when there are no rollups) and 'revision' (write count of
+            that rollup, so two writes in one millisecond still differ)
+        """
+        try:
+            query = {"user_id": user_id} if user_id else {}
+            latest = self.daily_rollups.find_one(
+                query, {"updated_at": 1, "revision": 1, "_id": 0}, sort=[("updated_at", -1)]
+            )
+            return {
+                'updated_at': latest.get('updated_at') if latest else None,
+                'revision': latest.get('revision') if latest else None
+            }
         except Exception as e:
-            print(f"Error fetching recent logs: {e}")
+            print(f"Error fetching rollup validators: {e}")
             raise
     
-    def get_today_logs(self, user_id: str = None) -> List[Dict]:
-        """Get all health logs from today"""
+    def iter_stale_logs(self, version: int, after_id=None,
+                        batch_size: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Stream logs analyzed by an older analyzer version, in _id order
+        
+        Args:
+            version: Current analyzer version
+            after_id: Only yield logs with a greater _id (to resume a previous run)
+            batch_size: Documents per server round trip (defaults to CURSOR_BATCH_SIZE)
+            
+        Yields:
+            Documents holding _id, prompt, analysis_version and the ROLLUP_FIELDS
+            of the analysis being replaced
+        """
+        query = {"analysis_version": {"$ne": version}}
+        if after_id is not None:
+            query["_id"] = {"$gt": after_id}
+        
+        fields = ['_id', 'prompt', 'analysis_version'] + self.ROLLUP_FIELDS
+        cursor = self.health_logs.find(query, self._projection(fields)) \
+            .sort("_id", 1) \
+            .batch_size(batch_size or self.CURSOR_BATCH_SIZE)
+        
         try:
-            today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+            for log in cursor:
+                yield log
+        except Exception as e:
+            print(f"Error streaming stale logs: {e}")
+            raise
+        finally:
+            cursor.close()
+    
+    def update_log_analyses(self, updates: List[Dict], version: int) -> int:
+        """
+        Write re-computed analyses back with one unordered bulk write
+        
+        Args:
+            updates: List of {_id, analysis, summary} dictionaries
+            version: Analyzer version that produced the analyses
             
-            # Build query filter
-            query = {"timestamp": {"$gte": today_start}}
-            if user_id:
-                query["user_id"] = user_id
+        Returns:
+            int: Number of modified documents
+        """
+        if not updates:
+            return 0
+        
+        reanalyzed_at = datetime.utcnow().isoformat()
+        try:
+            result = self.health_logs.bulk_write([
+                UpdateOne({'_id': update['_id']}, {'$set': {
+                    'analysis': update['analysis'],
+                    'summary': update['summary'],
+                    'analysis_version': version,
+                    'reanalyzed_at': reanalyzed_at
+                }})
+                for update in updates
+            ], ordered=False)
+            # Re-analyzed logs may belong to any user
+            self._bump_data_versions()
+            return result.modified_count
+        except (BulkWriteError, OperationFailure) as e:
+            print(f"Error updating log analyses: {e}")
+            raise
+    
+    def adjust_daily_rollups(self, previous: List[Dict], version: int, adjustment_id: str) -> int:
+        """
+        Move daily rollups from the old analyses of re-analyzed logs to their stored ones
+        
+        Each (user_id, day) gets one $inc of the new counts minus the old. It
+        commutes with the $inc of logs written meanwhile, so rollups stay
+        readable and exact while a re-analysis runs. The same update records
+        adjustment_id on the rollup and is skipped where it is already there,
+        so applying one adjustment again changes nothing.
+        
+        Args:
+            previous: Logs as they were before re-analysis (_id and ROLLUP_FIELDS)
+            version: Analyzer version the re-analyzed logs were written with;
+                     logs not stored at it yet are left out
+            adjustment_id: Unique id of this set of changes, kept until it is applied
             
-            logs = self.health_logs.find(query).sort("timestamp", -1)
+        Returns:
+            int: Number of logs whose change was applied
+        """
+        if not previous:
+            return 0
+        
+        current = {
+            log['_id']: log
+            for log in self._reanalyzed_logs([log['_id'] for log in previous], version)
+        }
+        changes = [(log, current[log['_id']]) for log in previous if log['_id'] in current]
+        if not changes:
+            return 0
+        
+        updates = self._rollup_deltas(changes)
+        marker = {'$each': [adjustment_id], '$slice': -self.ROLLUP_ADJUSTMENT_MARKERS}
+        try:
+            if updates:
+                self.daily_rollups.bulk_write([
+                    UpdateOne(
+                        {'user_id': user_id, 'day': day, 'adjustments': {'$ne': adjustment_id}},
+                        dict(update, **{'$push': {'adjustments': marker}})
+                    )
+                    for (user_id, day), update in updates.items()
+                ], ordered=False)
+            # Each of these only applies while the rollup still holds the log's old mood, so it is idempotent too
+            for old, new in changes:
+                self._adjust_latest_mood(old, new)
+        except (BulkWriteError, OperationFailure) as e:
+            print(f"Error adjusting daily rollups: {e}")
+            raise
+        finally:
+            self._bump_data_versions(new.get('user_id') for _, new in changes)
+        return len(changes)
+    
+    def _adjust_latest_mood(self, old: Dict, new: Dict):
+        """
+        Fix the latest mood of a re-analyzed log's day if it was or now is that log's mood
+        
+        The rollup is only changed while it still holds the old mood of this
+        log, so a newer mood written meanwhile is never overwritten.
+        """
+        at = new.get('timestamp')
+        if not isinstance(at, datetime):
+            return
+        old_mood, new_mood = old.get('analysis', {}).get('mood', {}), new.get('analysis', {}).get('mood', {})
+        old_primary = old_mood.get('primary', 'Neutral') if old_mood.get('detected') else None
+        new_primary = new_mood.get('primary', 'Neutral') if new_mood.get('detected') else None
+        if old_primary == new_primary:
+            return
+        
+        day_start = datetime(at.year, at.month, at.day)
+        key = {'user_id': new.get('user_id'), 'day': day_start.date().isoformat()}
+        stamp = {'$inc': {'revision': 1}, '$currentDate': {'updated_at': True}}
+        
+        if old_primary is None:
+            self.daily_rollups.update_one(key, {'$max': {'latest_mood': {'at': at, 'primary': new_primary}}, **stamp})
+            return
+        
+        if new_primary is not None:
+            latest = {'at': at, 'primary': new_primary}
+        else:
+            # The log no longer has a mood; fall back to the newest other mood of the day
+            previous = self._latest_mood_log(new.get('user_id'), day_start)
+            latest = {'at': previous['timestamp'], 'primary': previous['analysis']['mood'].get('primary', 'Neutral')} \
+                if previous else None
+        self.daily_rollups.update_one(
+            dict(key, **{'latest_mood.at': at, 'latest_mood.primary': old_primary}),
+            {'$set': {'latest_mood': latest}, **stamp}
+        )
+    
+    def _reanalyzed_logs(self, ids: List[ObjectId], version: int):
+        """Cursor over the logs among `ids` stored at analyzer `version` (_id and ROLLUP_FIELDS)"""
+        return self.health_logs.find(
+            {'_id': {'$in': ids}, 'analysis_version': version},
+            self._projection(['_id'] + self.ROLLUP_FIELDS)
+        )
+    
+    def _latest_mood_log(self, user_id: Optional[str], day_start: datetime) -> Optional[Dict]:
+        """Newest log with a mood on the day starting at `day_start`, or None"""
+        return self.health_logs.find_one(
+            {'user_id': user_id, 'analysis.mood.detected': True,
+             'timestamp': {'$gte': day_start, '$lt': day_start + timedelta(days=1)}},
+            {'timestamp': 1, 'analysis.mood.primary': 1}, sort=[('timestamp', -1)]
+        )
+    
+    def _day_logs(self, user_id: Optional[str], day_start: datetime):
+        """Cursor over a user's logs on the day starting at `day_start` (ROLLUP_FIELDS)"""
+        return self.health_logs.find(
+            {'user_id': user_id, 'timestamp': {'$gte': day_start, '$lt': day_start + timedelta(days=1)}},
+            self._projection(self.ROLLUP_FIELDS)
+        )
+    
+    def data_version(self, user_id: str = None) -> int:
+        """
+        Get the current data version of one user's logs
+        
+        The version changes whenever logs or rollups visible to that user's
+        views are written, so a result computed at one version stays valid
+        until the version moves on.
+        
+        Args:
+            user_id: User ID (None for the all-users views)
             
-            result = []
-            for log in logs:
-                log['_id'] = str(log['_id'])
-                result.append(log)
+        Returns:
+            int: Version number, increasing over time
+        """
+        with self._data_versions_lock:
+            return max(self._data_versions.get(user_id, 0), self._data_version_floor)
+    
+    def _bump_data_versions(self, user_ids: Optional[Iterable[str]] = None):
+        """
+        Move the data version of the given users on
+        
+        Args:
+            user_ids: Users whose logs changed (every user if omitted); the
+                      all-users views always move with them
+        """
+        with self._data_versions_lock:
+            self._data_version_counter += 1
+            if user_ids is None:
+                self._data_version_floor = self._data_version_counter
+                return
+            for user_id in set(user_ids) | {None}:
+                self._data_versions[user_id] = self._data_version_counter
+    
+    def get_checkpoint(self, job: str) -> Optional[Dict]:
+        """Get the saved progress of a background job, if any"""
+        return self.job_checkpoints.find_one({'_id': job})
+    
+    def save_checkpoint(self, job: str, state: Dict):
+        """Save the progress of a background job so it can resume after a restart"""
+        state = {key: value for key, value in state.items() if key != '_id'}
+        state['updated_at'] = datetime.utcnow()
+        self.job_checkpoints.replace_one({'_id': job}, state, upsert=True)
+    
+    @contextmanager
+    def job_lock(self, job: str) -> Iterator[Optional[str]]:
+        """
+        Hold a lock document in job_checkpoints while a job runs, so processes never run it concurrently
+        
+        The lock is taken with one atomic upsert and expires JOB_LOCK_SECONDS
+        after it was last renewed, so a crashed holder does not block the job forever.
+        
+        Yields:
+            Token to pass to renew_job_lock(), or None if another process holds the lock
+        """
+        lock_id = f"lock:{job}"
+        token = str(ObjectId())
+        now = datetime.utcnow()
+        try:
+            # Matches a free or expired lock; a held one makes the upsert collide on _id
+            self.job_checkpoints.find_one_and_update(
+                {'_id': lock_id, '$or': [{'locked_until': {'$lt': now}}, {'locked_until': {'$exists': False}}]},
+                {'$set': {'token': token, 'locked_until': now + timedelta(seconds=self.JOB_LOCK_SECONDS)}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            token = None
+        
+        try:
+            yield token
+        finally:
+            if token is not None:
+                self.job_checkpoints.delete_one({'_id': lock_id, 'token': token})
+    
+    def renew_job_lock(self, job: str, token: str):
+        """Push the expiry of a held job lock JOB_LOCK_SECONDS into the future"""
+        self.job_checkpoints.update_one(
+            {'_id': f"lock:{job}", 'token': token},
+            {'$set': {'locked_until': datetime.utcnow() + timedelta(seconds=self.JOB_LOCK_SECONDS)}}
+        )
+    
+    def _daily_rollups_missing(self) -> bool:
+        """Whether logs exist but no daily rollup has been written yet"""
+        return self.daily_rollups.estimated_document_count() == 0 and \
+            self.health_logs.estimated_document_count() > 0
+    
+    def backfill_daily_rollups(self) -> bool:
+        """
+        Build daily rollups for logs stored before they existed, if none have been written yet
+        
+        Run from migrate.py before new servers take traffic, not from the
+        servers themselves: every gunicorn worker would otherwise start the
+        same rebuild.
+        
+        Returns:
+            bool: Whether a rebuild ran
+        """
+        if not self._daily_rollups_missing():
+            return False
+        return self.rebuild_daily_rollups(only_if_missing=True) is not None
+    
+    def update_daily_rollups(self, logs: List[Dict], collection=None):
+        """
+        Add health logs to their per-user daily rollups with atomic $inc upserts
+        
+        Args:
+            logs: Stored health log documents (timestamp, user_id and analysis are read)
+            collection: Rollup collection to write (defaults to daily_rollups)
+        """
+        updates = self._rollup_updates(logs)
+        if not updates:
+            return
+        
+        try:
+            (collection if collection is not None else self.daily_rollups).bulk_write([
+                UpdateOne({'user_id': user_id, 'day': day}, update, upsert=True)
+                for (user_id, day), update in updates.items()
+            ], ordered=False)
+        except (BulkWriteError, OperationFailure) as e:
+            print(f"Error updating daily rollups: {e}")
+            raise
+        finally:
+            # Bump after the write so a read cached mid-update is never taken as current
+            self._bump_data_versions(user_id for user_id, _ in updates)
+    
+    def queue_rollup_repair(self, logs: List[Dict]):
+        """
+        Record the days of logs whose rollup write failed, for repair_daily_rollups()
+        
+        Args:
+            logs: Stored health log documents (timestamp and user_id are read)
+        """
+        days = [{'user_id': user_id, 'day': day} for user_id, day in self._rollup_buckets(logs)]
+        if days:
+            self.job_checkpoints.update_one(
+                {'_id': self.ROLLUP_REPAIRS_ID},
+                {'$addToSet': {'days': {'$each': days}}},
+                upsert=True
+            )
+    
+    def repair_daily_rollups(self) -> int:
+        """
+        Recompute the daily rollups queued by queue_rollup_repair() from their logs
+        
+        A failed write may have been applied in part, so each queued day is
+        recounted instead of retried. The recount replaces the rollup only if
+        its revision has not moved since it was read, so a live $inc landing
+        in between is never lost; the day is recounted again instead.
+        
+        Returns:
+            int: Number of days repaired
+        """
+        queued = self.job_checkpoints.find_one({'_id': self.ROLLUP_REPAIRS_ID}) or {}
+        repaired = 0
+        for entry in queued.get('days', []):
+            if not self._recount_daily_rollup(entry['user_id'], entry['day']):
+                print(f"⚠ Daily rollup of {entry['day']} for user {entry['user_id']} kept changing; left queued")
+                continue
+            self.job_checkpoints.update_one({'_id': self.ROLLUP_REPAIRS_ID}, {'$pull': {'days': entry}})
+            self._bump_data_versions([entry['user_id']])
+            repaired += 1
+        
+        if repaired:
+            print(f"✓ Repaired {repaired} daily rollups")
+        return repaired
+    
+    def _recount_daily_rollup(self, user_id: Optional[str], day: str) -> bool:
+        """Replace one daily rollup with a count of its logs, unless live writes keep changing it; returns success"""
+        key = {'user_id': user_id, 'day': day}
+        day_start = datetime.fromisoformat(day)
+        for _ in range(self.ROLLUP_REPAIR_ATTEMPTS):
+            current = self.daily_rollups.find_one(key, {'revision': 1})
+            logs = self._day_logs(user_id, day_start)
+            bucket = self._rollup_buckets(logs).get((user_id, day)) or HealthAggregator._empty_bucket(day)
             
-            return result
+            document = {field: bucket[field] for field in HealthAggregator.COUNTERS}
+            for field in HealthAggregator.MAPS:
+                document[field] = {}
+                for name, count in bucket[field].items():
+                    rollup_key = self._rollup_key(name)
+                    document[field][rollup_key] = document[field].get(rollup_key, 0) + count
+            document['latest_mood'] = bucket['latest_mood']
             
-        except Exception as e:
-            print(f"Error fetching today's logs: {e}")
-            raise
+            # A missing rollup is inserted; one created meanwhile collides on the unique (user_id, day) index
+            revision = current.get('revision') if current else None
+            query = dict(key, revision=revision if revision is not None else {'$exists': False})
+            try:
+                result = self.daily_rollups.update_one(
+                    query,
+                    {'$set': document, '$inc': {'revision': 1}, '$currentDate': {'updated_at': True}},
+                    upsert=True
+                )
+            except DuplicateKeyError:
+                continue
+            if result.matched_count or result.upserted_id is not None:
+                return True
+        return False
     
-    def get_all_logs(self, limit: int = 1000, user_id: str = None) -> List[Dict]:
+    def rebuild_daily_rollups(self, batch_size: int = 1000, only_if_missing: bool = False) -> Optional[int]:
         """
-        Get all health logs (for comprehensive analysis)
+        Recompute every daily rollup from the stored health logs
+        
+        Rollups are built into a separate collection that then replaces
+        daily_rollups in one rename, so readers never see them empty or half
+        built. Logs stored after the rebuild started may have reached the old
+        collection, the new one or both, so the days they fall on are recounted
+        from their logs after the rename. Only one process rebuilds at a time;
+        others skip the rebuild instead of interleaving their writes with it.
         
         Args:
-            limit: Maximum number of logs to return
-            user_id: User ID to filter logs (if provided)
+            batch_size: Number of logs folded into each bulk write
+            only_if_missing: Skip the rebuild if another process has written
+                             rollups by the time the lock is taken
             
         Returns:
-            List of health log documents
+            int: Number of logs rolled up, or None if the rebuild was skipped
+        """
+        with self.job_lock('daily_rollups') as token:
+            if token is None:
+                print("⚠ Daily rollups are being rebuilt by another process; skipped")
+                return None
+            if only_if_missing and not self._daily_rollups_missing():
+                return None
+            
+            shadow = self.db[self.ROLLUP_REBUILD_COLLECTION]
+            shadow.drop()
+            self._create_rollup_indexes(shadow)
+            
+            # Logs from here on also reach the live rollups; their days are recounted after the rename
+            started = ObjectId()
+            total = self._fold_logs({'_id': {'$lt': started}}, shadow, batch_size,
+                                    lambda: self.renew_job_lock('daily_rollups', token))
+            shadow.rename(self.daily_rollups.name, dropTarget=True)
+            
+            late_logs = list(self.health_logs.find({'_id': {'$gte': started}}, {'user_id': 1, 'timestamp': 1}))
+            for count, (user_id, day) in enumerate(self._rollup_buckets(late_logs), 1):
+                if not self._recount_daily_rollup(user_id, day):
+                    self.queue_rollup_repair([log for log in late_logs if log.get('user_id') == user_id])
+                if count % batch_size == 0:
+                    self.renew_job_lock('daily_rollups', token)
+            total += len(late_logs)
+        
+        self._bump_data_versions()
+        print(f"✓ Daily rollups rebuilt from {total} logs")
+        return total
+    
+    def _fold_logs(self, query: Dict, collection, batch_size: int, on_batch=None) -> int:
+        """Stream the logs matching a query into a rollup collection in bulk writes; returns the number of logs"""
+        cursor = self.health_logs.find(query, self._projection(self.ROLLUP_FIELDS)).batch_size(batch_size)
+        total = 0
+        batch = []
+        try:
+            for log in cursor:
+                batch.append(log)
+                if len(batch) >= batch_size:
+                    self.update_daily_rollups(batch, collection=collection)
+                    total += len(batch)
+                    batch = []
+                    if on_batch:
+                        on_batch()
+            
+            if batch:
+                self.update_daily_rollups(batch, collection=collection)
+                total += len(batch)
+        finally:
+            cursor.close()
+        return total
+    
+    def load_rollups(self, days: int = 7, user_id: str = None,
+                     granularity: str = 'day') -> HealthAggregator:
+        """
+        Load daily rollups within specified days into an aggregator
+        
+        Rollups cover whole UTC days, so the window starts at midnight of the
+        first day instead of exactly `days` days ago. With a coarser
+        granularity each rollup is merged into its week or month bucket as the
+        cursor streams, so long windows never hold one bucket per day.
+        
+        Args:
+            days: Number of days to look back (0 for today only)
+            user_id: User ID to filter rollups (if provided, otherwise all users are merged)
+            granularity: Bucket size, one of HealthAggregator.GRANULARITIES
+            
+        Returns:
+            HealthAggregator holding one bucket per period with logs
         """
         try:
             # Build query filter
-            query = {}
+            query = {"day": {"$gte": HealthAggregator.window_start(days)}}
             if user_id:
                 query["user_id"] = user_id
             
-            logs = self.health_logs.find(query).sort("timestamp", -1).limit(limit)
-            
-            result = []
-            for log in logs:
-                log['_id'] = str(log['_id'])
-                result.append(log)
-            
-            return result
+            return HealthAggregator(granularity).add_rollups(
+                self.daily_rollups.find(query, {"_id": 0, "user_id": 0, "adjustments": 0})
+            )
             
         except Exception as e:
-            print(f"Error fetching all logs: {e}")
+            print(f"Error fetching daily rollups: {e}")
             raise
     
+    @classmethod
+    def _rollup_updates(cls, logs: List[Dict]) -> Dict:
+        """Build one merged $inc/$max update per (user_id, day) for a set of logs, stamping its revision and time"""
+        updates = {}
+        for key, bucket in cls._rollup_buckets(logs).items():
+            inc = cls._rollup_increments(bucket)
+            inc['revision'] = 1
+            
+            # Server time, so validators read by every worker come from one clock
+            update = {'$inc': inc, '$currentDate': {'updated_at': True}}
+            if bucket['latest_mood']:
+                # Documents compare field by field, so $max keeps the latest mood of the day
+                update['$max'] = {'latest_mood': bucket['latest_mood']}
+            
+            updates[key] = update
+        
+        return updates
+    
+    @classmethod
+    def _rollup_deltas(cls, changes: List[Tuple[Dict, Dict]]) -> Dict:
+        """Build one $inc update per (user_id, day) moving rollups from the old to the new version of logs, stamping its revision and time"""
+        old_buckets = cls._rollup_buckets(old for old, _ in changes)
+        new_buckets = cls._rollup_buckets(new for _, new in changes)
+        
+        updates = {}
+        for key in old_buckets.keys() | new_buckets.keys():
+            inc = cls._rollup_increments(new_buckets[key]) if key in new_buckets else {}
+            if key in old_buckets:
+                for path, count in cls._rollup_increments(old_buckets[key]).items():
+                    inc[path] = inc.get(path, 0) - count
+            inc = {path: count for path, count in inc.items() if count}
+            # Stamped even when the counts hold, since the day's logs and summaries changed
+            inc['revision'] = 1
+            updates[key] = {'$inc': inc, '$currentDate': {'updated_at': True}}
+        
+        return updates
+    
+    @staticmethod
+    def _rollup_buckets(logs: Iterable[Dict]) -> Dict[Tuple, Dict]:
+        """Fold logs into day buckets keyed by (user_id, day)"""
+        aggregators = {}
+        for log in logs:
+            aggregators.setdefault(log.get('user_id'), HealthAggregator()).add_log(log)
+        
+        return {
+            (user_id, bucket['day']): bucket
+            for user_id, aggregator in aggregators.items()
+            for bucket in aggregator.buckets()
+        }
+    
+    @classmethod
+    def _rollup_increments(cls, bucket: Dict) -> Dict:
+        """Flatten a day bucket's counters into rollup document paths"""
+        inc = {field: bucket[field] for field in HealthAggregator.COUNTERS}
+        for field in HealthAggregator.MAPS:
+            for name, count in bucket[field].items():
+                path = f"{field}.{cls._rollup_key(name)}"
+                inc[path] = inc.get(path, 0) + count
+        return inc
+    
+    @staticmethod
+    def _rollup_key(name) -> str:
+        """Make a symptom, mood or medication name safe to use as a document key"""
+        return str(name).replace('.', ' ').replace('$', '')
+    
+    @staticmethod
+    def _projection(fields: Optional[List[str]]) -> Optional[Dict]:
+        """
+        Build a find() projection for the requested fields
+        
+        _id is only returned when asked for, so queries that read indexed
+        fields alone (e.g. user_id and timestamp) are covered by the index.
+        """
+        if not fields:
+            return None
+        
+        projection = {field: 1 for field in fields}
+        if '_id' not in projection:
+            projection['_id'] = 0
+        return projection
+    
     def close(self):
         """Close database connection"""
-        if self.client:
-            self.client.close()
+        if self._client and self._pid == os.getpid():
+            self._client.close()
             print("Database connection closed")
 
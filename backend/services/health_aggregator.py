@@ -0,0 +1,252 @@
+"""
+Health Aggregator
+Folds health logs or daily rollups once into per-day (or per-week/month) counters shared by every read panel
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+
+class HealthAggregator:
+    """Single-pass accumulator of symptom, mood, medication and lifestyle counters, bucketed by UTC day, week or month"""
+
+    # Bucket sizes; weeks start on Monday and months on the 1st
+    GRANULARITIES = ['day', 'week', 'month']
+
+    # Numeric counters kept on every day bucket
+    COUNTERS = [
+        'log_count',
+        'symptoms_count',
+        'medications_count',
+        'sleep_hours_total',
+        'sleep_mentions',
+        'exercise_mentions',
+        'stress_mentions',
+    ]
+
+    # Per-name counter maps kept on every day bucket
+    MAPS = ['symptoms', 'moods', 'medications']
+
+    def __init__(self, granularity: str = 'day'):
+        """
+        Create an empty accumulator
+
+        Args:
+            granularity: Bucket size, one of GRANULARITIES (default: 'day');
+                         each bucket is keyed by the first day of its period
+        """
+        if granularity not in self.GRANULARITIES:
+            raise ValueError(f"Granularity must be one of {', '.join(self.GRANULARITIES)}")
+        self.granularity = granularity
+        self.days = {}
+
+    @staticmethod
+    def window_start(days: int) -> str:
+        """First UTC day (YYYY-MM-DD) of a window reaching `days` days back"""
+        return (datetime.utcnow() - timedelta(days=days)).date().isoformat()
+
+    def period(self, day: str) -> str:
+        """First day (YYYY-MM-DD) of the bucket a day falls into"""
+        if self.granularity == 'day':
+            return day
+        start = date.fromisoformat(day)
+        if self.granularity == 'week':
+            start -= timedelta(days=start.weekday())
+        else:
+            start = start.replace(day=1)
+        return start.isoformat()
+
+    def periods(self, since: str, until: str) -> List[str]:
+        """Every bucket key from the period holding `since` to the one holding `until`, oldest first"""
+        current = date.fromisoformat(self.period(since))
+        end = date.fromisoformat(until)
+        keys = []
+        while current <= end:
+            keys.append(current.isoformat())
+            if self.granularity == 'month':
+                current = (current.replace(day=28) + timedelta(days=4)).replace(day=1)
+            else:
+                current += timedelta(days=7 if self.granularity == 'week' else 1)
+        return keys
+
+    def add_log(self, log: Dict):
+        """
+        Fold one stored health log into its day bucket
+
+        Args:
+            log: Health log document (timestamp and analysis are read)
+        """
+        timestamp = log.get('timestamp')
+        if isinstance(timestamp, str):
+            timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+        if not isinstance(timestamp, datetime):
+            return
+
+        bucket = self._bucket(self.period(timestamp.date().isoformat()))
+
+        analysis = log.get('analysis', {})
+        symptoms = analysis.get('symptoms', [])
+        medications = analysis.get('medications', [])
+        mood = analysis.get('mood', {})
+        lifestyle = analysis.get('lifestyle', {})
+
+        bucket['log_count'] += 1
+        bucket['symptoms_count'] += len(symptoms)
+        bucket['medications_count'] += len(medications)
+
+        for symptom in symptoms:
+            bucket['symptoms'][symptom] = bucket['symptoms'].get(symptom, 0) + 1
+
+        for med in medications:
+            name = med.get('name')
+            bucket['medications'][name] = bucket['medications'].get(name, 0) + 1
+
+        if mood.get('detected'):
+            primary = mood.get('primary', 'Neutral')
+            bucket['moods'][primary] = bucket['moods'].get(primary, 0) + 1
+            self._keep_latest_mood(bucket, {'at': timestamp, 'primary': primary})
+
+        if 'hours' in lifestyle.get('sleep', {}):
+            bucket['sleep_hours_total'] += lifestyle['sleep']['hours']
+            bucket['sleep_mentions'] += 1
+
+        if 'exercise' in lifestyle:
+            bucket['exercise_mentions'] += 1
+
+        if 'stress' in lifestyle:
+            bucket['stress_mentions'] += 1
+
+    def add_logs(self, logs: Iterable[Dict]) -> 'HealthAggregator':
+        """Fold a stream of health logs; returns self for chaining"""
+        for log in logs:
+            self.add_log(log)
+        return self
+
+    def add_rollup(self, rollup: Dict):
+        """
+        Fold one stored daily rollup (or another day bucket) into its day bucket
+
+        Args:
+            rollup: Daily rollup document with a 'day' key
+        """
+        self._merge(self._bucket(self.period(rollup['day'])), rollup)
+
+    def add_rollups(self, rollups: Iterable[Dict]) -> 'HealthAggregator':
+        """Fold a stream of daily rollups; returns self for chaining"""
+        for rollup in rollups:
+            self.add_rollup(rollup)
+        return self
+
+    def buckets(self, since: Optional[str] = None, until: Optional[str] = None) -> List[Dict]:
+        """
+        Get day buckets, oldest first
+
+        Args:
+            since: First day (YYYY-MM-DD) to include (all days if omitted); the
+                   whole bucket holding it is included
+            until: Last day (YYYY-MM-DD) to include (all days if omitted); the
+                   whole bucket holding it is included
+        """
+        if since is not None:
+            since = self.period(since)
+        if until is not None:
+            until = self.period(until)
+        return [
+            self.days[day]
+            for day in sorted(self.days)
+            if (since is None or day >= since) and (until is None or day <= until)
+        ]
+
+    def stats(self, since: Optional[str] = None, until: Optional[str] = None) -> Dict:
+        """
+        Combine day buckets into the counters the read panels render from
+
+        Args:
+            since: First day (YYYY-MM-DD) to include (all days if omitted)
+            until: Last day (YYYY-MM-DD) to include (all days if omitted)
+
+        Returns:
+            Dictionary containing:
+            - total_logs: Number of logs in the window
+            - symptoms / moods / medications: Lists of {name, count}, most common first
+            - sleep: {hours_total, mentions} for logs that recorded sleep hours
+            - exercise_mentions / stress_mentions: Number of logs mentioning each
+            - daily: Per-bucket {date, symptoms_count, unique_symptoms, mood, medications_count},
+              oldest first (date is the first day of the bucket)
+        """
+        buckets = self.buckets(since, until)
+
+        totals = self._empty_bucket(None)
+        for bucket in buckets:
+            self._merge(totals, bucket)
+
+        return {
+            'total_logs': totals['log_count'],
+            'symptoms': self._ranked(totals['symptoms']),
+            'moods': self._ranked(totals['moods']),
+            'medications': self._ranked(totals['medications']),
+            'sleep': {
+                'hours_total': totals['sleep_hours_total'],
+                'mentions': totals['sleep_mentions'],
+            },
+            'exercise_mentions': totals['exercise_mentions'],
+            'stress_mentions': totals['stress_mentions'],
+            'daily': [
+                {
+                    'date': bucket['day'],
+                    'symptoms_count': bucket['symptoms_count'],
+                    'unique_symptoms': len(bucket['symptoms']),
+                    'mood': (bucket.get('latest_mood') or {}).get('primary'),
+                    'medications_count': bucket['medications_count'],
+                }
+                for bucket in buckets
+            ],
+        }
+
+    def _bucket(self, day: str) -> Dict:
+        """Get or create the bucket for a day"""
+        bucket = self.days.get(day)
+        if bucket is None:
+            bucket = self.days[day] = self._empty_bucket(day)
+        return bucket
+
+    @classmethod
+    def _empty_bucket(cls, day: Optional[str]) -> Dict:
+        """A bucket with every counter at zero"""
+        bucket = {'day': day}
+        for field in cls.COUNTERS:
+            bucket[field] = 0
+        for field in cls.MAPS:
+            bucket[field] = {}
+        bucket['latest_mood'] = None
+        return bucket
+
+    @classmethod
+    def _merge(cls, target: Dict, source: Dict):
+        """Add the counters of one bucket into another, in place"""
+        for field in cls.COUNTERS:
+            target[field] += source.get(field, 0)
+
+        for field in cls.MAPS:
+            counts = target[field]
+            for name, count in source.get(field, {}).items():
+                # Re-analysis can leave a name at zero in a stored rollup
+                if count:
+                    counts[name] = counts.get(name, 0) + count
+
+        if source.get('latest_mood'):
+            cls._keep_latest_mood(target, source['latest_mood'])
+
+    @staticmethod
+    def _keep_latest_mood(bucket: Dict, mood: Dict):
+        """Keep whichever of the bucket's and the given {at, primary} mood is newer"""
+        if not bucket['latest_mood'] or mood['at'] > bucket['latest_mood']['at']:
+            bucket['latest_mood'] = mood
+
+    @staticmethod
+    def _ranked(counts: Dict[str, int]) -> List[Dict]:
+        """Convert a {name: count} map into {name, count} entries, most common first"""
+        return [
+            {'name': name, 'count': count}
+            for name, count in sorted(counts.items(), key=lambda item: (-item[1], str(item[0])))
+        ]
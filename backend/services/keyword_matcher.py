@@ -0,0 +1,105 @@
+"""
+Keyword Matcher
+Compiles keyword tables into a token trie for single-pass, word-boundary matching
+"""
+
+import functools
+import re
+from typing import Dict, List, Set, Tuple
+
+
+@functools.lru_cache(maxsize=8192)
+def normalize_token(token: str) -> str:
+    """
+    Reduce a lower-cased token to a crude stem, so inflected forms match their keyword
+
+    Strips plural and verb endings (s, es, ies, ed, ied, ing) and a final e:
+    'headaches' and 'headache', 'coughs' and 'cough', 'aching' and 'ache' each
+    share a stem. Only consistency matters, since keywords and text tokens go
+    through the same function; stems need not be words.
+    """
+    if len(token) <= 3:
+        return token
+
+    if token.endswith(('ies', 'ied')) and len(token) > 4:
+        return token[:-3] + 'y'
+
+    stem = token
+    for suffix in ('ing', 'ed'):
+        if stem.endswith(suffix) and len(stem) - len(suffix) >= 3:
+            stem = stem[:-len(suffix)]
+            # running -> run, skipped -> skip; stressed and chilled keep their pair
+            if stem[-1] == stem[-2] and stem[-1] not in 'aeioulsfz':
+                stem = stem[:-1]
+            break
+    else:
+        if stem.endswith('s') and not stem.endswith(('ss', 'us', 'is')) and len(stem) > 3:
+            stem = stem[:-1]
+
+    if stem.endswith('e') and len(stem) > 3:
+        stem = stem[:-1]
+    return stem
+
+
+class KeywordMatcher:
+    """Multi-pattern matcher that finds every keyword category in one pass over the text"""
+
+    # Tokens are runs of letters/digits, so keywords only match on word boundaries;
+    # both keywords and text are tokenized with it and passed through normalize_token
+    TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+    # Key used inside trie nodes to hold the hits that end at that node
+    _HITS = '__hits__'
+
+    def __init__(self, tables: Dict[str, Dict[str, List[str]]]):
+        """
+        Compile keyword tables into a token trie
+
+        Args:
+            tables: Mapping of table name (e.g. 'symptoms') to a
+                    {category: [keyword, ...]} dictionary
+        """
+        self.tables = tables
+        self._root = {}
+
+        for table_name, categories in tables.items():
+            for category, keywords in categories.items():
+                for keyword in keywords:
+                    self._add(keyword, (table_name, category, keyword))
+
+    def _add(self, keyword: str, hit: Tuple[str, str, str]):
+        """Insert a (possibly multi-word) keyword into the trie"""
+        node = self._root
+        for token in self.TOKEN_PATTERN.findall(keyword.lower()):
+            node = node.setdefault(normalize_token(token), {})
+        node.setdefault(self._HITS, []).append(hit)
+
+    def scan(self, text: str) -> Dict[str, Dict[str, Set[str]]]:
+        """
+        Find all keyword matches in the text
+
+        Args:
+            text: Lower-cased text to scan
+
+        Returns:
+            Dictionary of table name -> category -> set of matched keywords
+        """
+        found = {table_name: {} for table_name in self.tables}
+        tokens = [normalize_token(token) for token in self.TOKEN_PATTERN.findall(text)]
+        root = self._root
+        hits_key = self._HITS
+
+        for start in range(len(tokens)):
+            node = root.get(tokens[start])
+            position = start + 1
+
+            # Walk the trie as far as the following tokens allow
+            while node is not None:
+                for table_name, category, keyword in node.get(hits_key, ()):
+                    found[table_name].setdefault(category, set()).add(keyword)
+                if position >= len(tokens):
+                    break
+                node = node.get(tokens[position])
+                position += 1
+
+        return found
@@ -0,0 +1,186 @@
+"""
+Log Exporter
+Streams a user's health logs into NDJSON, CSV or Parquet with constant memory
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+from services.database import DatabaseService
+
+
+class LogExporter:
+    """Turns the DatabaseService log stream into export formats, one chunk or row group at a time"""
+
+    # Stored fields included in an export
+    EXPORT_FIELDS = [
+        'user_id',
+        'timestamp',
+        'created_at',
+        'prompt',
+        'summary',
+        'analysis',
+        'analysis_version',
+    ]
+
+    # Flat columns of CSV and Parquet exports
+    COLUMNS = [
+        'id',
+        'user_id',
+        'timestamp',
+        'created_at',
+        'prompt',
+        'summary',
+        'symptoms',
+        'mood',
+        'medications',
+        'sleep_hours',
+        'exercise',
+        'stress',
+        'analysis_version',
+    ]
+
+    # Formats that can be streamed over HTTP
+    STREAM_FORMATS = {
+        'ndjson': 'application/x-ndjson',
+        'csv': 'text/csv',
+    }
+
+    # Bytes buffered before a chunk is handed to the response
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, db_service: DatabaseService):
+        """
+        Args:
+            db_service: Database service instance
+        """
+        self.db = db_service
+
+    def iter_logs(self, user_id: str = None, days: Optional[int] = None) -> Iterator[Dict]:
+        """Stream the stored logs to export, newest first, one cursor batch at a time"""
+        return self.db.iter_logs(days=days, user_id=user_id, fields=['_id'] + self.EXPORT_FIELDS)
+
+    def iter_ndjson(self, logs: Iterator[Dict]) -> Iterator[bytes]:
+        """Encode logs as newline-delimited JSON, keeping the full analysis object"""
+        def lines():
+            for log in logs:
+                log['id'] = str(log.pop('_id'))
+                yield json.dumps(log, default=self._json_default) + '\n'
+
+        return self._chunked(lines())
+
+    def iter_csv(self, logs: Iterator[Dict]) -> Iterator[bytes]:
+        """Encode logs as CSV rows of COLUMNS, starting with a header row"""
+        def lines():
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=self.COLUMNS)
+            writer.writeheader()
+            for log in logs:
+                writer.writerow(self.flatten(log))
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue()
+
+        return self._chunked(lines())
+
+    def write_parquet(self, logs: Iterator[Dict], path: str, row_group_size: int = 10000) -> int:
+        """
+        Write logs to a Parquet file, one row group per `row_group_size` logs
+
+        Only one row group is held in memory at a time. Requires pyarrow.
+
+        Args:
+            logs: Stored logs to write
+            path: Output file
+            row_group_size: Logs per row group
+
+        Returns:
+            int: Number of logs written
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+
+        schema = pa.schema([
+            ('id', pa.string()),
+            ('user_id', pa.string()),
+            ('timestamp', pa.timestamp('ms')),
+            ('created_at', pa.string()),
+            ('prompt', pa.string()),
+            ('summary', pa.string()),
+            ('symptoms', pa.string()),
+            ('mood', pa.string()),
+            ('medications', pa.string()),
+            ('sleep_hours', pa.float64()),
+            ('exercise', pa.bool_()),
+            ('stress', pa.bool_()),
+            ('analysis_version', pa.int64()),
+        ])
+
+        total = 0
+        rows = []
+        with pq.ParquetWriter(path, schema) as writer:
+            for log in logs:
+                row = self.flatten(log)
+                row['timestamp'] = log.get('timestamp') if isinstance(log.get('timestamp'), datetime) else None
+                rows.append(row)
+                if len(rows) >= row_group_size:
+                    writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+                    total += len(rows)
+                    rows = []
+            if rows:
+                writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+                total += len(rows)
+
+        return total
+
+    @classmethod
+    def flatten(cls, log: Dict) -> Dict:
+        """Reduce one stored log to the flat COLUMNS row"""
+        analysis = log.get('analysis') or {}
+        mood = analysis.get('mood') or {}
+        lifestyle = analysis.get('lifestyle') or {}
+        timestamp = log.get('timestamp')
+
+        return {
+            'id': str(log.get('_id', log.get('id', ''))),
+            'user_id': log.get('user_id'),
+            'timestamp': timestamp.isoformat() if isinstance(timestamp, datetime) else timestamp,
+            'created_at': log.get('created_at'),
+            'prompt': log.get('prompt'),
+            'summary': log.get('summary'),
+            'symptoms': '; '.join(analysis.get('symptoms', [])),
+            'mood': mood.get('primary') if mood.get('detected') else None,
+            'medications': '; '.join(med.get('name', '') for med in analysis.get('medications', [])),
+            'sleep_hours': (lifestyle.get('sleep') or {}).get('hours'),
+            'exercise': 'exercise' in lifestyle,
+            'stress': 'stress' in lifestyle,
+            'analysis_version': log.get('analysis_version'),
+        }
+
+    @classmethod
+    def _chunked(cls, pieces: Iterator[str]) -> Iterator[bytes]:
+        """Join small encoded pieces into CHUNK_SIZE chunks so each response write carries real payload"""
+        chunk: List[str] = []
+        size = 0
+        for piece in pieces:
+            chunk.append(piece)
+            size += len(piece)
+            if size >= cls.CHUNK_SIZE:
+                yield ''.join(chunk).encode('utf-8')
+                chunk = []
+                size = 0
+        if chunk:
+            yield ''.join(chunk).encode('utf-8')
+
+    @staticmethod
+    def _json_default(value):
+        """Serialize datetimes and ObjectIds found in stored logs"""
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return str(value)
@@ -0,0 +1,170 @@
+"""
+Metrics
+Prometheus latency histograms, request counters and gauges for the API and its stages
+"""
+
+import functools
+import inspect
+import os
+import time
+from typing import Callable, Tuple
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Seconds; from sub-millisecond cache hits up to PDF renders
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+# Bytes; from an empty 304 up to large exports
+SIZE_BUCKETS = (0, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+REQUEST_LATENCY = Histogram(
+    'healthvoice_request_duration_seconds',
+    'Time from receiving a request to finishing its response',
+    ['endpoint', 'method', 'status'],
+    buckets=LATENCY_BUCKETS
+)
+
+REQUESTS = Counter(
+    'healthvoice_requests',
+    'Requests served',
+    ['endpoint', 'method', 'status']
+)
+
+REQUESTS_IN_FLIGHT = Gauge(
+    'healthvoice_requests_in_flight',
+    'Requests currently being served',
+    ['endpoint'],
+    multiprocess_mode='livesum'
+)
+
+REQUEST_SIZE = Histogram(
+    'healthvoice_request_size_bytes',
+    'Size of request bodies',
+    ['endpoint'],
+    buckets=SIZE_BUCKETS
+)
+
+RESPONSE_SIZE = Histogram(
+    'healthvoice_response_size_bytes',
+    'Size of response bodies (streamed responses are not measured)',
+    ['endpoint'],
+    buckets=SIZE_BUCKETS
+)
+
+STAGE_LATENCY = Histogram(
+    'healthvoice_stage_duration_seconds',
+    'Time spent in one stage of serving a request (stages nest, so their times overlap)',
+    ['stage'],
+    buckets=LATENCY_BUCKETS
+)
+
+# Documents; from point lookups up to full exports
+DOCUMENT_BUCKETS = (0, 1, 10, 50, 100, 500, 1000, 5000, 10000, 50000, 100000)
+
+MONGO_COMMAND_LATENCY = Histogram(
+    'healthvoice_mongo_command_duration_seconds',
+    'Time MongoDB took to answer a command, as measured by the driver',
+    ['command', 'collection'],
+    buckets=LATENCY_BUCKETS
+)
+
+MONGO_DOCS_RETURNED = Histogram(
+    'healthvoice_mongo_documents_returned',
+    'Documents in a command reply (cursor batch, distinct values, or count of a count or write)',
+    ['command', 'collection'],
+    buckets=DOCUMENT_BUCKETS
+)
+
+MONGO_DOCS_EXAMINED = Histogram(
+    'healthvoice_mongo_documents_examined',
+    'Documents examined by slow queries, from their explain output',
+    ['command', 'collection'],
+    buckets=DOCUMENT_BUCKETS
+)
+
+MONGO_SLOW_COMMANDS = Counter(
+    'healthvoice_mongo_slow_commands',
+    'Commands slower than MONGODB_SLOW_QUERY_MS',
+    ['command', 'collection']
+)
+
+MONGO_COMMAND_FAILURES = Counter(
+    'healthvoice_mongo_command_failures',
+    'Commands that returned an error',
+    ['command', 'collection']
+)
+
+
+def timed(stage: str) -> Callable:
+    """
+    Decorator recording every call of a function in STAGE_LATENCY under `stage`
+
+    Generator functions are timed from the first item to exhaustion, so a
+    streamed query counts its fetches rather than the call that sets it up.
+    """
+    def decorate(func: Callable) -> Callable:
+        histogram = STAGE_LATENCY.labels(stage)
+
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def generator(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    yield from func(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - started)
+            return generator
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started)
+        return wrapper
+
+    return decorate
+
+
+def instrumented(prefix: str) -> Callable:
+    """
+    Class decorator timing every public method as the stage `<prefix>.<method>`
+
+    Properties, static and class methods and underscore-private methods are left alone.
+    """
+    def decorate(cls):
+        for name, member in list(vars(cls).items()):
+            if not name.startswith('_') and inspect.isfunction(member):
+                setattr(cls, name, timed(f"{prefix}.{name}")(member))
+        return cls
+
+    return decorate
+
+
+def export() -> Tuple[bytes, str]:
+    """
+    Render every metric in the Prometheus text format
+
+    With PROMETHEUS_MULTIPROC_DIR set, the values written there by all server
+    and report worker processes are merged, so any worker can answer a scrape.
+
+    Returns:
+        The encoded metrics and their content type
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,85 @@
+"""
+Parallel Text Analyzer
+Fans TextAnalyzerService batches out across CPU cores for offline jobs
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional
+from services.text_analyzer import TextAnalyzerService
+
+# Analyzer owned by each worker process
+_worker_analyzer = None
+
+
+def _init_worker():
+    """Build one analyzer per worker so the keyword matcher is compiled once"""
+    global _worker_analyzer
+    _worker_analyzer = TextAnalyzerService()
+
+
+def _analyze_chunk(texts: List[str]) -> List[Dict]:
+    """Analyze a chunk of texts inside a worker process"""
+    return [_worker_analyzer.analyze(text) for text in texts]
+
+
+def iter_batches(items: Iterable, size: int) -> Iterator[List]:
+    """Group a stream of items into lists of at most `size`"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class ParallelTextAnalyzer(TextAnalyzerService):
+    """TextAnalyzerService whose analyze_batch runs on a pool of worker processes"""
+
+    # Batches smaller than this are analyzed in-process; pickling costs more than it saves
+    MIN_PARALLEL_BATCH = 64
+
+    def __init__(self, workers: Optional[int] = None):
+        """
+        Start the worker pool
+
+        Args:
+            workers: Number of analyzer processes (defaults to the CPU count)
+        """
+        super().__init__()
+        self.workers = workers or os.cpu_count() or 1
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+
+    def analyze_batch(self, texts: List[str]) -> List[Dict]:
+        """
+        Analyze a batch of voice note texts across the worker pool
+
+        Args:
+            texts: List of voice note texts to analyze
+
+        Returns:
+            List of analysis dictionaries, in the same order as the input
+        """
+        if len(texts) < self.MIN_PARALLEL_BATCH or self.workers == 1:
+            return super().analyze_batch(texts)
+
+        # One contiguous chunk per worker keeps results in input order
+        size = -(-len(texts) // self.workers)
+        chunks = [texts[i:i + size] for i in range(0, len(texts), size)]
+
+        analyses = []
+        for chunk_analyses in self._executor.map(_analyze_chunk, chunks):
+            analyses.extend(chunk_analyses)
+        return analyses
+
+    def close(self):
+        """Shut down the worker pool"""
+        self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
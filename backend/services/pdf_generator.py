@@ -11,7 +11,7 @@ from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
 from io import BytesIO
 from datetime import datetime
-from typing import Dict
+from typing import Dict, Optional
 
 
 class PDFGenerator:
@@ -172,3 +172,19 @@ class PDFGenerator:
         buffer.seek(0)
         return buffer
 
+
+# Generator shared by every report rendered in this process
+_shared_generator: Optional[PDFGenerator] = None
+
+
+def get_pdf_generator() -> PDFGenerator:
+    """
+    Get this process's PDF generator, building it on first use
+    
+    The style sheet and custom styles are only read while rendering, so one
+    generator can render every report instead of being rebuilt per request.
+    """
+    global _shared_generator
+    if _shared_generator is None:
+        _shared_generator = PDFGenerator()
+    return _shared_generator
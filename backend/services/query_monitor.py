@@ -0,0 +1,247 @@
+"""
+Query Monitor
+pymongo command listener that times every MongoDB command, logs slow ones with
+their plan statistics, and can capture query shapes for plan checks
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+from pymongo import monitoring
+from services import metrics
+
+
+class QueryMonitor(monitoring.CommandListener):
+    """Records per-command latency and documents returned; explains slow queries to count documents examined"""
+
+    # Commands whose plan MongoDB can explain, with the fields an explain of them may carry
+    EXPLAINABLE = {
+        'find': ['filter', 'sort', 'projection', 'limit', 'skip', 'hint'],
+        'aggregate': ['pipeline', 'hint', 'allowDiskUse'],
+        'count': ['query', 'limit', 'skip', 'hint'],
+        'distinct': ['key', 'query'],
+    }
+
+    # Plan stages that mean a query is not served by an index
+    UNINDEXED_STAGES = ['COLLSCAN', 'SORT']
+
+    # Seconds between explains of the same slow query shape
+    EXPLAIN_INTERVAL = 60
+
+    # Explains allowed to run at once; slow queries past this are logged without one
+    MAX_CONCURRENT_EXPLAINS = 2
+
+    def __init__(self, slow_ms: float = 100, explain_slow: bool = True):
+        """
+        Args:
+            slow_ms: Commands taking at least this many milliseconds are logged (0 disables the log)
+            explain_slow: Re-run slow queries under explain to report documents and keys examined
+        """
+        self.slow_ms = slow_ms
+        self.explain_slow = explain_slow
+        self.client = None
+
+        self._pending = {}
+        self._explained_at = {}
+        self._explain_slots = threading.BoundedSemaphore(self.MAX_CONCURRENT_EXPLAINS)
+        self._captured = None
+        self._capture_lock = threading.Lock()
+
+    def attach(self, client):
+        """Use this client (the one the monitor listens to) to run explains"""
+        self.client = client
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        """Remember the collection and, for explainable commands, the command itself"""
+        command = event.command
+        if event.command_name == 'getMore':
+            collection = command.get('collection')
+        else:
+            collection = command.get(event.command_name)
+        collection = collection if isinstance(collection, str) else ''
+        explainable = event.command_name in self.EXPLAINABLE
+        self._pending[(event.connection_id, event.request_id)] = (
+            collection, command if explainable else None
+        )
+
+        if explainable and self._captured is not None:
+            with self._capture_lock:
+                if self._captured is not None:
+                    shape = self.shape(event.command_name, collection, command)
+                    self._captured.setdefault(
+                        shape, (event.database_name, self._explain_command(event.command_name, command))
+                    )
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        """Record latency and documents returned; log the command if it was slow"""
+        collection, command = self._pending.pop((event.connection_id, event.request_id), ('', None))
+        seconds = event.duration_micros / 1e6
+        metrics.MONGO_COMMAND_LATENCY.labels(event.command_name, collection).observe(seconds)
+
+        returned = self.documents_returned(event.reply)
+        if returned is not None:
+            metrics.MONGO_DOCS_RETURNED.labels(event.command_name, collection).observe(returned)
+
+        if self.slow_ms and seconds * 1000 >= self.slow_ms and event.command_name != 'explain':
+            self._slow(event.command_name, collection, command, event.database_name, seconds, returned)
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        """Record latency and the failure"""
+        collection, _ = self._pending.pop((event.connection_id, event.request_id), ('', None))
+        metrics.MONGO_COMMAND_LATENCY.labels(event.command_name, collection).observe(event.duration_micros / 1e6)
+        metrics.MONGO_COMMAND_FAILURES.labels(event.command_name, collection).inc()
+
+    @contextmanager
+    def capturing(self) -> Iterator[Dict]:
+        """
+        Collect the distinct query shapes issued inside the block
+
+        Yields:
+            Dictionary filled with shape -> (database name, explainable command)
+        """
+        captured = {}
+        with self._capture_lock:
+            self._captured = captured
+        try:
+            yield captured
+        finally:
+            with self._capture_lock:
+                self._captured = None
+
+    def explain(self, database_name: str, command: Dict, verbosity: str = 'queryPlanner') -> Dict:
+        """Run explain for an explainable command built by `_explain_command`"""
+        return self.client[database_name].command('explain', command, verbosity=verbosity)
+
+    @classmethod
+    def plan_stages(cls, explain: Dict) -> List[str]:
+        """Every stage of the winning plans in an explain result (classic and slot-based engine formats)"""
+        stages = []
+
+        def walk(node, in_plan: bool):
+            if isinstance(node, dict):
+                for key, value in node.items():
+                    if key == 'rejectedPlans':
+                        continue
+                    if key == 'stage' and in_plan and isinstance(value, str):
+                        stages.append(value)
+                    walk(value, in_plan or key == 'winningPlan')
+            elif isinstance(node, list):
+                for item in node:
+                    walk(item, in_plan)
+
+        walk(explain, False)
+        return stages
+
+    @classmethod
+    def unindexed_stages(cls, explain: Dict) -> List[str]:
+        """Stages of the winning plan that scan the collection or sort in memory"""
+        return [stage for stage in cls.plan_stages(explain) if stage in cls.UNINDEXED_STAGES]
+
+    @staticmethod
+    def execution_stats(explain: Dict) -> Optional[Dict]:
+        """totalDocsExamined / totalKeysExamined / nReturned from an executionStats explain, wherever it is nested"""
+        if isinstance(explain, dict):
+            stats = explain.get('executionStats')
+            if isinstance(stats, dict) and 'totalDocsExamined' in stats:
+                return stats
+            children = explain.values()
+        elif isinstance(explain, list):
+            children = explain
+        else:
+            return None
+        for child in children:
+            stats = QueryMonitor.execution_stats(child)
+            if stats:
+                return stats
+        return None
+
+    @staticmethod
+    def documents_returned(reply: Dict) -> Optional[int]:
+        """Documents in a command reply: a cursor batch, distinct values, or the count of a count or write"""
+        cursor = reply.get('cursor')
+        if isinstance(cursor, dict):
+            batch = cursor.get('firstBatch', cursor.get('nextBatch'))
+            if isinstance(batch, list):
+                return len(batch)
+        if isinstance(reply.get('values'), list):
+            return len(reply['values'])
+        if isinstance(reply.get('n'), int):
+            return reply['n']
+        return None
+
+    @classmethod
+    def shape(cls, command_name: str, collection: str, command: Optional[Dict]) -> Tuple:
+        """Hashable form of a query with every value replaced by its type, so user ids and dates do not split shapes"""
+        fields = cls.EXPLAINABLE.get(command_name, [])
+        shape = (command_name, collection)
+        for field in fields:
+            if command and field in command:
+                value = cls._redact(command[field])
+                shape += ((field, value if isinstance(value, str) else repr(value)),)
+        return shape
+
+    @classmethod
+    def _redact(cls, value, key: str = ''):
+        """Replace the values of a filter or pipeline with their type names, keeping operators and field names"""
+        if isinstance(value, dict):
+            return {name: cls._redact(item, name) for name, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            # Operator arguments like $in lists collapse to one element so their length does not matter
+            items = [cls._redact(item, key) for item in value]
+            return items[:1] if key in ('$in', '$nin') else items
+        # Sort directions, projection flags and booleans are part of the shape
+        if isinstance(value, bool) or (isinstance(value, int) and value in (-1, 0, 1)):
+            return value
+        return type(value).__name__
+
+    def _explain_command(self, command_name: str, command: Dict) -> Dict:
+        """Copy of a command holding only what explain accepts"""
+        explainable = {command_name: command[command_name]}
+        for field in self.EXPLAINABLE[command_name]:
+            if field in command:
+                explainable[field] = command[field]
+        if command_name == 'aggregate':
+            explainable['cursor'] = {}
+        return explainable
+
+    def _slow(self, command_name: str, collection: str, command: Optional[Dict],
+              database_name: str, seconds: float, returned: Optional[int]):
+        """Log a slow command and, for queries, explain it on a background thread"""
+        metrics.MONGO_SLOW_COMMANDS.labels(command_name, collection).inc()
+        shape = self.shape(command_name, collection, command)
+        print(f"⚠ Slow MongoDB {command_name} on {collection or database_name}: "
+              f"{seconds * 1000:.1f} ms, {returned if returned is not None else '?'} returned; "
+              f"shape {dict((field, value) for field, value in shape[2:])}")
+
+        if not (self.explain_slow and command and self.client is not None):
+            return
+        now = time.monotonic()
+        if now - self._explained_at.get(shape, -self.EXPLAIN_INTERVAL) < self.EXPLAIN_INTERVAL:
+            return
+        if not self._explain_slots.acquire(blocking=False):
+            return
+        self._explained_at[shape] = now
+        threading.Thread(
+            target=self._explain_slow,
+            args=(command_name, collection, database_name, self._explain_command(command_name, command)),
+            name='mongo-explain',
+            daemon=True
+        ).start()
+
+    def _explain_slow(self, command_name: str, collection: str, database_name: str, command: Dict):
+        """Explain a slow query with execution statistics and log how much it examined"""
+        try:
+            explain = self.explain(database_name, command, verbosity='executionStats')
+            stats = self.execution_stats(explain) or {}
+            examined = stats.get('totalDocsExamined')
+            if examined is not None:
+                metrics.MONGO_DOCS_EXAMINED.labels(command_name, collection).observe(examined)
+            print(f"  ↳ plan {'/'.join(self.plan_stages(explain)) or '?'}: "
+                  f"{examined if examined is not None else '?'} docs and "
+                  f"{stats.get('totalKeysExamined', '?')} keys examined for "
+                  f"{stats.get('nReturned', '?')} returned")
+        except Exception as e:
+            print(f"Warning: Could not explain slow {command_name} on {collection}: {e}")
+        finally:
+            self._explain_slots.release()
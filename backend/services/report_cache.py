@@ -0,0 +1,155 @@
+"""
+Report Cache
+Size- and age-bounded on-disk LRU store of rendered PDF reports, addressed by a hash of their content
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, Optional
+
+
+class ReportCache:
+    """
+    Content-addressed PDF files evicted least recently used first once the directory outgrows its cap
+
+    A file's modification time is when it was rendered and decides its
+    expiry; its access time, set on every hit, is the LRU clock.
+    """
+
+    # Summary fields that change on every request without changing the report body
+    VOLATILE_FIELDS = ['generated_at']
+
+    # Generation timestamp line inside the summary text, volatile in the same way
+    GENERATED_LINE = re.compile(r'^Generated: .*$', re.MULTILINE)
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024, ttl: Optional[float] = None):
+        """
+        Args:
+            directory: Where rendered reports are stored (created if missing)
+            max_bytes: Total size the stored reports may reach before eviction
+            ttl: Seconds a report is kept after it was rendered (None keeps it until evicted)
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def key(cls, summary_data: Dict, days: int, report_type: str) -> str:
+        """
+        Hash the inputs of a report, leaving out VOLATILE_FIELDS and the generation time
+
+        Two requests with the same summary, period and type produce the same
+        key, so the PDF rendered for the first can be served to the second.
+        """
+        summary = {name: value for name, value in summary_data.items() if name not in cls.VOLATILE_FIELDS}
+        if isinstance(summary.get('summary'), str):
+            summary['summary'] = cls.GENERATED_LINE.sub('', summary['summary'])
+        content = {
+            'summary': summary,
+            'days': days,
+            'report_type': report_type,
+        }
+        encoded = json.dumps(content, sort_keys=True, default=str).encode('utf-8')
+        return hashlib.sha256(encoded).hexdigest()
+
+    def path(self, key: str) -> str:
+        """File a report with this key is stored at"""
+        return os.path.join(self.directory, f"{key}.pdf")
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the stored file for a key and mark it recently used, or None on a miss"""
+        with self._lock:
+            path = self._find(key)
+            if path is None:
+                self.misses += 1
+                return None
+            try:
+                # Set explicitly, so it does not depend on how the filesystem tracks reads
+                os.utime(path, (time.time(), os.stat(path).st_mtime))
+            except FileNotFoundError:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return path
+
+    def find(self, key: str) -> Optional[str]:
+        """Return the stored file for a key without counting a lookup, or None if missing or expired"""
+        with self._lock:
+            return self._find(key)
+
+    def evict(self):
+        """Delete expired reports, then least recently used ones until the store fits in max_bytes"""
+        with self._lock:
+            files = []
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and entry.name.endswith('.pdf'):
+                    stat = entry.stat()
+                    if self._expired(stat):
+                        self._remove(entry.path)
+                        continue
+                    files.append((stat.st_atime, stat.st_size, entry.path))
+
+            total = sum(size for _, size, _ in files)
+            for _, size, path in sorted(files):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                self.evictions += 1
+
+    def _find(self, key: str) -> Optional[str]:
+        """Path of a stored, unexpired report (expired ones are deleted on sight); call with the lock held"""
+        path = self.path(key)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        if self._expired(stat):
+            self._remove(path)
+            return None
+        return path
+
+    def _expired(self, stat: os.stat_result) -> bool:
+        """Whether a report was rendered more than ttl seconds ago"""
+        return self.ttl is not None and time.time() - stat.st_mtime >= self.ttl
+
+    def _remove(self, path: str):
+        """Delete an expired report; call with the lock held"""
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return
+        self.expirations += 1
+
+    def stats(self) -> Dict:
+        """Return hit/miss/eviction counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            files = [
+                entry.stat().st_size for entry in os.scandir(self.directory)
+                if entry.is_file() and entry.name.endswith('.pdf')
+            ]
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0,
+                'size': len(files),
+                'bytes': sum(files),
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl
+            }
@@ -0,0 +1,305 @@
+"""
+Report Jobs
+Renders PDF reports on a bounded pool of worker processes, reusing cached renders of identical reports
+"""
+
+import multiprocessing
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from datetime import datetime
+from typing import Dict, Optional
+from services.metrics import timed
+from services.report_cache import ReportCache
+
+
+def _init_worker():
+    """Build the worker's shared PDF generator up front so its styles are set up once"""
+    from services.pdf_generator import get_pdf_generator
+    get_pdf_generator()
+
+
+@timed('pdf.render')
+def _render_report(summary_data: Dict, days: int, report_type: str, path: str,
+                   profile: Optional[Dict] = None, user_id: Optional[str] = None) -> int:
+    """
+    Render a report inside a worker process and write it to `path`; returns its size in bytes
+
+    With `profile` (RequestProfiler.settings() of a profiled request), the
+    render is sampled and stored as a `pdf.render` profile of `user_id`.
+    """
+    if profile:
+        from services.request_profiler import RequestProfiler
+        with RequestProfiler(**profile).profiling('pdf.render', user_id):
+            return _write_report(summary_data, days, report_type, path)
+    return _write_report(summary_data, days, report_type, path)
+
+
+def _write_report(summary_data: Dict, days: int, report_type: str, path: str) -> int:
+    """Render a report and write it to `path` atomically; returns its size in bytes"""
+    from services.pdf_generator import get_pdf_generator
+    # Named per process so two processes rendering the same report never share a file
+    partial = f"{path}.{os.getpid()}.tmp"
+    try:
+        buffer = get_pdf_generator().generate_health_report(summary_data, days, report_type)
+        with open(partial, 'wb') as handle:
+            handle.write(buffer.getvalue())
+    except Exception:
+        _remove(partial)
+        raise
+    # Readers never see a half-written file
+    os.replace(partial, path)
+    return os.path.getsize(path)
+
+
+def _remove(path: str):
+    """Delete a file if it exists"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class QueueFullError(Exception):
+    """Raised when too many reports are already waiting to be rendered"""
+
+
+class ReportJobQueue:
+    """
+    Submits report renders to worker processes and tracks their status until they expire
+
+    A job is identified by the content key of its report, so identical
+    submissions share one job and any process sharing the cache directory
+    can answer for a job it did not start: a finished job is its cached
+    file and a running one its `.rendering` marker.
+    """
+
+    # Shape of a job id (a ReportCache key)
+    JOB_ID_PATTERN = re.compile(r'[0-9a-f]{64}')
+
+    def __init__(self, cache: ReportCache, workers: int = 2, max_pending: int = 50, ttl: float = 3600):
+        """
+        Start the worker pool
+
+        Args:
+            cache: Store rendered reports are written to and served from
+            workers: Rendering processes, kept small so reports never take every core
+            max_pending: Renders allowed to wait or run at once before submissions are refused
+            ttl: Seconds a job is remembered after it finishes (its file expires with the cache's own ttl)
+        """
+        self.cache = cache
+        self.workers = workers
+        self.max_pending = max_pending
+        self.ttl = ttl
+
+        self._jobs = {}
+        self._lock = threading.Lock()
+        # Spawned rather than forked: the pool may start inside a threaded server worker
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker
+        )
+
+    def submit(self, summary_data: Dict, days: int, report_type: str, user_id: str = None,
+               profile: Optional[Dict] = None) -> Dict:
+        """
+        Queue a report for rendering
+
+        A report identical to one already cached is completed straight away,
+        and one identical to a report still rendering shares that job.
+
+        Args:
+            summary_data: Summary data from summary controller
+            days: Number of days in report period
+            report_type: Type of report (weekly/monthly/quarterly/summary)
+            user_id: User the report belongs to
+            profile: RequestProfiler.settings() to profile the render with (reused renders are not profiled)
+
+        Returns:
+            Status dictionary of the new job
+
+        Raises:
+            QueueFullError: If max_pending renders are already waiting or running
+        """
+        self.cleanup()
+
+        key = ReportCache.key(summary_data, days, report_type)
+        path = self.cache.path(key)
+
+        with self._lock:
+            job = self._jobs.get(key)
+            if job and not job['future'].done():
+                return self._status(job)
+
+            cached = self.cache.get(key) is not None
+            if job and cached and self._state(job['future']) == 'completed':
+                return self._status(job)
+            if cached:
+                future = Future()
+                future.set_result(os.path.getsize(path))
+            else:
+                rendering = sum(1 for other in self._jobs.values() if not other['future'].done())
+                if rendering >= self.max_pending:
+                    raise QueueFullError(f"Too many reports in progress (max {self.max_pending})")
+                # Tells other processes the render is in progress until the file lands
+                open(self._marker(path), 'ab').close()
+                future = self._executor.submit(
+                    _render_report, summary_data, days, report_type, path, profile, user_id
+                )
+
+            job = {
+                'job_id': key,
+                'user_id': user_id,
+                'days': days,
+                'report_type': report_type,
+                'path': path,
+                'cached': cached,
+                'created_at': datetime.utcnow(),
+                'finished_at': None,
+                'finished': None,
+                'future': future,
+            }
+            self._jobs[key] = job
+
+        if not cached:
+            future.add_done_callback(lambda done: self._rendered(path))
+        future.add_done_callback(lambda done: self._finish(job))
+        return self._status(job)
+
+    def status(self, job_id: str) -> Optional[Dict]:
+        """Get the status of a job, or None if neither this process nor the cache directory knows it"""
+        self.cleanup()
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job:
+            return self._status(job)
+        return self._shared_status(job_id)
+
+    def result_path(self, job_id: str) -> Optional[str]:
+        """Get the file of a completed job, or None if it is unknown, evicted or not completed"""
+        status = self.status(job_id)
+        if not status or status['status'] != 'completed':
+            return None
+        return self.cache.find(job_id)
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Dict]:
+        """Block until a job finishes (or `timeout` seconds pass) and return its status"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if not job:
+            return None
+        try:
+            job['future'].exception(timeout=timeout)
+        except FutureTimeoutError:
+            pass
+        return self._status(job)
+
+    def cleanup(self):
+        """Forget jobs that finished more than `ttl` seconds ago, and let the cache delete expired files"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job['finished'] is not None and now - job['finished'] >= self.ttl
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+        if expired:
+            self.cache.evict()
+
+    def stats(self) -> Dict:
+        """Return job counts by status"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        counts = {'queued': 0, 'running': 0, 'completed': 0, 'failed': 0}
+        for job in jobs:
+            counts[self._state(job['future'])] += 1
+        counts['workers'] = self.workers
+        counts['max_pending'] = self.max_pending
+        counts['cache'] = self.cache.stats()
+        return counts
+
+    def close(self):
+        """Shut down the worker pool"""
+        self._executor.shutdown(cancel_futures=True)
+
+    def _rendered(self, path: str):
+        """Clear the in-progress marker of a finished or failed render, then trim the cache to its cap"""
+        _remove(self._marker(path))
+        self.cache.evict()
+
+    def _rendering_elsewhere(self, path: str) -> bool:
+        """Whether a render marker exists and is recent enough to belong to a live render"""
+        try:
+            # A marker outlives `ttl` only if the process that wrote it died mid-render
+            return time.time() - os.path.getmtime(self._marker(path)) < self.ttl
+        except FileNotFoundError:
+            return False
+
+    @staticmethod
+    def _marker(path: str) -> str:
+        """File marking a report as being rendered"""
+        return f"{path}.rendering"
+
+    def _shared_status(self, job_id: str) -> Optional[Dict]:
+        """Status of a job started by another process, read from the cache directory"""
+        if not self.JOB_ID_PATTERN.fullmatch(job_id or ''):
+            return None
+        path = self.cache.path(job_id)
+        if self.cache.find(job_id):
+            state = 'completed'
+        elif self._rendering_elsewhere(path):
+            state = 'running'
+        else:
+            return None
+        status = {
+            'job_id': job_id,
+            'status': state,
+            'days': None,
+            'report_type': None,
+            'cached': state == 'completed',
+            'created_at': None,
+            'finished_at': None,
+        }
+        if state == 'completed':
+            try:
+                status['size_bytes'] = os.path.getsize(path)
+            except FileNotFoundError:
+                return None
+        return status
+
+    def _finish(self, job: Dict):
+        """Record when a job finished so its expiry can be timed"""
+        job['finished_at'] = datetime.utcnow()
+        job['finished'] = time.monotonic()
+
+    @staticmethod
+    def _state(future: Future) -> str:
+        """Map a future onto queued / running / completed / failed"""
+        if not future.done():
+            return 'running' if future.running() else 'queued'
+        if future.cancelled() or future.exception() is not None:
+            return 'failed'
+        return 'completed'
+
+    def _status(self, job: Dict) -> Dict:
+        """Public view of a job"""
+        future = job['future']
+        state = self._state(future)
+        status = {
+            'job_id': job['job_id'],
+            'status': state,
+            'days': job['days'],
+            'report_type': job['report_type'],
+            'cached': job['cached'],
+            'created_at': job['created_at'].isoformat(),
+            'finished_at': job['finished_at'].isoformat() if job['finished_at'] else None,
+        }
+        if state == 'completed':
+            status['size_bytes'] = future.result()
+        elif state == 'failed':
+            status['error'] = 'Cancelled' if future.cancelled() else str(future.exception())
+        return status
@@ -0,0 +1,208 @@
+"""
+Request Profiler
+Opt-in statistical profiler that samples a thread's stack while it serves a request
+and writes flamegraph-ready collapsed stacks to a size-bounded directory
+"""
+
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, Optional
+
+# Directory stack paths are shortened against
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+
+
+class StackSampler:
+    """Counts the collapsed call stacks of one thread, sampled every `interval` seconds from a helper thread"""
+
+    def __init__(self, thread_id: int, interval: float):
+        """
+        Args:
+            thread_id: threading.get_ident() of the thread to sample
+            interval: Seconds between samples
+        """
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self):
+        """Begin sampling"""
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling and wait for the sampler thread to exit"""
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        """Sample until stopped"""
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.counts[self._collapse(frame)] += 1
+
+    @staticmethod
+    def _collapse(frame) -> str:
+        """Root-first `name (file:line)` frames joined by semicolons"""
+        frames = []
+        while frame is not None:
+            code = frame.f_code
+            frames.append(f"{getattr(code, 'co_qualname', code.co_name)} "
+                          f"({StackSampler._short_path(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ';'.join(reversed(frames))
+
+    @staticmethod
+    def _short_path(path: str) -> str:
+        """Path from site-packages or the backend directory, so stacks do not carry install prefixes"""
+        marker = 'site-packages' + os.sep
+        if marker in path:
+            return path.split(marker, 1)[1]
+        return os.path.relpath(path, BACKEND_DIR) if path.startswith(BACKEND_DIR) else os.path.basename(path)
+
+
+class RequestProfiler:
+    """Decides which requests are profiled and stores their collapsed stacks, deleting the oldest past the caps"""
+
+    # Profiles allowed to run at once; requests past this are served unprofiled
+    MAX_CONCURRENT = 4
+
+    def __init__(self, directory: str, sample_rate: float = 0.0, token: Optional[str] = None,
+                 interval: float = 0.001, max_bytes: int = 64 * 1024 * 1024, max_files: int = 500):
+        """
+        Args:
+            directory: Where profiles are written (created if missing)
+            sample_rate: Fraction of requests profiled at random (0 to profile only on request)
+            token: Secret a request must send in the X-Profile-Token header to be profiled
+                   (None disables profiling on request)
+            interval: Seconds between stack samples
+            max_bytes: Total size of stored profiles before the oldest are deleted
+            max_files: Number of stored profiles before the oldest are deleted
+        """
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.token = token
+        self.interval = interval
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self._slots = threading.BoundedSemaphore(self.MAX_CONCURRENT)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether any request can be profiled"""
+        return self.sample_rate > 0 or bool(self.token)
+
+    def wanted(self, header_token: Optional[str] = None) -> bool:
+        """Whether to profile a request: it sent the right token, or it fell in the random sample"""
+        # Compared as bytes: compare_digest rejects str holding non-ASCII characters
+        if self.token and header_token and hmac.compare_digest(header_token.encode(), self.token.encode()):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start(self, endpoint: str, user_id: Optional[str] = None) -> Optional[Dict]:
+        """
+        Start sampling the calling thread
+
+        Args:
+            endpoint: Tag for what is being profiled (URL rule or stage name)
+            user_id: Tag for whose request it is
+
+        Returns:
+            Handle to pass to finish(), or None if MAX_CONCURRENT profiles are already running
+        """
+        if not self._slots.acquire(blocking=False):
+            return None
+        sampler = StackSampler(threading.get_ident(), self.interval)
+        handle = {
+            'name': self._file_name(endpoint, user_id),
+            'endpoint': endpoint,
+            'user_id': user_id,
+            'sampler': sampler,
+        }
+        sampler.start()
+        return handle
+
+    def finish(self, handle: Dict) -> Optional[str]:
+        """Stop a profile, write its collapsed stacks and trim the directory; returns the file written"""
+        sampler = handle['sampler']
+        try:
+            sampler.stop()
+        finally:
+            self._slots.release()
+        if not sampler.counts:
+            return None
+
+        path = os.path.join(self.directory, handle['name'])
+        partial = f"{path}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(partial, 'w', encoding='utf-8') as output:
+                for stack, count in sampler.counts.most_common():
+                    output.write(f"{stack} {count}\n")
+            os.replace(partial, path)
+            self.evict()
+        except OSError as e:
+            # A full or unwritable disk loses the profile, never the request
+            print(f"Warning: Could not write profile {handle['name']}: {e}")
+            return None
+        return path
+
+    @contextmanager
+    def profiling(self, endpoint: str, user_id: Optional[str] = None) -> Iterator[Optional[Dict]]:
+        """Profile the calling thread for the duration of the block"""
+        handle = self.start(endpoint, user_id)
+        try:
+            yield handle
+        finally:
+            if handle:
+                self.finish(handle)
+
+    def settings(self) -> Dict:
+        """Arguments that rebuild this profiler's storage in another process, for profiling work done there"""
+        return {
+            'directory': self.directory,
+            'interval': self.interval,
+            'max_bytes': self.max_bytes,
+            'max_files': self.max_files,
+        }
+
+    def evict(self):
+        """Delete the oldest profiles until the directory fits in max_bytes and max_files"""
+        with self._lock:
+            files = []
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and entry.name.endswith('.collapsed'):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+
+            total = sum(size for _, size, _ in files)
+            count = len(files)
+            for _, size, path in sorted(files):
+                if total <= self.max_bytes and count <= self.max_files:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                count -= 1
+
+    @staticmethod
+    def _file_name(endpoint: str, user_id: Optional[str]) -> str:
+        """`<time>_<endpoint>_<user>_<id>.collapsed`, with tags reduced to filename-safe characters"""
+        def tag(value: Optional[str]) -> str:
+            return re.sub(r'[^A-Za-z0-9.-]+', '-', value or 'all').strip('-')[:48] or 'root'
+
+        stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S')
+        return f"{stamp}_{tag(endpoint)}_{tag(user_id)}_{uuid.uuid4().hex[:8]}.collapsed"
@@ -0,0 +1,118 @@
+"""
+Response Cache
+Bounded LRU cache of read-endpoint responses, validated against per-user data versions
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional
+
+
+class ResponseCache:
+    """Thread-safe LRU cache with entry and memory caps, per-entry data versions and hit/miss counters"""
+
+    def __init__(self, max_entries: int = 512, max_bytes: int = 16 * 1024 * 1024, ttl: float = 300):
+        """
+        Create an empty cache
+
+        Args:
+            max_entries: Maximum number of cached responses (0 disables caching)
+            max_bytes: Maximum total JSON size of cached responses
+            ttl: Seconds an entry stays valid (0 to never expire); bounds staleness
+                 from writes made by other processes, which do not bump this
+                 process's data versions
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+        self._bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, version: Hashable) -> Optional[Dict]:
+        """Return the cached response for a key if it was computed at `version`, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, stored_version, size, response = entry
+                if stored_version == version and (not self.ttl or time.monotonic() - stored_at < self.ttl):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return response
+                self._remove(key)
+                self.stale += 1
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, version: Hashable, response: Dict):
+        """Store a response computed at `version`, evicting least recently used entries past the caps"""
+        if not self.max_entries:
+            return
+        size = len(json.dumps(response, default=str))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic(), version, size, response)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, version: Hashable, compute: Callable[[], Dict]) -> Dict:
+        """
+        Return the cached response for a key, computing and storing it on a miss
+
+        Args:
+            key: Cache key (endpoint, user and window)
+            version: Current data version of the user the response belongs to
+            compute: Builds the response when it is not cached
+
+        Returns:
+            The cached or freshly computed response
+        """
+        response = self.get(key, version)
+        if response is None:
+            response = compute()
+            self.put(key, version, response)
+        return response
+
+    def clear(self):
+        """Drop every entry and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.stale = 0
+            self.evictions = 0
+
+    def stats(self) -> Dict:
+        """Return hit/miss/eviction counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'stale': self.stale,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0,
+                'size': len(self._entries),
+                'max_size': self.max_entries,
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl
+            }
+
+    def _remove(self, key: Hashable):
+        """Drop one entry and release its bytes (lock must be held)"""
+        _, _, size, _ = self._entries.pop(key)
+        self._bytes -= size
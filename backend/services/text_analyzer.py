@@ -4,13 +4,20 @@ Analyzes voice note text to extract health information
 """
 
 import re
-from typing import Dict, List
+from typing import Dict, List, Set
 from datetime import datetime
+from services.keyword_matcher import KeywordMatcher
+from services.analysis_cache import AnalysisCache
+from services.metrics import timed
 
 
 class TextAnalyzerService:
     """Service for analyzing health-related text and extracting structured data"""
     
+    # Stamped on every stored log; bump whenever keyword tables, patterns or the
+    # analysis output change so reanalyze.py picks up older logs
+    VERSION = 2
+    
     # Common symptom keywords
     SYMPTOM_KEYWORDS = {
         'pain': ['pain', 'ache', 'hurting', 'sore', 'tender', 'discomfort'],
@@ -50,6 +57,22 @@ class TextAnalyzerService:
         'water': ['water', 'hydrated', 'drinking', 'thirsty'],
     }
     
+    def __init__(self, cache_size: int = 1024, cache_ttl: float = 3600):
+        """
+        Compile all keyword tables into a single matcher
+        
+        Args:
+            cache_size: Number of analyses memoized by prompt hash (0 disables the cache)
+            cache_ttl: Seconds a memoized analysis stays valid (0 to never expire)
+        """
+        self.matcher = KeywordMatcher({
+            'symptoms': self.SYMPTOM_KEYWORDS,
+            'mood': self.MOOD_KEYWORDS,
+            'lifestyle': self.LIFESTYLE_KEYWORDS,
+        })
+        self.cache = AnalysisCache(cache_size, cache_ttl) if cache_size > 0 else None
+    
+    @timed('analyzer.analyze')
     def analyze(self, text: str) -> Dict:
         """
         Analyze voice note text and extract structured health information
@@ -64,21 +87,31 @@ class TextAnalyzerService:
             - medications: List of mentioned medications
             - lifestyle: Dictionary of lifestyle factors
         """
+        # Reuse the analysis of an identical prompt, refreshing only per-log fields
+        if self.cache is not None:
+            key = self.cache.key(text)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return self._copy_analysis(cached, text)
+        
         text_lower = text.lower()
         
+        # Find every keyword category in one pass over the text
+        matches = self.matcher.scan(text_lower)
+        
         # Extract symptoms
-        symptoms = self._extract_symptoms(text_lower)
+        symptoms = self._extract_symptoms(matches['symptoms'])
         
         # Extract mood
-        mood = self._extract_mood(text_lower)
+        mood = self._extract_mood(matches['mood'])
         
         # Extract medications
         medications = self._extract_medications(text)
         
         # Extract lifestyle context
-        lifestyle = self._extract_lifestyle(text_lower)
+        lifestyle = self._extract_lifestyle(matches['lifestyle'], text_lower)
         
-        return {
+        analysis = {
             'symptoms': symptoms,
             'mood': mood,
             'medications': medications,
@@ -86,28 +119,62 @@ class TextAnalyzerService:
             'raw_text': text,
             'analyzed_at': datetime.utcnow().isoformat()
         }
+        
+        if self.cache is not None:
+            self.cache.put(key, self._copy_analysis(analysis, text))
+        
+        return analysis
+    
+    @staticmethod
+    def _copy_analysis(analysis: Dict, text: str) -> Dict:
+        """Copy an analysis so cached and returned results never share mutable parts"""
+        return {
+            'symptoms': list(analysis['symptoms']),
+            'mood': dict(analysis['mood'], scores=dict(analysis['mood']['scores'])),
+            'medications': [dict(med) for med in analysis['medications']],
+            'lifestyle': {
+                category: {
+                    field: list(value) if isinstance(value, list) else value
+                    for field, value in details.items()
+                }
+                for category, details in analysis['lifestyle'].items()
+            },
+            'raw_text': text,
+            'analyzed_at': datetime.utcnow().isoformat()
+        }
+    
+    def analyze_batch(self, texts: List[str]) -> List[Dict]:
+        """
+        Analyze a batch of voice note texts
+        
+        Args:
+            texts: List of voice note texts to analyze
+            
+        Returns:
+            List of analysis dictionaries, in the same order as the input
+        """
+        return [self.analyze(text) for text in texts]
     
-    def _extract_symptoms(self, text: str) -> List[str]:
-        """Extract symptoms from text"""
+    def _extract_symptoms(self, matches: Dict[str, Set[str]]) -> List[str]:
+        """Extract symptoms from matched symptom keywords"""
         detected_symptoms = []
         
-        for symptom, keywords in self.SYMPTOM_KEYWORDS.items():
-            for keyword in keywords:
-                if keyword in text:
-                    # Convert snake_case to readable format
-                    readable_name = symptom.replace('_', ' ').title()
-                    if readable_name not in detected_symptoms:
-                        detected_symptoms.append(readable_name)
-                    break
+        # Keep the keyword table order so output is stable
+        for symptom in self.SYMPTOM_KEYWORDS:
+            if symptom in matches:
+                # Convert snake_case to readable format
+                readable_name = symptom.replace('_', ' ').title()
+                if readable_name not in detected_symptoms:
+                    detected_symptoms.append(readable_name)
         
         return detected_symptoms
     
-    def _extract_mood(self, text: str) -> Dict[str, any]:
-        """Extract mood/mental state from text"""
+    def _extract_mood(self, matches: Dict[str, Set[str]]) -> Dict[str, any]:
+        """Extract mood/mental state from matched mood keywords"""
         mood_scores = {}
         
-        for mood, keywords in self.MOOD_KEYWORDS.items():
-            score = sum(1 for keyword in keywords if keyword in text)
+        for mood in self.MOOD_KEYWORDS:
+            score = len(matches.get(mood, ()))
             if score > 0:
                 mood_scores[mood] = score
         
@@ -148,12 +215,13 @@ class TextAnalyzerService:
         
         return unique_meds
     
-    def _extract_lifestyle(self, text: str) -> Dict[str, any]:
-        """Extract lifestyle context from text"""
+    def _extract_lifestyle(self, matches: Dict[str, Set[str]], text: str) -> Dict[str, any]:
+        """Extract lifestyle context from matched lifestyle keywords and text"""
         lifestyle = {}
         
         for category, keywords in self.LIFESTYLE_KEYWORDS.items():
-            mentions = [keyword for keyword in keywords if keyword in text]
+            found = matches.get(category, ())
+            mentions = [keyword for keyword in keywords if keyword in found]
             if mentions:
                 lifestyle[category] = {
                     'mentioned': True,
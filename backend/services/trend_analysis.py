@@ -0,0 +1,221 @@
+"""
+Trend Analysis
+Dense per-period time series of symptoms, moods and sleep, with vectorized slopes,
+rolling averages and change-point detection
+"""
+
+from datetime import date, datetime
+from typing import Dict, List, Optional
+import numpy as np
+from services.health_aggregator import HealthAggregator
+
+
+class DailySeries:
+    """Calendar matrices (periods x names) folded from HealthAggregator day, week or month buckets"""
+
+    # Relative change across the window needed to call a trend rising or falling
+    TREND_THRESHOLD = 0.25
+
+    # Logged periods needed before a trend or change point is reported
+    MIN_TREND_PERIODS = 3
+
+    # Logged periods required on each side of a change point
+    MIN_SEGMENT_PERIODS = 2
+
+    # Standardized mean shift (in standard deviations) that flags a change point
+    CHANGE_THRESHOLD = 2.0
+
+    # Days covered by the rolling averages (at least one bucket)
+    ROLLING_WINDOW = 7
+
+    # Approximate days per bucket, used to size the rolling window
+    PERIOD_DAYS = {'day': 1, 'week': 7, 'month': 30}
+
+    def __init__(self, dates: List[str], log_counts: np.ndarray,
+                 symptom_names: List[str], symptoms: np.ndarray,
+                 mood_names: List[str], moods: np.ndarray, sleep_hours: np.ndarray,
+                 granularity: str = 'day'):
+        """
+        Args:
+            dates: First day (YYYY-MM-DD) of every period in the window, oldest first
+            log_counts: Logs per period
+            symptom_names / symptoms: Column names and (periods x symptoms) occurrence counts
+            mood_names / moods: Column names and (periods x moods) occurrence counts
+            sleep_hours: Average reported sleep hours per period (NaN when not reported)
+            granularity: Period size, one of HealthAggregator.GRANULARITIES
+        """
+        self.dates = dates
+        self.granularity = granularity
+        # Day offset of every period from the first, so slopes stay per day at any granularity
+        self.offsets = np.array(
+            [(date.fromisoformat(day) - date.fromisoformat(dates[0])).days for day in dates] if dates else [],
+            dtype=float
+        )
+        self.log_counts = log_counts
+        self.symptom_names = symptom_names
+        self.symptoms = symptoms
+        self.mood_names = mood_names
+        self.moods = moods
+        self.sleep_hours = sleep_hours
+
+    @classmethod
+    def from_aggregator(cls, aggregator: HealthAggregator, since: str,
+                        until: Optional[str] = None) -> 'DailySeries':
+        """
+        Build dense series for every period from `since` to `until` (today if omitted)
+
+        Args:
+            aggregator: Aggregator holding the day, week or month buckets
+            since: First day (YYYY-MM-DD) of the window
+            until: Last day (YYYY-MM-DD) of the window
+        """
+        until = until or datetime.utcnow().date().isoformat()
+        dates = aggregator.periods(since, until)
+        index = {day: row for row, day in enumerate(dates)}
+        length = len(dates)
+
+        buckets = aggregator.buckets(since, until)
+        rows = np.array([index[bucket['day']] for bucket in buckets], dtype=np.intp)
+
+        log_counts = np.zeros(length)
+        sleep_totals = np.zeros(length)
+        sleep_mentions = np.zeros(length)
+        if buckets:
+            log_counts[rows] = [bucket['log_count'] for bucket in buckets]
+            sleep_totals[rows] = [bucket['sleep_hours_total'] for bucket in buckets]
+            sleep_mentions[rows] = [bucket['sleep_mentions'] for bucket in buckets]
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sleep_hours = np.where(sleep_mentions > 0, sleep_totals / sleep_mentions, np.nan)
+
+        symptom_names, symptoms = cls._matrix(buckets, rows, length, 'symptoms')
+        mood_names, moods = cls._matrix(buckets, rows, length, 'moods')
+
+        return cls(dates, log_counts, symptom_names, symptoms, mood_names, moods, sleep_hours,
+                   aggregator.granularity)
+
+    @staticmethod
+    def _matrix(buckets: List[Dict], rows: np.ndarray, length: int, field: str):
+        """Scatter one per-name counter map of every bucket into a (periods x names) matrix"""
+        names = sorted({name for bucket in buckets for name in bucket[field]}, key=str)
+        index = {name: column for column, name in enumerate(names)}
+
+        matrix = np.zeros((length, len(names)))
+        entries = [
+            (row, index[name], count)
+            for row, bucket in zip(rows, buckets)
+            for name, count in bucket[field].items()
+        ]
+        if entries:
+            entry_rows, columns, counts = zip(*entries)
+            matrix[list(entry_rows), list(columns)] = counts
+        return names, matrix
+
+    @property
+    def logged(self) -> np.ndarray:
+        """Mask of periods with at least one log"""
+        return self.log_counts > 0
+
+    def per_log(self, matrix: np.ndarray) -> np.ndarray:
+        """Occurrences per log in each period (0 in periods without logs)"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.logged[:, None], matrix / self.log_counts[:, None], 0.0)
+
+    def rolling_mean(self, values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        """
+        Trailing ROLLING_WINDOW-day mean of a series, over masked periods only
+
+        Args:
+            values: Per-period values
+            mask: Periods that carry a value
+
+        Returns:
+            Array of rolling means (NaN where the window holds no value)
+        """
+        window = max(1, self.ROLLING_WINDOW // self.PERIOD_DAYS[self.granularity])
+        sums = np.cumsum(np.where(mask, values, 0.0))
+        counts = np.cumsum(mask.astype(float))
+        sums[window:] = sums[window:] - sums[:-window].copy()
+        counts[window:] = counts[window:] - counts[:-window].copy()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+    def trends(self, values: np.ndarray, mask: np.ndarray) -> List[Dict]:
+        """
+        Fit a slope and find the strongest change point for every column at once
+
+        Args:
+            values: (periods x columns) values
+            mask: Periods that carry a value (the same for every column)
+
+        Returns:
+            One dictionary per column with:
+            - trend: 'increasing', 'decreasing' or 'stable'
+            - weekly_change: Least-squares slope, in value units per week
+            - change_point: {date, direction, before, after} of the largest
+              shift in level, or None when no shift is significant
+        """
+        columns = values.shape[1]
+        rows = np.flatnonzero(mask)
+        days = self.offsets[rows]
+        observed = values[mask]
+        count = len(rows)
+
+        slopes = np.zeros(columns)
+        labels = np.full(columns, 'stable', dtype=object)
+        change_points = [None] * columns
+
+        if count >= self.MIN_TREND_PERIODS and columns:
+            # Least-squares slope of every column against the day index
+            offsets = days - days.mean()
+            means = observed.mean(axis=0)
+            slopes = offsets @ (observed - means) / (offsets @ offsets)
+
+            # Change across the observed span relative to the average level
+            with np.errstate(invalid='ignore', divide='ignore'):
+                relative = np.where(means > 0, slopes * (days[-1] - days[0]) / means, 0.0)
+            labels[relative > self.TREND_THRESHOLD] = 'increasing'
+            labels[relative < -self.TREND_THRESHOLD] = 'decreasing'
+
+            change_points = self._change_points(observed, rows)
+
+        return [
+            {
+                'trend': labels[column],
+                'weekly_change': round(float(slopes[column]) * 7, 3) + 0.0,  # no -0.0
+                'change_point': change_points[column],
+            }
+            for column in range(columns)
+        ]
+
+    def _change_points(self, observed: np.ndarray, rows: np.ndarray) -> List[Optional[Dict]]:
+        """Single mean-shift change point per column, scored by a standardized difference of segment means"""
+        count, columns = observed.shape
+        segment = self.MIN_SEGMENT_PERIODS
+        if count < 2 * segment:
+            return [None] * columns
+
+        # Candidate splits: the new level starts at observed period k
+        splits = np.arange(segment, count - segment + 1)
+        totals = np.cumsum(observed, axis=0)
+        before = totals[splits - 1] / splits[:, None]
+        after = (totals[-1] - totals[splits - 1]) / (count - splits)[:, None]
+
+        spread = observed.std(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            scores = np.abs(after - before) * np.sqrt(splits * (count - splits) / count)[:, None] / spread
+        scores = np.nan_to_num(scores, nan=0.0, posinf=0.0)
+
+        best = scores.argmax(axis=0)
+        picked = np.arange(columns)
+        flagged = scores[best, picked] > self.CHANGE_THRESHOLD
+
+        return [
+            {
+                'date': self.dates[rows[splits[best[column]]]],
+                'direction': 'up' if after[best[column], column] > before[best[column], column] else 'down',
+                'before': round(float(before[best[column], column]), 3),
+                'after': round(float(after[best[column], column]), 3),
+            } if flagged[column] else None
+            for column in range(columns)
+        ]
@@ -0,0 +1,13 @@
+"""
+WSGI Entry Point
+Builds the HealthVoice application for a WSGI server:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+gunicorn.conf.py leaves preload_app off, so each worker imports this module
+after forking and builds its own MongoClient, caches and report pool.
+"""
+
+from app import create_app
+
+app = create_app()
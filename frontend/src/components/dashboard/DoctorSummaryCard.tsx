@@ -2,7 +2,7 @@ import { FileText, Copy, Download, CheckCircle, Loader2 } from "lucide-react";
 import { Button } from "@/components/ui/button";
 import { useState, useEffect } from "react";
 import { useToast } from "@/hooks/use-toast";
-import { summaryApi, reportsApi } from "@/lib/api";
+import { bundleApi, reportsApi } from "@/lib/api";
 import { getUserId } from "@/lib/userSession";
 
 export function DoctorSummaryCard() {
@@ -16,7 +16,7 @@ export function DoctorSummaryCard() {
       try {
         setLoading(true);
         const userId = getUserId();
-        const result = await summaryApi.getSummary(30, userId);
+        const { summary: result } = await bundleApi.getBundle(userId);
         setSummary(result.summary || "No health logs available for summary. Start logging your health to generate a summary.");
       } catch (error) {
         console.error("Failed to fetch summary:", error);
@@ -1,6 +1,6 @@
 import { Activity, Pill, Brain, Sun, CheckCircle2, Loader2 } from "lucide-react";
 import { useEffect, useState } from "react";
-import { insightsApi } from "@/lib/api";
+import { bundleApi } from "@/lib/api";
 import { getUserId } from "@/lib/userSession";
 
 interface InsightSection {
@@ -19,7 +19,7 @@ export function HealthInsightsPanel() {
       try {
         setLoading(true);
         const userId = getUserId();
-        const data = await insightsApi.getInsights(7, userId);
+        const { insights: data } = await bundleApi.getBundle(userId);
         
         const sections: InsightSection[] = [
           {
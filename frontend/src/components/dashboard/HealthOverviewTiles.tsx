@@ -1,7 +1,7 @@
 import { Activity, Brain, Pill, TrendingUp, LucideIcon, Loader2 } from "lucide-react";
 import { cn } from "@/lib/utils";
 import { useEffect, useState } from "react";
-import { dashboardApi } from "@/lib/api";
+import { bundleApi } from "@/lib/api";
 import { getUserId } from "@/lib/userSession";
 
 interface TileData {
@@ -44,7 +44,7 @@ export function HealthOverviewTiles() {
     try {
       setLoading(true);
       const userId = getUserId();
-      const overview = await dashboardApi.getOverview(userId);
+      const { overview } = await bundleApi.getBundle(userId);
       setData(overview);
       console.log("Dashboard data refreshed:", overview);
     } catch (error) {
@@ -59,8 +59,8 @@ export function HealthOverviewTiles() {
     // Listen for health log updates
     const handleUpdate = () => {
       console.log("Health log updated - refreshing dashboard...");
-      // Small delay to ensure backend has processed the new log
-      setTimeout(() => fetchData(), 500);
+      // Refresh together with the other panels so they share one bundle request
+      fetchData();
     };
     window.addEventListener("healthLogUpdated", handleUpdate);
     // Also refresh every 30 seconds to catch any external updates
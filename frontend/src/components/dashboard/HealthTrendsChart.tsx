@@ -9,7 +9,7 @@ import {
   Legend,
 } from "recharts";
 import { useEffect, useState } from "react";
-import { trendsApi } from "@/lib/api";
+import { bundleApi } from "@/lib/api";
 import { Loader2 } from "lucide-react";
 import { format, parseISO, subDays } from "date-fns";
 import { getUserId } from "@/lib/userSession";
@@ -23,7 +23,7 @@ export function HealthTrendsChart() {
       try {
         setLoading(true);
         const userId = getUserId();
-        const trends = await trendsApi.getTrends(7, userId);
+        const { trends } = await bundleApi.getBundle(userId);
         
         // Transform daily breakdown into chart data
         const chartData = trends.daily_breakdown.map((day) => ({
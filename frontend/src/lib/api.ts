@@ -51,6 +51,38 @@ export const healthLogApi = {
       body: JSON.stringify({ prompt, user_id: userId }),
     });
   },
+
+  /**
+   * List a user's raw health logs, newest first, one page at a time
+   * Pass the previous page's next_cursor to fetch the following page
+   */
+  list: async (userId: string, options: { limit?: number; cursor?: string | null; fields?: string[] } = {}) => {
+    const params = new URLSearchParams();
+    params.set('user_id', userId);
+    if (options.limit) {
+      params.set('limit', String(options.limit));
+    }
+    if (options.cursor) {
+      params.set('cursor', options.cursor);
+    }
+    if (options.fields?.length) {
+      params.set('fields', options.fields.join(','));
+    }
+    return apiRequest<{
+      logs: Array<{
+        id: string;
+        prompt?: string;
+        summary?: string;
+        analysis?: Record<string, unknown>;
+        analysis_version?: number;
+        user_id?: string;
+        timestamp?: string;
+        created_at?: string;
+      }>;
+      next_cursor: string | null;
+      has_more: boolean;
+    }>(`/api/health-logs?${params.toString()}`);
+  },
 };
 
 /**
@@ -151,26 +183,52 @@ export const summaryApi = {
 /**
  * Trends API
  */
+export type TrendDirection = 'increasing' | 'decreasing' | 'stable';
+
+export type TrendGranularity = 'day' | 'week' | 'month' | 'auto';
+
+export type ChangePoint = {
+  date: string;
+  direction: 'up' | 'down';
+  before: number;
+  after: number;
+};
+
 export const trendsApi = {
   /**
    * Get health trends analysis
+   * Long windows are bucketed by week or month unless a granularity is given
    */
-  getTrends: async (days: number = 30, userId?: string) => {
-    const url = userId 
-      ? `/api/trends?days=${days}&user_id=${userId}` 
-      : `/api/trends?days=${days}`;
+  getTrends: async (days: number = 30, userId?: string, granularity: TrendGranularity = 'auto') => {
+    const params = new URLSearchParams({ days: String(days), granularity });
+    if (userId) {
+      params.set('user_id', userId);
+    }
+    const url = `/api/trends?${params.toString()}`;
     return apiRequest<{
       symptom_frequency: Array<{
         symptom: string;
         total_occurrences: number;
         frequency_percentage: number;
-        trend: string;
+        trend: TrendDirection;
+        weekly_change: number;
+        change_point: ChangePoint | null;
       }>;
       mood_trends: Array<{
         mood: string;
         occurrences: number;
         percentage: number;
+        trend: TrendDirection;
+        weekly_change: number;
+        change_point: ChangePoint | null;
       }>;
+      sleep_trend?: {
+        average_hours: number | null;
+        nights_reported: number;
+        trend: TrendDirection;
+        weekly_change: number;
+        change_point: ChangePoint | null;
+      };
       medication_adherence: {
         total_mentions: number;
         unique_medications: number;
@@ -186,11 +244,55 @@ export const trendsApi = {
         unique_symptoms: number;
         mood: string | null;
         medications_count: number;
+        symptoms_rolling_avg: number | null;
+        sleep_hours: number | null;
+        sleep_rolling_avg: number | null;
       }>;
       period_days: number;
+      granularity: Exclude<TrendGranularity, 'auto'>;
       total_logs: number;
       analysis_date: string;
-    }>(`/api/trends?days=${days}`);
+    }>(url);
+  },
+};
+
+/**
+ * Dashboard Bundle API
+ */
+export type DashboardBundle = {
+  overview: Awaited<ReturnType<typeof dashboardApi.getOverview>>;
+  insights: Awaited<ReturnType<typeof insightsApi.getInsights>>;
+  summary: Awaited<ReturnType<typeof summaryApi.getSummary>>;
+  trends: Awaited<ReturnType<typeof trendsApi.getTrends>>;
+  generated_at: string;
+};
+
+// Request currently in flight, shared by every panel that asks for the same bundle
+let pendingBundle: { url: string; promise: Promise<DashboardBundle> } | null = null;
+
+export const bundleApi = {
+  /**
+   * Get every dashboard panel from one request.
+   * Panels refreshing together (e.g. after a new log) share a single in-flight request.
+   */
+  getBundle: async (userId?: string) => {
+    const params = new URLSearchParams({ insights_days: '7', summary_days: '30', trends_days: '7' });
+    if (userId) {
+      params.set('user_id', userId);
+    }
+    const url = `/api/dashboard/bundle?${params.toString()}`;
+
+    if (pendingBundle && pendingBundle.url === url) {
+      return pendingBundle.promise;
+    }
+
+    const promise = apiRequest<DashboardBundle>(url).finally(() => {
+      if (pendingBundle?.promise === promise) {
+        pendingBundle = null;
+      }
+    });
+    pendingBundle = { url, promise };
+    return promise;
   },
 };
 
@@ -212,17 +314,63 @@ export const healthApi = {
 /**
  * Reports API
  */
+export type ReportJob = {
+  job_id: string;
+  status: 'queued' | 'running' | 'completed' | 'failed';
+  days: number;
+  report_type: string;
+  created_at: string;
+  finished_at: string | null;
+  size_bytes?: number;
+  error?: string;
+  status_url: string;
+  download_url?: string;
+};
+
+// Delay between report status polls
+const REPORT_POLL_INTERVAL_MS = 1000;
+
 export const reportsApi = {
+  /**
+   * Queue a PDF report for rendering in the background
+   */
+  submitReport: async (days: number = 30, type: string = 'summary', userId?: string) => {
+    return apiRequest<ReportJob>('/api/reports', {
+      method: 'POST',
+      body: JSON.stringify({ days, type, user_id: userId }),
+    });
+  },
+
+  /**
+   * Get the status of a queued report
+   */
+  getReportStatus: async (jobId: string) => {
+    return apiRequest<ReportJob>(`/api/reports/${jobId}`);
+  },
+
   /**
    * Download health report as PDF file
+   * PDFs are queued, polled until rendered and then downloaded
    */
   downloadReport: async (days: number = 30, type: string = 'summary', userId?: string, format: string = 'pdf') => {
     const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:5000';
     const userParam = userId ? `&user_id=${userId}` : '';
     const formatParam = `&format=${format}`;
-    const url = `${API_BASE_URL}/api/reports/download?days=${days}&type=${type}${userParam}${formatParam}`;
+    let url = `${API_BASE_URL}/api/reports/download?days=${days}&type=${type}${userParam}${formatParam}`;
     
     try {
+      if (format === 'pdf') {
+        let job = await reportsApi.submitReport(days, type, userId);
+        while (job.status === 'queued' || job.status === 'running') {
+          await new Promise((resolve) => setTimeout(resolve, REPORT_POLL_INTERVAL_MS));
+          job = await reportsApi.getReportStatus(job.job_id);
+        }
+        if (job.status !== 'completed' || !job.download_url) {
+          throw new Error(job.error || 'Report rendering failed');
+        }
+        url = `${API_BASE_URL}${job.download_url}`;
+      }
+      
       const response = await fetch(url);
       if (!response.ok) {
         throw new Error(`HTTP error! status: ${response.status}`);
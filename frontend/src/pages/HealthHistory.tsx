@@ -28,7 +28,7 @@ export default function HealthHistory() {
       try {
         setLoading(true);
         const userId = getUserId();
-        const trends = await trendsApi.getTrends(90, userId); // Last 90 days
+        const trends = await trendsApi.getTrends(90, userId, 'day'); // Last 90 days, one entry per day
         
         // Transform daily breakdown into history entries
         const history = trends.daily_breakdown